@@ -1,18 +1,26 @@
-import os
+import csv
 from django.contrib import admin
 from django.db import models
 from django.utils.html import format_html
+from django.utils import timezone
 from django.core.mail import EmailMessage
 from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib import messages
 from django.urls import reverse
 from django.shortcuts import redirect
+from django.http import Http404
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.utils.dateparse import parse_date
+from django.utils.http import url_has_allowed_host_and_scheme
 
 
 from unfold.admin import ModelAdmin, TabularInline
 # import inline from unfol
 from unfold.contrib.forms.widgets import WysiwygWidget
+from unfold.contrib.filters.admin import RangeDateFilter, RangeDateTimeFilter
+from unfold.decorators import action as unfold_action
 
 
 from . models import (
@@ -28,6 +36,7 @@ from . models import (
     QuoteRequest,
     QuoteItem,
     Invoice,
+    Payment,
     Vacancy,
     Application,
     EmailMessageTemplate,
@@ -35,8 +44,27 @@ from . models import (
     ServiceLocation,
     Pricing,
     HeroSection,
+    ApplicationNotification,
+    ArchivedQuoteRequest,
+    ArchivedContact,
+    ArchivedApplication,
+    DailySummary,
+    DocumentAccess,
+    RequestProfile,
+    quote_subtotal,
 
 )
+from .notifications import update_application_status, send_queued_notifications_async
+from .search import IndexedSearchMixin
+from .pagination import KeysetPaginator
+from .widgets import CachedAutocompleteSelect
+from .archive import restore, spec_for_archive_model
+from .documents import attach_document, default_email_body, pdf_response
+from .exports import export_response, zip_response
+from .reports import monthly_totals, status_totals
+from .payments import StatementError, parse_statement, reconcile, store_preview, take_preview
+from .forms import BankStatementForm
+from .profiling import PARAM as PROFILE_PARAM, call_tree, profile_token, top_functions
 
 @admin.register(MyCompany)
 class MyCompanyAdmin(ModelAdmin):
@@ -51,6 +79,7 @@ class ServiceAdmin(ModelAdmin):
     search_fields = ('name',)
     list_filter = ('is_active',)
     prepopulated_fields = {'slug': ('name',)}
+    ordering = ('name',)
 
     formfield_overrides = {
         models.TextField: {
@@ -58,6 +87,12 @@ class ServiceAdmin(ModelAdmin):
         }
     }
 
+    def get_search_results(self, request, queryset, search_term):
+        # Quote line items may only use active services
+        if request.GET.get("model_name") == "quoteitem" and request.GET.get("field_name") == "service":
+            queryset = queryset.filter(is_active=True)
+        return super().get_search_results(request, queryset, search_term)
+
 
 
 @admin.register(FAQ)
@@ -65,14 +100,18 @@ class FAQAdmin(ModelAdmin):
     list_display = ('service', 'question', 'is_general')
     search_fields = ('service', 'question')
     list_filter = ('is_general',)
+    list_select_related = ('service',)
 
 
 
 @admin.register(Contact)
-class ContactAdmin(admin.ModelAdmin):
+class ContactAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ("first_name", "email", "phone", "created_at", "is_read")
     list_filter = ("is_read",)
     search_fields = ("first_name", "email", "phone", "message")
+    ordering = ("-created_at",)
+    paginator = KeysetPaginator
+    show_full_result_count = False
 
     # ✅ Admin cannot edit, only view/delete
     def has_change_permission(self, request, obj=None):
@@ -88,34 +127,108 @@ class ContactAdmin(admin.ModelAdmin):
 
 
 @admin.register(QuoteRequest)
-class QuoteRequestAdmin(ModelAdmin):
+class QuoteRequestAdmin(IndexedSearchMixin, ModelAdmin):
     list_display = ('name', 'email', 'phone', 'city', 'address', 'status', 'created_at')
     search_fields = ('name', 'email', 'phone', 'city', 'address')
     list_display_links = ('name', 'email', 'phone')
     list_filter = ('status', 'created_at')
     list_per_page = 20
     ordering = ('-created_at',)
+    paginator = KeysetPaginator
+    show_full_result_count = False
+    actions = ['export_csv', 'export_xlsx']
+
+    @admin.action(description="Export selected quote requests to CSV")
+    def export_csv(self, request, queryset):
+        return export_response(queryset, "csv", "quote-requests")
+
+    @admin.action(description="Export selected quote requests to Excel")
+    def export_xlsx(self, request, queryset):
+        return export_response(queryset, "xlsx", "quote-requests")
+
+    def get_search_results(self, request, queryset, search_term):
+        # The quote form's autocomplete only offers requests still waiting for a quote
+        if request.GET.get("model_name") == "quote" and request.GET.get("field_name") == "quote_request":
+            queryset = queryset.filter(status="pending")
+        return super().get_search_results(request, queryset, search_term)
 
     # def has_change_permission(self, request, obj = ...):
     #     return False
 
 
+class PaymentInline(TabularInline):
+    model = Payment
+    extra = 0
+    fields = ('date', 'amount', 'method', 'reference')
+
+
+class BalanceFilter(admin.SimpleListFilter):
+    title = "balance"
+    parameter_name = "balance"
+
+    def lookups(self, request, model_admin):
+        return (("outstanding", "Outstanding"), ("overdue", "Overdue"))
+
+    def queryset(self, request, queryset):
+        if self.value() == "outstanding":
+            return queryset.outstanding()
+        if self.value() == "overdue":
+            return queryset.overdue()
+        return queryset
+
+
+@admin.register(Payment)
+class PaymentAdmin(ModelAdmin):
+    list_display = ('date', 'invoice', 'amount', 'method', 'reference')
+    list_filter = ('method', ('date', RangeDateFilter))
+    list_filter_submit = True
+    list_select_related = ('invoice',)
+    search_fields = ('invoice__invoice_id', 'reference')
+    autocomplete_fields = ('invoice',)
+    date_hierarchy = 'date'
+    list_per_page = 50
+
+
 @admin.register(Invoice)
 class InvoiceAdmin(ModelAdmin):
-    list_display = ('invoice_id', 'quote', 'total', 'is_paid', 'view_invoice', 'send_invoice_button')
+    list_display = ('invoice_id', 'quote', 'total', 'due', 'is_paid', 'view_invoice', 'send_invoice_button')
     search_fields = ('invoice_id', 'quote__quote_id')
-    list_filter = ('is_paid', 'is_sent')
+    list_filter = (BalanceFilter, 'is_paid', 'is_sent', ('created_at', RangeDateTimeFilter))
+    list_filter_submit = True
+    list_select_related = ('quote__quote_request',)
     list_per_page = 20
     ordering = ('-created_at',)
-    readonly_fields = ('invoice_id',)
+    paginator = KeysetPaginator
+    show_full_result_count = False
+    readonly_fields = ('invoice_id', 'pay', 'due')
+    inlines = [PaymentInline]
     # editable_fields = ('is_paid',)
     list_editable = ('is_paid',)
+    actions = ['download_pdfs', 'export_csv', 'export_xlsx']
+    actions_list = ['import_payments']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(subtotal=quote_subtotal("quote_id"))
+
+    @admin.display(description="Total", ordering="subtotal")
+    def total(self, obj):
+        return obj.subtotal
+
+    @admin.action(description="Download selected invoices as ZIP")
+    def download_pdfs(self, request, queryset):
+        return zip_response(queryset, f"invoices-{timezone.localdate():%Y%m%d}.zip")
 
+    @admin.action(description="Export selected invoices to CSV")
+    def export_csv(self, request, queryset):
+        return export_response(queryset, "csv", "invoices")
+
+    @admin.action(description="Export selected invoices to Excel")
+    def export_xlsx(self, request, queryset):
+        return export_response(queryset, "xlsx", "invoices")
 
     def view_invoice(self, obj):
-        if obj.invoice_file:
-            return format_html('<a href="{}" target="_blank">View Invoice</a>', obj.invoice_file.url)
-        return "No invoice"
+        url = reverse('admin:invoice_pdf', args=[obj.pk])
+        return format_html('<a href="{}" target="_blank">View Invoice</a>', url)
     view_invoice.short_description = "Invoice"
 
     def send_invoice_button(self, obj):
@@ -131,28 +244,75 @@ class InvoiceAdmin(ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('send-invoice/<int:invoice_id>/', self.admin_site.admin_view(self.send_invoice_view), name='send_invoice'),
+            path('<int:invoice_id>/pdf/', self.admin_site.admin_view(self.invoice_pdf_view), name='invoice_pdf'),
+            path('import-payments/', self.admin_site.admin_view(self.import_payments_view), name='import_payments'),
         ]
         return custom_urls + urls
 
+    @unfold_action(description="Import bank statement", url_path="import-payments-link", icon="upload_file")
+    def import_payments(self, request):
+        return redirect('admin:import_payments')
+
+    def import_payments_view(self, request):
+        """Upload a bank CSV, preview the matches, then record the payments."""
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+        form = BankStatementForm()
+        result = token = None
+        if request.method == "POST" and request.POST.get("token"):
+            lines = take_preview(request.POST["token"])
+            if lines is None:
+                self.message_user(request, "The preview has expired; please upload the statement again.", messages.ERROR)
+                return redirect('admin:import_payments')
+            result = reconcile(lines)
+            self.message_user(
+                request,
+                f"{len(result.matches)} payment(s) totalling ${result.matched_total} recorded on "
+                f"{len(result.invoices)} invoice(s); {len(result.unmatched)} line(s) unmatched, "
+                f"{len(result.duplicates)} already recorded.",
+            )
+            return redirect('admin:serviceapp_invoice_changelist')
+        if request.method == "POST":
+            form = BankStatementForm(request.POST, request.FILES)
+            if form.is_valid():
+                try:
+                    lines = parse_statement(form.cleaned_data["statement"])
+                except (StatementError, UnicodeDecodeError, csv.Error) as e:
+                    form.add_error("statement", str(e))
+                else:
+                    result = reconcile(lines, apply=False)
+                    token = store_preview(lines)
+
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Import bank statement",
+            "opts": self.model._meta,
+            "form": form,
+            "result": result,
+            "token": token,
+        }
+        return TemplateResponse(request, "admin/serviceapp/import_payments.html", context)
+
+    def invoice_pdf_view(self, request, invoice_id):
+        invoice = self.get_queryset(request).select_related("quote__company", "quote__quote_request").filter(pk=invoice_id).first()
+        if invoice is None or not self.has_view_permission(request, invoice):
+            raise Http404("Invoice not found.")
+        return pdf_response(request, invoice, f"invoice_{invoice.invoice_id}.pdf")
+
     def send_invoice_view(self, request, invoice_id, *args, **kwargs):
         invoice = self.get_object(request, invoice_id)
         if invoice and invoice.quote and invoice.quote.quote_request:
-            # Generate a new PDF
-            invoice.generate_invoice()
-            invoice.refresh_from_db()
-            
             template = EmailMessageTemplate.objects.filter(type="invoice", is_active=True).first()
             # Send the email with the PDF attached
             mail = EmailMessage(
                 subject= template.subject if template else f"Your Invoice {invoice.invoice_id}",
-                body= template.body if template else "Your invoice is ready. Please find the attached PDF.",
+                body= template.body if template else default_email_body("invoice"),
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 to=[invoice.quote.quote_request.email],
             )
-            if invoice.invoice_file and hasattr(invoice.invoice_file, "path"):
-                file_path = invoice.invoice_file.path
-                if os.path.exists(file_path):
-                    mail.attach_file(file_path)
+            # Fresh PDF attached, or a signed link to it
+            attach_document(mail, invoice)
             mail.send(fail_silently=False)
             
             invoice.is_sent = True
@@ -171,14 +331,48 @@ class QuoteItemAdmin(ModelAdmin):
 class QuoteItemInline(TabularInline):
     model = QuoteItem
     extra = 1
+    autocomplete_fields = ('service',)
+
+    def _service_choice_cache(self, request):
+        # Shared by every row widget built while handling this request
+        if not hasattr(request, "_quote_service_choices"):
+            request._quote_service_choices = {}
+        return request._quote_service_choices
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "service":
+            kwargs["widget"] = CachedAutocompleteSelect(
+                db_field, self.admin_site, using=kwargs.get("using"),
+                choice_cache=self._service_choice_cache(request),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        if obj is not None and not getattr(request, "_quote_service_choices_loaded", False):
+            # Load the labels of every service already on this quote in one query
+            request._quote_service_choices_loaded = True
+            self._service_choice_cache(request).update(
+                (str(service.pk), str(service))
+                for service in Service.objects.filter(quoteitem__quote=obj).distinct()
+            )
+        return formset
+
 
 @admin.register(Quote)
-class QuoteAdmin(ModelAdmin):
-    list_display = ('quote_id', "get_quote_request_name", 'city', 'address', 'status', 'quote_link', 'created_at', 'total', 'mail_sent', 'resend_mail')
+class QuoteAdmin(IndexedSearchMixin, ModelAdmin):
+    list_display = ('quote_id', "get_quote_request_name", 'city', 'address', 'status', 'quote_link', 'created_at', 'total', 'mail_sent', 'last_opened', 'resend_mail')
     search_fields = ('quote_id', 'quote_request__name', 'city', 'address')
     list_per_page = 20
     ordering = ('-created_at',)
+    paginator = KeysetPaginator
+    show_full_result_count = False
     readonly_fields = ('quote_id',)
+    autocomplete_fields = ('quote_request',)
+    list_filter = ('status', ('created_at', RangeDateTimeFilter))
+    list_filter_submit = True
+    list_select_related = ('quote_request',)
+    actions = ['download_pdfs', 'export_csv', 'export_xlsx']
 
     fieldsets = (
         ("Quote Information", {
@@ -196,6 +390,18 @@ class QuoteAdmin(ModelAdmin):
         return obj.quote_request.name if obj.quote_request else "-"
     get_quote_request_name.short_description = "Quote Request"
 
+    @admin.action(description="Download selected quotes as ZIP")
+    def download_pdfs(self, request, queryset):
+        return zip_response(queryset, f"quotes-{timezone.localdate():%Y%m%d}.zip")
+
+    @admin.action(description="Export selected quotes to CSV")
+    def export_csv(self, request, queryset):
+        return export_response(queryset, "csv", "quotes")
+
+    @admin.action(description="Export selected quotes to Excel")
+    def export_xlsx(self, request, queryset):
+        return export_response(queryset, "xlsx", "quotes")
+
     def get_form(self, request, obj=None, **kwargs):
         form = super().get_form(request, obj, **kwargs)
 
@@ -204,7 +410,8 @@ class QuoteAdmin(ModelAdmin):
             form.base_fields["company"].initial = MyCompany.objects.first()
             form.base_fields["company"].widget = admin.widgets.AdminHiddenInput()
 
-        # Limit QuoteRequest dropdown to pending requests and the currently associated request
+        # Limit QuoteRequest choices to pending requests and the currently associated request.
+        # The autocomplete widget only renders the selected option; this queryset validates the choice.
         if "quote_request" in form.base_fields:
             if obj and obj.quote_request:
                 # For existing quotes, include the current quote request and all pending requests
@@ -233,11 +440,24 @@ class QuoteAdmin(ModelAdmin):
     #     return "No invoice"
     # invoice_link.short_description = "Invoice"
 
+    def get_queryset(self, request):
+        opens = DocumentAccess.objects.filter(document="quote", object_id=models.OuterRef("pk")).order_by("-accessed_at")
+        return super().get_queryset(request).annotate(
+            last_opened=models.Subquery(opens.values("accessed_at")[:1]),
+            subtotal=quote_subtotal(),
+        )
+
+    @admin.display(description="Opened", ordering="last_opened")
+    def last_opened(self, obj):
+        return obj.last_opened
+
+    @admin.display(description="Total", ordering="subtotal")
+    def total(self, obj):
+        return obj.subtotal
+
     def quote_link(self, obj):
-        if not obj.quotation_file: 
-            return "No quote"
         return format_html(
-            '<a href="{}" target="_blank">View Quote</a>', obj.quotation_file.url
+            '<a href="{}" target="_blank">View Quote</a>', reverse('admin:quote_pdf', args=[obj.pk])
         )
     quote_link.short_description = "Quote"
 
@@ -255,9 +475,16 @@ class QuoteAdmin(ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('resend-mail/<int:quote_id>/', self.admin_site.admin_view(self.resend_quote_mail_view), name='resend_quote_mail'),
+            path('<int:quote_id>/pdf/', self.admin_site.admin_view(self.quote_pdf_view), name='quote_pdf'),
         ]
         return custom_urls + urls
 
+    def quote_pdf_view(self, request, quote_id):
+        quote = self.get_queryset(request).select_related("company", "quote_request").filter(pk=quote_id).first()
+        if quote is None or not self.has_view_permission(request, quote):
+            raise Http404("Quote not found.")
+        return pdf_response(request, quote, f"quote_{quote.quote_id}.pdf")
+
     def resend_quote_mail_view(self, request, quote_id, *args, **kwargs):
         from django.http import HttpResponseRedirect
         from django.contrib import messages
@@ -265,22 +492,16 @@ class QuoteAdmin(ModelAdmin):
         
         quote = self.get_object(request, quote_id)
         if quote and quote.quote_request:
-            # Generate a new PDF
-            quote.generate_quote()
-            quote.refresh_from_db()
-            
             template = EmailMessageTemplate.objects.filter(type="quote", is_active=True).first()
             # Send the email
             mail = EmailMessage(
                 subject= template.subject if template else "Your Quote is Ready",
-                body= template.body if template else "Your quote is ready. Please find the attached PDF.",
+                body= template.body if template else default_email_body("quote"),
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 to=[quote.quote_request.email],
             )
-            if quote.quotation_file and hasattr(quote.quotation_file, "path"):
-                file_path = quote.quotation_file.path
-                if os.path.exists(file_path):
-                    mail.attach_file(file_path)
+            # Fresh PDF attached, or a signed link to it
+            attach_document(mail, quote)
             mail.send(fail_silently=False)
             
             messages.success(request, "Email resent successfully!")
@@ -330,14 +551,27 @@ class VacancyAdmin(ModelAdmin):
     list_filter = ('is_active',)
 
 
+class ApplicationNotificationInline(TabularInline):
+    model = ApplicationNotification
+    extra = 0
+    fields = ('type', 'email', 'status', 'error', 'created_at', 'sent_at')
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Application)
-class ApplicationAdmin(ModelAdmin):
-    list_display = ('name', 'email', 'phone', 'vacancy', 'review_resume', 'status')
+class ApplicationAdmin(IndexedSearchMixin, ModelAdmin):
+    list_display = ('name', 'email', 'phone', 'vacancy', 'review_resume', 'status', 'send_application_button')
     search_fields = ('name', 'email', 'phone', 'vacancy__title')
     list_filter = ('status', 'vacancy')
     list_per_page = 20
     # ordering = ('-created_at',)
     readonly_fields = ('vacancy',)
+    inlines = [ApplicationNotificationInline]
+    actions = ['mark_shortlisted', 'mark_selected', 'mark_rejected']
 
     def review_resume(self, obj):
         if obj.resume:
@@ -345,13 +579,69 @@ class ApplicationAdmin(ModelAdmin):
         return "No resume"
     review_resume.short_description = "Resume"
 
-    # def get_urls(self):
-    #     from django.urls import path
-    #     urls = super().get_urls()
-    #     custom_urls = [
-    #         path('send-application/<int:application_id>/', self.admin_site.admin_view(self.send_application_view), name='send_application'),
-    #     ]
-    #     return custom_urls + urls
+    def send_application_button(self, obj):
+        if obj.status == "pending":
+            return "-"
+        url = reverse('admin:send_application', args=[obj.pk])
+        return format_html('<a class="button" href="{}">Send {}</a>', url, obj.get_status_display().title())
+    send_application_button.short_description = "Notify"
+
+    def _update_status(self, request, queryset, status):
+        updated = update_application_status(queryset, status)
+        self.message_user(request, f"{updated} application(s) marked as {status}. Emails have been queued.")
+
+    @admin.action(description="Mark as short listed and notify")
+    def mark_shortlisted(self, request, queryset):
+        self._update_status(request, queryset, "shortlist")
+
+    @admin.action(description="Mark as selected and notify")
+    def mark_selected(self, request, queryset):
+        self._update_status(request, queryset, "selected")
+
+    @admin.action(description="Mark as rejected and notify")
+    def mark_rejected(self, request, queryset):
+        self._update_status(request, queryset, "rejected")
+
+    def get_urls(self):
+        from django.urls import path
+        urls = super().get_urls()
+        custom_urls = [
+            path('send-application/<int:application_id>/', self.admin_site.admin_view(self.send_application_view), name='send_application'),
+        ]
+        return custom_urls + urls
+
+    def send_application_view(self, request, application_id, *args, **kwargs):
+        application = self.get_object(request, application_id)
+        if application and application.status != "pending":
+            ApplicationNotification.objects.create(
+                application=application, type=application.status, email=application.email
+            )
+            send_queued_notifications_async()
+            self.message_user(request, "Email queued successfully!")
+        else:
+            self.message_user(request, "Set a status before notifying the applicant.", messages.WARNING)
+        return redirect(request.META.get('HTTP_REFERER', reverse('admin:serviceapp_application_changelist')))
+
+
+@admin.register(ApplicationNotification)
+class ApplicationNotificationAdmin(ModelAdmin):
+    list_display = ('email', 'application', 'type', 'status', 'created_at', 'sent_at')
+    search_fields = ('email', 'application__name')
+    list_filter = ('status', 'type')
+    list_per_page = 20
+    ordering = ('-created_at',)
+    readonly_fields = ('application', 'type', 'email', 'status', 'error', 'created_at', 'claimed_at', 'sent_at')
+    actions = ['retry_failed']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Retry failed notifications")
+    def retry_failed(self, request, queryset):
+        retried = queryset.filter(status="failed").update(status="queued", error="")
+        send_queued_notifications_async()
+        self.message_user(request, f"{retried} notification(s) queued again.")
+
 
 @admin.register(EmailMessageTemplate)
 class EmailMessageTemplateAdmin(ModelAdmin):
@@ -383,4 +673,189 @@ class ServiceLocationAdmin(ModelAdmin):
 @admin.register(Pricing)
 class PricingAdmin(ModelAdmin):
     list_display = ("title", "price", "is_active", "order")
-    list_editable = ("is_active", "order")
\ No newline at end of file
+    list_editable = ("is_active", "order")
+
+
+
+@admin.register(DocumentAccess)
+class DocumentAccessAdmin(ModelAdmin):
+    list_display = ('accessed_at', 'document', 'object_id', 'ip_address', 'user_agent')
+    list_filter = ('document',)
+    search_fields = ('=object_id', 'ip_address')
+    date_hierarchy = 'accessed_at'
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'status', 'duration_ms', 'query_count', 'query_ms', 'user', 'report_link')
+    list_filter = ('method', 'status')
+    search_fields = ('path',)
+    date_hierarchy = 'created_at'
+    list_per_page = 50
+    exclude = ('stats', 'allocations', 'queries')
+    actions_list = ['profile_page']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user').defer('stats', 'allocations', 'queries')
+
+    @admin.display(description="Report")
+    def report_link(self, obj):
+        return format_html('<a href="{}">View</a>', reverse('admin:serviceapp_requestprofile_report', args=[obj.pk]))
+
+    def get_urls(self):
+        from django.urls import path
+        urls = super().get_urls()
+        custom_urls = [
+            path('<int:profile_id>/report/', self.admin_site.admin_view(self.report_view), name='serviceapp_requestprofile_report'),
+            path('profile-page/', self.admin_site.admin_view(self.profile_page_view), name='serviceapp_requestprofile_start'),
+        ]
+        return custom_urls + urls
+
+    @unfold_action(description="Profile a page", url_path="profile-page-link", icon="speed")
+    def profile_page(self, request):
+        return redirect('admin:serviceapp_requestprofile_start')
+
+    def profile_page_view(self, request):
+        """Ask for a path, then send the browser there with a signed profiling token."""
+        if not request.user.is_staff:
+            raise PermissionDenied
+        target = request.GET.get("path", "").strip()
+        if target:
+            if target.startswith("/") and url_has_allowed_host_and_scheme(target, allowed_hosts={request.get_host()}):
+                separator = "&" if "?" in target else "?"
+                return redirect(f"{target}{separator}{PROFILE_PARAM}={profile_token(request.user)}")
+            self.message_user(request, "Enter a path on this site, starting with /.", messages.ERROR)
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Profile a page",
+            "opts": self.model._meta,
+            "target": target,
+            "param": PROFILE_PARAM,
+        }
+        return TemplateResponse(request, "admin/serviceapp/profile_start.html", context)
+
+    def report_view(self, request, profile_id):
+        profile = self.get_queryset(request).defer(None).filter(pk=profile_id).first()
+        if profile is None or not self.has_view_permission(request, profile):
+            raise Http404
+        tree, total = call_tree(bytes(profile.stats))
+        queries = sorted(profile.queries, key=lambda q: -q["ms"])
+        context = {
+            **self.admin_site.each_context(request),
+            "title": f"Profile: {profile.method} {profile.path}",
+            "opts": self.model._meta,
+            "profile": profile,
+            "tree": tree,
+            "profiled_ms": total,
+            "functions": top_functions(bytes(profile.stats)),
+            "allocations": profile.allocations,
+            "queries": queries,
+            "queries_truncated": profile.query_count > len(queries),
+        }
+        return TemplateResponse(request, "admin/serviceapp/profile.html", context)
+
+
+@admin.register(DailySummary)
+class DailySummaryAdmin(ModelAdmin):
+    list_display = ('date', 'status', 'quotes', 'quote_value', 'invoiced', 'paid', 'outstanding')
+    list_filter = ('status',)
+    date_hierarchy = 'date'
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        from django.urls import path
+        urls = super().get_urls()
+        custom_urls = [
+            path('reports/', self.admin_site.admin_view(self.reports_view), name='serviceapp_reports'),
+        ]
+        return custom_urls + urls
+
+    def reports_view(self, request):
+        """Revenue and pipeline report, read only from the daily summary table."""
+        start = parse_date(request.GET.get("start") or "")
+        end = parse_date(request.GET.get("end") or "")
+        statuses = status_totals(start, end)
+        totals = {
+            field: sum(row[f"{field}_sum"] or 0 for row in statuses)
+            for field in ('quotes', 'quote_value', 'invoiced', 'paid', 'outstanding')
+        }
+        completed = sum(row['quotes_sum'] for row in statuses if row['status'] == 'completed')
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Revenue & pipeline",
+            "opts": self.model._meta,
+            "start": start,
+            "end": end,
+            "statuses": statuses,
+            "totals": totals,
+            "conversion": round(100 * completed / totals['quotes'], 1) if totals['quotes'] else 0,
+            "months": monthly_totals(),
+            "debtors": Invoice.objects.debtors()[:20],
+            "overdue": Invoice.objects.overdue().aggregate(total=models.Sum("due"), invoices=models.Count("pk")),
+        }
+        return TemplateResponse(request, "admin/serviceapp/reports.html", context)
+
+
+# ---------------------------------------------------
+# Archive (read-only, restorable)
+# ---------------------------------------------------
+class ArchiveAdmin(ModelAdmin):
+    list_per_page = 20
+    ordering = ('-archived_at',)
+    actions = ['restore_selected']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Restore selected records")
+    def restore_selected(self, request, queryset):
+        restored, skipped = restore(spec_for_archive_model(self.model), queryset)
+        self.message_user(request, f"{restored} record(s) restored.")
+        if skipped:
+            self.message_user(
+                request,
+                f"{skipped} record(s) not restored because what they belonged to (e.g. the vacancy) has been deleted.",
+                messages.WARNING,
+            )
+
+
+@admin.register(ArchivedQuoteRequest)
+class ArchivedQuoteRequestAdmin(ArchiveAdmin):
+    list_display = ('name', 'email', 'phone', 'city', 'status', 'created_at', 'archived_at')
+    search_fields = ('name', 'email', 'phone', 'city', 'address')
+    list_filter = ('status',)
+
+
+@admin.register(ArchivedContact)
+class ArchivedContactAdmin(ArchiveAdmin):
+    list_display = ('first_name', 'email', 'phone', 'created_at', 'archived_at')
+    search_fields = ('first_name', 'last_name', 'email', 'phone', 'message')
+
+
+@admin.register(ArchivedApplication)
+class ArchivedApplicationAdmin(ArchiveAdmin):
+    list_display = ('name', 'email', 'phone', 'vacancy', 'status', 'applied_at', 'archived_at')
+    search_fields = ('name', 'email', 'phone')
+    list_filter = ('status',)
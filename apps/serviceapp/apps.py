@@ -6,4 +6,5 @@ class ServiceappConfig(AppConfig):
     name = 'apps.serviceapp'
 
     def ready(self):
+        import apps.serviceapp.checks
         import apps.serviceapp.signals
\ No newline at end of file
@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Application,
+    ArchivedApplication,
+    ArchivedContact,
+    ArchivedQuoteRequest,
+    Contact,
+    QuoteRequest,
+)
+from .search import index_instance
+
+
+# Only quote requests that were never quoted are archived: a quote (with its
+# items, invoice and payments) cascades from its request, so those stay in
+# the hot tables. "completed" is therefore not listed; a completed request
+# always has a quote.
+UNQUOTED_FINAL_STATUS = ("rejected", "cancelled", "expired")
+
+
+class ArchiveSpec:
+    """How one hot model maps onto its archive table."""
+
+    def __init__(self, model, archive_model, date_field, m2m_field=None, timestamps=()):
+        self.model = model
+        self.archive_model = archive_model
+        self.date_field = date_field
+        self.m2m_field = m2m_field
+        # auto_now/auto_now_add fields that must be written back on restore
+        self.timestamps = timestamps
+
+    def eligible(self, cutoff):
+        queryset = self.model.objects.filter(**{f"{self.date_field}__lt": cutoff})
+        if self.model is QuoteRequest:
+            queryset = queryset.filter(status__in=UNQUOTED_FINAL_STATUS, quote__isnull=True)
+        elif self.model is Contact:
+            queryset = queryset.filter(is_read=True)
+        return queryset
+
+
+SPECS = {
+    "quote_requests": ArchiveSpec(QuoteRequest, ArchivedQuoteRequest, "created_at", "service", ("created_at", "updated_at")),
+    "contacts": ArchiveSpec(Contact, ArchivedContact, "created_at", timestamps=("created_at",)),
+    "applications": ArchiveSpec(Application, ArchivedApplication, "applied_at", timestamps=("applied_at",)),
+}
+
+
+def default_cutoff():
+    return timezone.now() - timedelta(days=getattr(settings, "ARCHIVE_AFTER_DAYS", 365))
+
+
+def _copy_links(source_model, target_model, field, id_map):
+    """Copy ``field`` M2M links from source rows to target rows; ``id_map`` maps source pk -> target pk."""
+    source_through = getattr(source_model, field).through
+    target_through = getattr(target_model, field).through
+    source_fk = f"{source_model._meta.model_name}_id"
+    target_fk = f"{target_model._meta.model_name}_id"
+    links = source_through.objects.filter(**{f"{source_fk}__in": list(id_map)}).values_list(source_fk, f"{field}_id")
+    target_through.objects.bulk_create([
+        target_through(**{target_fk: id_map[source_id], f"{field}_id": related_id})
+        for source_id, related_id in links
+    ])
+
+
+def archive(spec, cutoff=None, batch_size=500, limit=None):
+    """Move eligible rows of ``spec.model`` into its archive table in batches.
+
+    Each batch is copied (with its M2M links) and deleted in one transaction.
+    Returns the number of rows archived.
+    """
+    cutoff = cutoff or default_cutoff()
+    total = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+        with transaction.atomic():
+            rows = list(spec.eligible(cutoff).order_by("pk").values()[:size])
+            if not rows:
+                break
+            ids = [row.pop("id") for row in rows]
+            spec.archive_model.objects.bulk_create([
+                spec.archive_model(original_id=pk, **row) for pk, row in zip(ids, rows)
+            ])
+            if spec.m2m_field:
+                id_map = dict(
+                    spec.archive_model.objects.filter(original_id__in=ids).values_list("original_id", "pk")
+                )
+                _copy_links(spec.model, spec.archive_model, spec.m2m_field, id_map)
+            spec.model.objects.filter(pk__in=ids).delete()
+        total += len(ids)
+    return total
+
+
+def restore(spec, archived_queryset):
+    """Move archived rows back into the hot table under their original ids.
+
+    Rows whose required relation has gone since they were archived (an
+    application whose vacancy was deleted) can't go back and are left in the
+    archive. Returns ``(restored, skipped)`` counts.
+    """
+    archived_fields = {f.attname for f in spec.archive_model._meta.concrete_fields}
+    required = [
+        f.attname for f in spec.model._meta.concrete_fields
+        if f.is_relation and not f.null and f.attname in archived_fields
+    ]
+    archived, skipped = [], 0
+    for row in archived_queryset:
+        if any(getattr(row, attname) is None for attname in required):
+            skipped += 1
+        else:
+            archived.append(row)
+    if not archived:
+        return 0, skipped
+
+    hot_fields = {f.attname for f in spec.model._meta.concrete_fields}
+    with transaction.atomic():
+        objects = []
+        for row in archived:
+            values = {
+                f.attname: getattr(row, f.attname)
+                for f in spec.archive_model._meta.concrete_fields
+                if f.attname in hot_fields and f.attname != "id"
+            }
+            objects.append(spec.model(pk=row.original_id, **values))
+        spec.model.objects.bulk_create(objects)
+        if spec.timestamps:
+            # bulk_create stamps auto_now fields with the current time; put the originals back
+            for obj, row in zip(objects, archived):
+                for field in spec.timestamps:
+                    setattr(obj, field, getattr(row, field))
+            spec.model.objects.bulk_update(objects, list(spec.timestamps))
+        if spec.m2m_field:
+            _copy_links(
+                spec.archive_model, spec.model, spec.m2m_field,
+                {row.pk: row.original_id for row in archived},
+            )
+        spec.archive_model.objects.filter(pk__in=[row.pk for row in archived]).delete()
+
+    for obj in objects:
+        index_instance(obj)
+    return len(objects), skipped
+
+
+def spec_for_archive_model(archive_model):
+    for spec in SPECS.values():
+        if spec.archive_model is archive_model:
+            return spec
+    raise LookupError(archive_model)
@@ -0,0 +1,380 @@
+"""Load-test runner behind ``manage.py benchmark``.
+
+Requests go straight into the project's WSGI or ASGI application, in this
+process, without a socket or a web server. What is measured is Django, the
+middleware, the database and the mail server. Email goes to ``SMTPSink``, a
+local SMTP stand-in that accepts and discards every message, so form POSTs
+pay for a real SMTP conversation without sending anything.
+
+Queries per request are read from the Server-Timing header
+(apps/serviceapp/timing.py), which the command sends to every client for the
+run; it works the same way under both interfaces.
+"""
+import asyncio
+import io
+import random
+import re
+import socketserver
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.middleware.csrf import CSRF_ALLOWED_CHARS
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from .dataset import DOMAIN
+from .models import Service
+
+
+HOST = "localhost"
+DB_TIMING = re.compile(r'(?:^|,\s*)db;dur=[\d.]+;desc="(\d+)x"')
+
+
+# SMTP stand-in ---------------------------------------------------------------
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 localhost SMTP sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].decode(errors="replace").upper()
+            if command in ("HELO", "EHLO"):
+                self.reply("250 localhost")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                self.server.received += 1
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                self.reply("250 OK")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Accepts SMTP on a free local port and counts the messages it receives."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.received = 0
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    @property
+    def email_settings(self):
+        return {
+            "EMAIL_HOST": "127.0.0.1",
+            "EMAIL_PORT": self.server_address[1],
+            "EMAIL_USE_TLS": False,
+            "EMAIL_USE_SSL": False,
+            "EMAIL_HOST_USER": "",
+            "EMAIL_HOST_PASSWORD": "",
+        }
+
+
+# Scenarios -------------------------------------------------------------------
+
+class Scenario:
+    """One kind of request in the mix; ``build(n)`` returns (method, path, form data) for the n-th request."""
+
+    def __init__(self, name, group, weight, build):
+        self.name = name
+        self.group = group
+        self.weight = weight
+        self.build = build
+
+
+def scenarios():
+    slugs = list(Service.objects.filter(is_active=True).values_list("slug", flat=True)[:20]) or [None]
+    service_ids = list(Service.objects.filter(is_active=True).values_list("pk", flat=True)[:20])
+
+    def get(name):
+        return lambda n: ("GET", reverse(name), None)
+
+    def service_detail(n):
+        slug = slugs[n % len(slugs)]
+        return ("GET", reverse("service_detail", kwargs={"slug": slug}) if slug else reverse("services"), None)
+
+    def contact_post(n):
+        return ("POST", reverse("contact"), {
+            "first_name": f"Benchmark {n}", "email": f"benchmark{n}@{DOMAIN}", "subject": "Load test", "message": "Hello",
+        })
+
+    def quote_request_post(n):
+        return ("POST", reverse("quote_request"), {
+            "name": f"Benchmark {n}", "email": f"benchmark{n}@{DOMAIN}", "city": "Sydney",
+            "service": service_ids[n % len(service_ids):][:2] if service_ids else [], "message": "Load test",
+        })
+
+    return [
+        Scenario("home", "public", 30, get("home")),
+        Scenario("services", "public", 10, get("services")),
+        Scenario("service_detail", "public", 15, service_detail),
+        Scenario("about", "public", 5, get("about")),
+        Scenario("career", "public", 5, get("career")),
+        Scenario("contact", "public", 5, get("contact")),
+        Scenario("contact_post", "forms", 5, contact_post),
+        Scenario("quote_request_post", "forms", 5, quote_request_post),
+        Scenario("admin_dashboard", "admin", 5, get("admin:index")),
+    ]
+
+
+# Clients ---------------------------------------------------------------------
+
+class Session:
+    """Cookies for one benchmark run: a CSRF secret, and a logged-in staff session for the admin."""
+
+    username = f"benchmark@{DOMAIN}"
+
+    def __init__(self):
+        self.csrf = get_random_string(32, allowed_chars=CSRF_ALLOWED_CHARS)
+        self.user = None
+        self.session_key = None
+
+    def __enter__(self):
+        User = get_user_model()
+        self.user, _ = User.objects.get_or_create(
+            **{User.USERNAME_FIELD: self.username}, defaults={"is_staff": True, "is_superuser": True},
+        )
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store[SESSION_KEY] = str(self.user.pk)
+        store[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+        store[HASH_SESSION_KEY] = self.user.get_session_auth_hash()
+        store.create()
+        self.session_key = store.session_key
+        return self
+
+    def __exit__(self, *exc):
+        import_module(settings.SESSION_ENGINE).SessionStore(self.session_key).delete()
+        self.user.delete()
+
+    def cookie(self, admin):
+        cookie = f"{settings.CSRF_COOKIE_NAME}={self.csrf}"
+        if admin:
+            cookie += f"; {settings.SESSION_COOKIE_NAME}={self.session_key}"
+        return cookie
+
+    def body(self, data):
+        if data is None:
+            return b""
+        return urlencode({**data, "csrfmiddlewaretoken": self.csrf}, doseq=True).encode()
+
+
+def _result(scenario, started, status, headers):
+    elapsed = time.perf_counter() - started
+    timing = headers.get("server-timing")
+    if timing is None:
+        queries = None
+    else:
+        match = DB_TIMING.search(timing)
+        queries = int(match.group(1)) if match else 0
+    return scenario.name, elapsed, status, queries
+
+
+def wsgi_request(app, session, scenario, n):
+    method, path, data = scenario.build(n)
+    body = session.body(data)
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": HOST,
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": HOST,
+        "HTTP_COOKIE": session.cookie(scenario.group == "admin"),
+        "REMOTE_ADDR": "127.0.0.1",
+        "CONTENT_TYPE": "application/x-www-form-urlencoded",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http",
+        "wsgi.version": (1, 0),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split()[0])
+        response["headers"] = {name.lower(): value for name, value in headers}
+
+    started = time.perf_counter()
+    chunks = app(environ, start_response)
+    try:
+        for _ in chunks:
+            pass
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+    return _result(scenario, started, response["status"], response["headers"])
+
+
+async def asgi_request(app, session, scenario, n):
+    method, path, data = scenario.build(n)
+    body = session.body(data)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", HOST.encode()),
+            (b"cookie", session.cookie(scenario.group == "admin").encode()),
+            (b"content-type", b"application/x-www-form-urlencoded"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": (HOST, 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    disconnected = asyncio.Event()
+    response = {}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {name.decode().lower(): value.decode() for name, value in message["headers"]}
+
+    started = time.perf_counter()
+    try:
+        await app(scope, receive, send)
+    finally:
+        disconnected.set()
+    return _result(scenario, started, response["status"], response["headers"])
+
+
+# Runner ----------------------------------------------------------------------
+
+def run(interface="wsgi", requests=500, concurrency=8, groups=("public", "forms", "admin"), warmup=20, seed=None):
+    """Send ``warmup`` unrecorded requests, then ``requests`` timed ones, ``concurrency`` at a time.
+
+    Returns ``(samples, seconds)``. Each sample is ``(scenario, seconds, status,
+    queries)``, and ``seconds`` is the wall time of the timed requests. The
+    caller must already have pointed email at an ``SMTPSink``.
+    """
+    mix = [scenario for scenario in scenarios() if scenario.group in groups]
+    rng = random.Random(seed)
+    plan = list(enumerate(rng.choices(mix, weights=[scenario.weight for scenario in mix], k=warmup + requests)))
+
+    with Session() as session:
+        if interface == "asgi":
+            from django.core.asgi import get_asgi_application
+
+            app = get_asgi_application()
+            asyncio.run(_run_asgi(app, session, plan[:warmup], concurrency))
+            started = time.perf_counter()
+            samples = asyncio.run(_run_asgi(app, session, plan[warmup:], concurrency))
+        else:
+            from django.core.wsgi import get_wsgi_application
+
+            app = get_wsgi_application()
+            _run_wsgi(app, session, plan[:warmup], concurrency)
+            started = time.perf_counter()
+            samples = _run_wsgi(app, session, plan[warmup:], concurrency)
+        return samples, time.perf_counter() - started
+
+
+def _run_wsgi(app, session, plan, concurrency):
+    samples = []
+    pending = iter(plan)
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                return
+            samples.append(wsgi_request(app, session, item[1], item[0]))
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return samples
+
+
+async def _run_asgi(app, session, plan, concurrency):
+    samples = []
+    pending = iter(plan)
+
+    async def worker():
+        for n, scenario in pending:
+            samples.append(await asgi_request(app, session, scenario, n))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+def _latency(seconds):
+    ms = sorted(value * 1000 for value in seconds)
+    if len(ms) == 1:
+        p50 = p95 = p99 = ms[0]
+    else:
+        cuts = statistics.quantiles(ms, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    return {
+        "p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2),
+        "mean": round(statistics.mean(ms), 2), "max": round(ms[-1], 2),
+    }
+
+
+def _summary(samples, seconds):
+    queries = [sample[3] for sample in samples if sample[3] is not None]
+    return {
+        "requests": len(samples),
+        "rps": round(len(samples) / seconds, 2) if seconds else None,
+        "errors": sum(1 for sample in samples if sample[2] >= 500),
+        "status": dict(sorted(Counter(str(sample[2]) for sample in samples).items())),
+        "latency_ms": _latency([sample[1] for sample in samples]),
+        "queries": {"mean": round(statistics.mean(queries), 2), "max": max(queries)} if queries else None,
+    }
+
+
+def report(samples, seconds):
+    """The JSON-ready summary: totals plus one entry per scenario."""
+    by_scenario = defaultdict(list)
+    for sample in samples:
+        by_scenario[sample[0]].append(sample)
+    return {
+        "duration_s": round(seconds, 3),
+        **_summary(samples, seconds),
+        "scenarios": {name: _summary(rows, seconds) for name, rows in sorted(by_scenario.items())},
+    }
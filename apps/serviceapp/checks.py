@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register()
+def ratelimit_cache_check(app_configs, **kwargs):
+    """Rate limit buckets and the in-flight counter only work in a cache every worker shares."""
+    if not getattr(settings, "RATELIMIT_ENABLED", True):
+        return []
+    alias = getattr(settings, "RATELIMIT_CACHE", "default")
+    if isinstance(caches[alias], LocMemCache):
+        return [Error(
+            f"RATELIMIT_CACHE {alias!r} is a per-process LocMem cache, so each worker keeps its own "
+            "rate limit buckets and in-flight count.",
+            hint="Point RATELIMIT_CACHE at a database, Redis or Memcached cache, or set RATELIMIT_ENABLED = False.",
+            id="serviceapp.E001",
+        )]
+    return []
@@ -0,0 +1,213 @@
+"""Synthetic data for load testing (``manage.py generate_dataset``).
+
+Rows are written with bulk_create in batches, so no signal handlers run: no
+emails, PDFs or search index entries. Customers and applicants get addresses
+at ``DOMAIN`` and placeholder services and vacancies get ``load-test-`` slugs,
+so ``delete()`` can remove everything generated without touching real data. Quote and invoice numbers come from the document
+sequences, so they never clash with numbers issued later.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    QUOTE_STATUS, APPLICATION_STATUS, Application, Contact, Invoice, MyCompany, Payment, Quote, QuoteItem,
+    QuoteRequest, Service, Vacancy,
+)
+from .numbering import reserve_document_ids
+
+
+DOMAIN = "loadtest.invalid"
+SERVICE_SLUG = "load-test-service-"
+VACANCY_SLUG = "load-test-vacancy-"
+
+CITIES = ("Sydney", "Parramatta", "Penrith", "Liverpool", "Blacktown", "Chatswood", "Bondi", "Manly")
+
+
+def _ensure_services(count=8):
+    services = list(Service.objects.filter(is_active=True))
+    if not services:
+        services = Service.objects.bulk_create(
+            Service(name=f"Load test service {n}", slug=f"{SERVICE_SLUG}{n}") for n in range(count)
+        )
+    return services
+
+
+def _ensure_vacancies(count=3):
+    vacancies = list(Vacancy.objects.open())
+    if not vacancies:
+        vacancies = Vacancy.objects.bulk_create(
+            Vacancy(title=f"Load test vacancy {n}", slug=f"{VACANCY_SLUG}{n}") for n in range(count)
+        )
+    return vacancies
+
+
+def _spread(objects, field, now, days, rng):
+    """Give each object a random ``field`` timestamp within the last ``days`` days (bulk_create stamps them all now)."""
+    for obj in objects:
+        setattr(obj, field, now - timedelta(seconds=rng.randrange(days * 86400)))
+    return objects
+
+
+def _batches(total, size):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def generate(
+    quote_requests=1000, quote_ratio=0.6, invoice_ratio=0.5, paid_ratio=0.5, items_per_quote=3,
+    contacts=500, applications=200, days=365, batch_size=500, seed=None, progress=None,
+):
+    """Create the requested volumes and return a dict of row counts by model.
+
+    ``quote_ratio`` of the quote requests are quoted, ``invoice_ratio`` of the
+    quotes are invoiced and ``paid_ratio`` of the invoices are paid in full.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    today = timezone.localdate()
+    company = MyCompany.objects.first()
+    services = _ensure_services()
+    vacancies = _ensure_vacancies()
+    counts = dict.fromkeys(("quote_requests", "quotes", "quote_items", "invoices", "payments", "contacts", "applications"), 0)
+    statuses = [status for status, _ in QUOTE_STATUS]
+
+    for start, size in _batches(quote_requests, batch_size):
+        with transaction.atomic():
+            requests = QuoteRequest.objects.bulk_create(
+                QuoteRequest(
+                    name=f"Load test {start + n}",
+                    email=f"customer{start + n}@{DOMAIN}",
+                    phone=f"04{rng.randrange(10 ** 8):08d}",
+                    city=rng.choice(CITIES),
+                    postal_code=str(rng.randrange(2000, 2300)),
+                    address=f"{rng.randrange(1, 300)} Example Street",
+                    message="Please quote for a regular clean.",
+                    status="pending",
+                )
+                for n in range(size)
+            )
+            QuoteRequest.objects.bulk_update(_spread(requests, "created_at", now, days, rng), ["created_at"])
+            QuoteRequest.service.through.objects.bulk_create(
+                QuoteRequest.service.through(quoterequest=request, service=service)
+                for request in requests for service in rng.sample(services, min(2, len(services)))
+            )
+
+            quoted = [request for request in requests if rng.random() < quote_ratio]
+            for request in quoted:
+                request.status = rng.choice(statuses[1:])
+            QuoteRequest.objects.bulk_update(quoted, ["status"])
+            quotes = Quote.objects.bulk_create(
+                Quote(
+                    company=company,
+                    quote_request=request,
+                    quote_id=quote_id,
+                    city=request.city,
+                    postal_code=request.postal_code,
+                    address=request.address,
+                    status=request.status,
+                    mail_sent=True,
+                    expiry_date=today + timedelta(days=rng.randrange(-60, 60)),
+                )
+                for request, quote_id in zip(quoted, reserve_document_ids("quote", len(quoted)))
+            )
+            for quote, request in zip(quotes, quoted):
+                quote.created_at = min(request.created_at + timedelta(days=1), now)
+            Quote.objects.bulk_update(quotes, ["created_at"])
+
+            items, subtotals = [], {}
+            for quote in quotes:
+                for service in rng.sample(services, min(items_per_quote, len(services))):
+                    quantity, rate = rng.randrange(1, 5), Decimal(rng.randrange(40, 400))
+                    items.append(QuoteItem(quote=quote, service=service, quantity=quantity, rate=rate, amount=quantity * rate))
+                    subtotals[quote.pk] = subtotals.get(quote.pk, 0) + quantity * rate
+            QuoteItem.objects.bulk_create(items)
+
+            invoiced = [quote for quote in quotes if rng.random() < invoice_ratio]
+            invoices = Invoice.objects.bulk_create(
+                Invoice(
+                    quote=quote,
+                    invoice_id=invoice_id,
+                    is_sent=True,
+                    due_date=(quote.created_at + timedelta(days=14)).date(),
+                    payment_term="Due within 14 days",
+                )
+                for quote, invoice_id in zip(invoiced, reserve_document_ids("invoice", len(invoiced)))
+            )
+            for invoice, quote in zip(invoices, invoiced):
+                invoice.created_at = min(quote.created_at + timedelta(days=2), now)
+            Invoice.objects.bulk_update(invoices, ["created_at"])
+
+            paid = [invoice for invoice in invoices if rng.random() < paid_ratio]
+            payments = Payment.objects.bulk_create(
+                Payment(
+                    invoice=invoice,
+                    amount=(subtotals.get(invoice.quote_id, 0) * Decimal("1.1")).quantize(Decimal("0.01")),
+                    date=min(invoice.due_date, today),
+                    reference=invoice.invoice_id,
+                )
+                for invoice in paid
+            )
+            Invoice.objects.filter(pk__in=[invoice.pk for invoice in invoices]).update_balances()
+
+        counts["quote_requests"] += len(requests)
+        counts["quotes"] += len(quotes)
+        counts["quote_items"] += len(items)
+        counts["invoices"] += len(invoices)
+        counts["payments"] += len(payments)
+        if progress:
+            progress(counts)
+
+    for start, size in _batches(contacts, batch_size):
+        rows = Contact.objects.bulk_create(
+            Contact(
+                first_name=f"Load test {start + n}",
+                email=f"visitor{start + n}@{DOMAIN}",
+                subject="Question",
+                message="Do you clean gutters?",
+                is_read=rng.random() < 0.7,
+            )
+            for n in range(size)
+        )
+        Contact.objects.bulk_update(_spread(rows, "created_at", now, days, rng), ["created_at"])
+        counts["contacts"] += len(rows)
+
+    application_statuses = [status for status, _ in APPLICATION_STATUS]
+    for start, size in _batches(applications, batch_size):
+        rows = Application.objects.bulk_create(
+            Application(
+                vacancy=rng.choice(vacancies),
+                name=f"Load test {start + n}",
+                email=f"applicant{start + n}@{DOMAIN}",
+                message="I have five years' experience.",
+                status=rng.choice(application_statuses),
+            )
+            for n in range(size)
+        )
+        Application.objects.bulk_update(_spread(rows, "applied_at", now, days, rng), ["applied_at"])
+        counts["applications"] += len(rows)
+
+    return counts
+
+
+def delete():
+    """Remove every generated row and return the rows deleted per model, cascades included.
+
+    Placeholder services and vacancies go last, and only once nothing real refers to them.
+    """
+    querysets = [model.objects.filter(email__endswith=f"@{DOMAIN}") for model in (QuoteRequest, Contact, Application)]
+    querysets += [
+        Service.objects.filter(slug__startswith=SERVICE_SLUG)
+        .exclude(quoteitem__isnull=False)
+        .exclude(quoterequest__isnull=False),
+        Vacancy.objects.filter(slug__startswith=VACANCY_SLUG).exclude(applications__isnull=False),
+    ]
+    counts = {}
+    for queryset in querysets:
+        _, deleted = queryset.delete()
+        for label, count in deleted.items():
+            counts[label] = counts.get(label, 0) + count
+    return counts
@@ -0,0 +1,303 @@
+import datetime
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import FileResponse, HttpResponseNotModified
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from PIL import Image
+from weasyprint import HTML
+
+from .models import Quote, QuoteItem
+from .metrics import cache_lookup, pdf_render
+from .timing import phase
+
+
+class PDFCache:
+    """Small in-process LRU of rendered PDFs, keyed by a digest of their HTML.
+
+    Any change to a document (items, prices, company details) changes its
+    HTML and therefore its key, so entries never go stale; old renders just
+    fall off the end. Bounded by entry count and by total bytes.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is not None:
+                self._entries.move_to_end(key)
+            return pdf
+
+    def set(self, key, pdf):
+        if len(pdf) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = pdf
+            self._size += len(pdf)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+pdf_cache = PDFCache(
+    getattr(settings, "DOCUMENT_CACHE_SIZE", 32),
+    getattr(settings, "DOCUMENT_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+)
+
+
+TEMPLATES = {
+    "quote": "quotes/quote.html",
+    "invoice": "invoices/invoice.html",
+}
+
+
+def document_filename(obj):
+    kind = obj._meta.model_name
+    return f"{kind}_{obj.quote_id if kind == 'quote' else obj.invoice_id}.pdf"
+
+
+QUOTE_RELATIONS = ("company", "quote_request")
+GST_RATE = Decimal("0.1")
+
+
+def _is_cached(obj, name):
+    return obj._meta.get_field(name).is_cached(obj)
+
+
+def _load_quote(obj):
+    """The quote behind a Quote or Invoice, with company, request and items loaded.
+
+    Relations the caller already loaded (the ZIP export prefetches them per
+    batch) are reused. Otherwise it costs one query for the quote and its
+    foreign keys and one for the items with their services.
+    """
+    invoice = obj if obj._meta.model_name == "invoice" else None
+    quote = obj if invoice is None else (obj.quote if _is_cached(obj, "quote") else None)
+    if quote is None or not all(_is_cached(quote, name) for name in QUOTE_RELATIONS):
+        loaded = Quote.objects.select_related(*QUOTE_RELATIONS).get(pk=obj.quote_id if invoice else obj.pk)
+        if invoice is not None:
+            invoice.quote = quote = loaded
+        else:
+            for name in QUOTE_RELATIONS:
+                setattr(quote, name, getattr(loaded, name))
+    if "items" not in getattr(quote, "_prefetched_objects_cache", {}):
+        prefetch_related_objects([quote], Prefetch("items", queryset=QuoteItem.objects.select_related("service")))
+    return quote
+
+
+def _company_context(company):
+    if company is None:
+        return {}
+    return {
+        "name": company.name,
+        "abn": company.abn,
+        "address": company.address,
+        "phone": company.phone,
+        "email": company.email,
+        "website": company.website,
+        "account_name": company.account_name,
+        "bsb": company.bsb,
+        "account_number": company.account_number,
+        "logo_path": (company.document_logo or company.logo).path if company.logo else None,
+    }
+
+
+def _customer_context(quote_request):
+    if quote_request is None:
+        return {}
+    return {
+        "name": quote_request.name,
+        "email": quote_request.email,
+        "phone": quote_request.phone,
+        "address": quote_request.address,
+        "city": quote_request.city,
+        "postal_code": quote_request.postal_code,
+    }
+
+
+def document_context(obj):
+    """Plain template data for a Quote or Invoice; totals are worked out once, here."""
+    quote = _load_quote(obj)
+    items = [
+        {"service": item.service.name, "quantity": item.quantity, "rate": item.rate, "amount": item.amount}
+        for item in quote.items.all()
+    ]
+    subtotal = sum((item["amount"] for item in items), Decimal("0"))
+    gst = subtotal * GST_RATE
+    context = {
+        "quote": {
+            "quote_id": quote.quote_id,
+            "created_at": quote.created_at,
+            "expiry_date": quote.expiry_date,
+            "reference": quote.reference,
+            "address": quote.address,
+            "postal_code": quote.postal_code,
+            "city": quote.city,
+        },
+        "company": _company_context(quote.company),
+        "customer": _customer_context(quote.quote_request),
+        "items": items,
+        "totals": {"subtotal": subtotal, "gst": gst, "total": subtotal + gst},
+    }
+    if obj._meta.model_name == "invoice":
+        context["invoice"] = {
+            "invoice_id": obj.invoice_id,
+            "created_at": obj.created_at,
+            "payment_term": obj.payment_term,
+            "due_date": obj.due_date,
+            "due": obj.due,
+        }
+    return context
+
+
+def render_html(obj):
+    context = document_context(obj)
+    with phase("template"):
+        return render_to_string(TEMPLATES[obj._meta.model_name], context)
+
+
+def _digest(html):
+    return hashlib.md5(html.encode()).hexdigest()
+
+
+def pdf_options():
+    return getattr(settings, "DOCUMENT_PDF_OPTIONS", {})
+
+
+def html_to_pdf(html, options=None, document=None):
+    """Render HTML to PDF bytes, bypassing the cache. Touches neither the database nor MEDIA_ROOT.
+
+    ``document`` ("quote" or "invoice") labels the render in the metrics.
+    """
+    with phase("pdf"), pdf_render(document):
+        return HTML(string=html).write_pdf(**(pdf_options() if options is None else options))
+
+
+def document_logo(logo):
+    """A downscaled, recompressed copy of an uploaded logo for embedding in PDFs.
+
+    Returns a ``ContentFile`` named after the original, PNG when the logo has
+    transparency and JPEG otherwise, or None if the file is not a readable image.
+    """
+    max_size = getattr(settings, "DOCUMENT_LOGO_MAX_SIZE", 300)
+    stored = logo.closed  # an upload not yet saved is already open and must stay that way
+    try:
+        logo.open("rb")
+        with Image.open(logo) as image:
+            image.load()
+    except (OSError, ValueError):
+        return None
+    finally:
+        if stored:
+            logo.close()
+        elif not logo.closed:
+            logo.seek(0)
+
+    image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    base = os.path.splitext(os.path.basename(logo.name))[0]
+    if image.mode in ("RGBA", "LA", "P") and (image.mode != "P" or "transparency" in image.info):
+        image.save(buffer, "PNG", optimize=True)
+        name = f"{base}.png"
+    else:
+        image.convert("RGB").save(
+            buffer, "JPEG", quality=getattr(settings, "DOCUMENT_LOGO_QUALITY", 85), optimize=True, progressive=True,
+        )
+        name = f"{base}.jpg"
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+def _pdf_for(html, digest, document):
+    pdf = pdf_cache.get(digest)
+    cache_lookup("pdf", hits=pdf is not None, misses=pdf is None)
+    if pdf is None:
+        pdf = html_to_pdf(html, document=document)
+        pdf_cache.set(digest, pdf)
+    return pdf
+
+
+def render_pdf(obj):
+    """Return the PDF bytes for a Quote or Invoice, rendering only on a cache miss."""
+    html = render_html(obj)
+    return _pdf_for(html, _digest(html), obj._meta.model_name)
+
+
+def pdf_response(request, obj, filename):
+    """Stream a freshly rendered (or cached) PDF inline, without touching MEDIA_ROOT."""
+    html = render_html(obj)
+    digest = _digest(html)
+    etag = f'"{digest}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(io.BytesIO(_pdf_for(html, digest, obj._meta.model_name)), content_type="application/pdf", filename=filename)
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# Signed download links ------------------------------------------------------
+
+LINK_SALT = "serviceapp.documents.link"
+LINK_MAX_AGE = getattr(settings, "DOCUMENT_LINK_MAX_AGE", 30 * 24 * 3600)
+
+
+def document_url(obj):
+    """Absolute, HMAC-signed URL for a Quote or Invoice PDF, valid for DOCUMENT_LINK_MAX_AGE seconds."""
+    token = signing.dumps([obj._meta.model_name, obj.pk], salt=LINK_SALT)
+    return settings.SITE_URL.rstrip("/") + reverse("document_download", args=[token])
+
+
+def load_document_token(token):
+    """``(kind, pk)`` for a link token; raises ``signing.SignatureExpired`` or ``signing.BadSignature``."""
+    kind, pk = signing.loads(token, salt=LINK_SALT, max_age=LINK_MAX_AGE)
+    return kind, pk
+
+
+def deliver_as_link():
+    return getattr(settings, "DOCUMENT_DELIVERY", "attachment") == "link"
+
+
+def default_email_body(kind):
+    """Body for a quote or invoice email when no EmailMessageTemplate is active."""
+    if deliver_as_link():
+        return f"Your {kind} is ready. You can view or download it using the link below."
+    return f"Your {kind} is ready. Please find the attached PDF."
+
+
+def attach_document(mail, obj):
+    """Attach the PDF of ``obj`` to ``mail``, or add a signed link to it when DOCUMENT_DELIVERY is "link"."""
+    kind = obj._meta.model_name
+    mail.message_type = kind
+    if deliver_as_link():
+        expires = timezone.localdate() + datetime.timedelta(seconds=LINK_MAX_AGE)
+        mail.body = (
+            f"{mail.body}\n\nView or download your {kind}: {document_url(obj)}\n"
+            f"This link is valid until {expires:%d %b %Y}."
+        )
+        return
+    mail.attach_file(obj.generate_quote() if kind == "quote" else obj.generate_invoice())
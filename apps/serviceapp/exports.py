@@ -0,0 +1,355 @@
+import csv
+import datetime
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import DecimalField, ExpressionWrapper, F, Value
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .documents import document_filename, html_to_pdf, render_html
+from .models import quote_subtotal
+
+
+CHUNK_SIZE = 64 * 1024
+ROWS_PER_CHUNK = 200
+
+
+class _ZipBuffer:
+    """Write-only, unseekable file object; the zip generator drains it after each write.
+
+    Without ``seek`` zipfile writes data descriptors after each member, so
+    nothing already sent ever has to be rewritten.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def zip_stream(files, compression=zipfile.ZIP_STORED):
+    """Yield a ZIP archive of ``(name, chunks)`` pairs piece by piece.
+
+    Members are stored by default, which suits PDFs that are already compressed.
+    """
+    buffer = _ZipBuffer()
+    date_time = timezone.localtime().timetuple()[:6]
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, chunks in files:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = compression
+            with archive.open(info, "w") as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def _read_chunks(path):
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+
+def _stored_path(obj):
+    field = obj.quotation_file if obj._meta.model_name == "quote" else obj.invoice_file
+    if field:
+        path = os.path.join(settings.MEDIA_ROOT, field.name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def document_files(objects, workers=None):
+    """Yield ``(filename, chunks)`` for each Quote or Invoice in ``objects``.
+
+    PDFs already on disk are read in chunks. Missing ones are rendered on a
+    bounded thread pool a few documents ahead of the one being written, so
+    memory holds at most ``2 * workers`` rendered PDFs at a time. Templates
+    are rendered here, on the caller's thread, so workers never touch the
+    database.
+    """
+    workers = workers or getattr(settings, "DOCUMENT_EXPORT_WORKERS", 4)
+    objects = iter(objects)
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def fill():
+            while len(pending) < workers * 2:
+                obj = next(objects, None)
+                if obj is None:
+                    return
+                path = _stored_path(obj)
+                source = path if path else pool.submit(html_to_pdf, render_html(obj), document=obj._meta.model_name)
+                pending.append((document_filename(obj), source))
+
+        fill()
+        while pending:
+            name, source = pending.popleft()
+            fill()
+            yield name, _read_chunks(source) if isinstance(source, str) else [source.result()]
+
+
+def zip_response(queryset, filename):
+    """Stream every document in ``queryset`` as one ZIP download."""
+    kind = queryset.model._meta.model_name
+    related = ("company", "quote_request") if kind == "quote" else ("quote__company", "quote__quote_request")
+    prefix = "" if kind == "quote" else "quote__"
+    objects = (
+        queryset.select_related(*related)
+        .prefetch_related(f"{prefix}items__service")
+        .order_by("created_at", "pk")
+        .iterator(chunk_size=100)
+    )
+    response = StreamingHttpResponse(zip_stream(document_files(objects)), content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+# Tabular exports ----------------------------------------------------------
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _money_annotations(quote_ref):
+    """Subtotal, GST and total of a quote's items, computed in the database."""
+    return {
+        "export_subtotal": quote_subtotal(quote_ref),
+        "export_gst": ExpressionWrapper(F("export_subtotal") * Value(Decimal("0.1")), output_field=MONEY),
+        "export_total": ExpressionWrapper(F("export_subtotal") * Value(Decimal("1.1")), output_field=MONEY),
+    }
+
+
+# model_name: (annotations, [(header, column), ...])
+EXPORTS = {
+    "quoterequest": (lambda: {}, [
+        ("ID", "pk"),
+        ("Name", "name"),
+        ("Email", "email"),
+        ("Phone", "phone"),
+        ("City", "city"),
+        ("Postal code", "postal_code"),
+        ("Address", "address"),
+        ("Status", "status"),
+        ("Created", "created_at"),
+    ]),
+    "quote": (lambda: _money_annotations("pk"), [
+        ("Quote ID", "quote_id"),
+        ("Reference", "reference"),
+        ("Customer", "quote_request__name"),
+        ("Email", "quote_request__email"),
+        ("Status", "status"),
+        ("Created", "created_at"),
+        ("Expiry", "expiry_date"),
+        ("Subtotal", "export_subtotal"),
+        ("GST", "export_gst"),
+        ("Total", "export_total"),
+    ]),
+    "invoice": (lambda: _money_annotations("quote_id"), [
+        ("Invoice ID", "invoice_id"),
+        ("Quote ID", "quote__quote_id"),
+        ("Customer", "quote__quote_request__name"),
+        ("Email", "quote__quote_request__email"),
+        ("Created", "created_at"),
+        ("Due date", "due_date"),
+        ("Subtotal", "export_subtotal"),
+        ("GST", "export_gst"),
+        ("Total", "export_total"),
+        ("Paid", "pay"),
+        ("Due", "due"),
+        ("Is paid", "is_paid"),
+    ]),
+}
+
+
+def export_rows(queryset):
+    """Yield the header and then one tuple per row, streamed from the database."""
+    annotations, columns = EXPORTS[queryset.model._meta.model_name]
+    yield [header for header, _ in columns]
+    rows = (
+        queryset.annotate(**annotations())
+        .order_by("pk")
+        .values_list(*[column for _, column in columns])
+        .iterator(chunk_size=getattr(settings, "EXPORT_CHUNK_SIZE", 2000))
+    )
+    for row in rows:
+        yield [_export_value(value) for value in row]
+
+
+CENTS = Decimal("0.01")
+
+
+def _export_value(value):
+    if isinstance(value, Decimal):
+        return value.quantize(CENTS)
+    # Spreadsheets have no time zones; show timestamps in the site's local time
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value).replace(tzinfo=None)
+        return value.replace(microsecond=0)
+    return value
+
+
+def _batched(lines):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= ROWS_PER_CHUNK:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+# Text starting with one of these is run as a formula when a CSV is opened in Excel or LibreOffice
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_value(value):
+    # Customer-entered text such as "=HYPERLINK(...)" must stay text. XLSX needs no
+    # prefix: inline string cells are never evaluated.
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_stream(rows):
+    writer = csv.writer(_Echo())
+    return _batched(writer.writerow([_csv_value(value) for value in row]) for row in rows)
+
+
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+XLSX_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        f'<workbook xmlns="{XLSX_NS}" xmlns:r="{REL_NS}">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{REL_NS}/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Cell formats: 0 general, 1 date (DATE_STYLE), 2 date and time (DATETIME_STYLE)
+    "xl/styles.xml": (
+        f'<styleSheet xmlns="{XLSX_NS}">'
+        '<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy-mm-dd"/>'
+        '<numFmt numFmtId="165" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '</styleSheet>'
+    ),
+}
+DATE_STYLE = 1
+DATETIME_STYLE = 2
+# Day 0 of Excel's 1900 date system, allowing for its phantom 29 February 1900
+EXCEL_EPOCH = datetime.datetime(1899, 12, 30)
+
+
+def _excel_serial(value):
+    if isinstance(value, datetime.datetime):
+        delta = value.replace(tzinfo=None) - EXCEL_EPOCH
+        return round(delta.days + delta.seconds / 86400, 6)
+    return (value - EXCEL_EPOCH.date()).days
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f"<c><v>{value}</v></c>"
+    if isinstance(value, datetime.date):
+        style = DATETIME_STYLE if isinstance(value, datetime.datetime) else DATE_STYLE
+        return f'<c s="{style}"><v>{_excel_serial(value)}</v></c>'
+    text = escape(_INVALID_XML.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _sheet_xml(rows):
+    yield f'{XML_HEADER}<worksheet xmlns="{XLSX_NS}"><sheetData>'
+    yield from _batched(
+        "<row>" + "".join(_xlsx_cell(value) for value in row) + "</row>" for row in rows
+    )
+    yield "</sheetData></worksheet>"
+
+
+def xlsx_stream(rows):
+    """A single-sheet workbook of inline strings, numbers and dates, written as it streams."""
+    files = [(name, [(XML_HEADER + xml).encode()]) for name, xml in XLSX_PARTS.items()]
+    files.append(("xl/worksheets/sheet1.xml", (chunk.encode() for chunk in _sheet_xml(rows))))
+    return zip_stream(files, compression=zipfile.ZIP_DEFLATED)
+
+
+EXPORT_FORMATS = {
+    "csv": (csv_stream, "text/csv"),
+    "xlsx": (xlsx_stream, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def export_response(queryset, fmt, basename):
+    """Stream ``queryset`` as a CSV or XLSX download."""
+    stream, content_type = EXPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(stream(export_rows(queryset)), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{basename}-{timezone.localdate():%Y%m%d}.{fmt}"'
+    return response
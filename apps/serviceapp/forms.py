@@ -1,6 +1,7 @@
 from django import forms
 from django.forms import ModelForm
 from .models import QuoteRequest, Application, Contact
+from .uploads import StoredUploadedFile, allowed_resume_types, is_docx, max_resume_size, sniff_type, SNIFF_BYTES
 
 
 class QuoteRequestForm(ModelForm):
@@ -17,6 +18,33 @@ class ApplicationForm(ModelForm):
         model = Application
         fields = ['name', 'email', 'phone', 'resume', 'message']
 
+    def __init__(self, *args, upload_error=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_error = upload_error
+
+    def clean_resume(self):
+        resume = self.cleaned_data.get('resume')
+        if self.upload_error:
+            raise forms.ValidationError(self.upload_error)
+        if not resume:
+            return resume
+
+        # Already streamed to storage and checked by ResumeUploadHandler
+        if isinstance(resume, StoredUploadedFile):
+            return resume.storage_name
+
+        if resume.size > max_resume_size():
+            raise forms.ValidationError("The resume is too large.")
+        head = resume.read(SNIFF_BYTES)
+        resume.seek(0)
+        kind = sniff_type(head)
+        if kind == "docx" and not is_docx(resume):
+            kind = None
+        resume.seek(0)
+        if kind not in allowed_resume_types():
+            raise forms.ValidationError("Please upload your resume as a PDF or Word document.")
+        return resume
+
 
 # Contact Form
 class ContactForm(ModelForm):
@@ -50,3 +78,7 @@ class ContactForm(ModelForm):
                 'class': 'w-full px-4 py-3 rounded-lg border border-input bg-background focus-ring transition-all duration-300',
             }),
         }
+
+
+class BankStatementForm(forms.Form):
+    statement = forms.FileField(help_text="CSV export from the bank, with amount and reference/description columns.")
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.serviceapp.archive import SPECS, archive, default_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Move rejected, cancelled or expired quote requests that were never quoted, read contacts and "
+        "applications older than the archive horizon (ARCHIVE_AFTER_DAYS) into the archive tables, in batches. "
+        "Quoted requests stay, with their quotes and invoices."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Override ARCHIVE_AFTER_DAYS.")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--limit", type=int, default=None, help="Stop after this many rows per table.")
+        parser.add_argument("--only", choices=sorted(SPECS), action="append", help="Archive only these tables.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count eligible rows.")
+
+    def handle(self, *args, **options):
+        if options["days"] is not None:
+            cutoff = timezone.now() - timedelta(days=options["days"])
+        else:
+            cutoff = default_cutoff()
+
+        for name in options["only"] or SPECS:
+            spec = SPECS[name]
+            if options["dry_run"]:
+                self.stdout.write(f"{name}: {spec.eligible(cutoff).count()} eligible")
+                continue
+            total = archive(spec, cutoff=cutoff, batch_size=options["batch_size"], limit=options["limit"])
+            self.stdout.write(f"{name}: {total} archived")
+
+        self.stdout.write(self.style.SUCCESS(f"Archive complete (cutoff {cutoff:%Y-%m-%d})."))
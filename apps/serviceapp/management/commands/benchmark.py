@@ -0,0 +1,125 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.serviceapp import benchmark
+
+
+GROUPS = ("public", "forms", "admin")
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the public pages, the contact and quote request forms, and the admin dashboard concurrently "
+        "through the WSGI (or ASGI) application, with email going to a local SMTP sink. Reports p50/p95/p99 "
+        "latency, requests per second and queries per request as JSON. Form POSTs create rows; remove them "
+        "with generate_dataset --delete."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Timed requests (default 500).")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--warmup", type=int, default=20, help="Untimed requests sent first.")
+        parser.add_argument("--interface", choices=("wsgi", "asgi"), default="wsgi")
+        parser.add_argument("--only", choices=GROUPS, action="append", help="Only these request groups.")
+        parser.add_argument("--seed", type=int, default=None, help="Random seed for the request mix.")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument("--compare", help="A previous JSON report to compare against.")
+        parser.add_argument("--keep-rate-limits", action="store_true", help="Leave the form rate limiter on.")
+        parser.add_argument("--force", action="store_true", help="Run even though DEBUG is off.")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError("The benchmark writes to the database; use --force to run it with DEBUG off.")
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+
+        groups = options["only"] or GROUPS
+        with benchmark.SMTPSink() as sink, override_settings(
+            **sink.email_settings,
+            EMAIL_BACKEND="apps.serviceapp.timing.TimedEmailBackend",
+            SERVER_TIMING=True,
+            SERVER_TIMING_PUBLIC=True,  # query counts are read from the header
+            SERVER_TIMING_LOG_THRESHOLD_MS=float("inf"),
+            RATELIMIT_ENABLED=options["keep_rate_limits"],
+        ):
+            samples, seconds = benchmark.run(
+                interface=options["interface"],
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+                groups=groups,
+                warmup=options["warmup"],
+                seed=options["seed"],
+            )
+            emails = sink.received
+
+        report = {
+            "commit": _commit(),
+            "created_at": timezone.now().isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "config": {
+                "interface": options["interface"],
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+                "warmup": options["warmup"],
+                "groups": list(groups),
+                "seed": options["seed"],
+            },
+            **benchmark.report(samples, seconds),
+            "emails_received": emails,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+        if baseline:
+            self.compare(baseline, report)
+
+    def compare(self, baseline, report):
+        self.stderr.write(f"\nChange from {baseline.get('commit') or 'baseline'} to {report['commit'] or 'this run'}:")
+        self.stderr.write(f"{'':22}{'p50 ms':>16}{'p95 ms':>16}{'p99 ms':>16}{'req/s':>16}{'queries':>14}")
+        rows = [("all", baseline, report)] + [
+            (name, baseline["scenarios"][name], summary)
+            for name, summary in report["scenarios"].items() if name in baseline.get("scenarios", {})
+        ]
+        for name, before, after in rows:
+            cells = [
+                self.delta(before["latency_ms"][p], after["latency_ms"][p]) for p in ("p50", "p95", "p99")
+            ] + [self.delta(before["rps"], after["rps"])]
+            queries = [summary["queries"]["mean"] if summary["queries"] else None for summary in (before, after)]
+            cells.append(f"{queries[0]} -> {queries[1]}".rjust(14))
+            self.stderr.write(f"{name:22}" + "".join(cells))
+
+    @staticmethod
+    def delta(before, after):
+        if not before or after is None:
+            return f"{after}".rjust(16)
+        return f"{after:.1f} ({100 * (after - before) / before:+.0f}%)".rjust(16)
@@ -0,0 +1,58 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+
+from apps.serviceapp.documents import TEMPLATES, document_context, html_to_pdf, pdf_options
+from apps.serviceapp.models import Invoice, Quote
+
+
+class Command(BaseCommand):
+    help = (
+        "Render recent quotes and invoices the old way (uploaded logo, default WeasyPrint options) and the "
+        "current way (document logo, DOCUMENT_PDF_OPTIONS), and compare PDF size and render time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10, help="Documents of each kind to render (default 10).")
+        parser.add_argument("--kind", choices=("quote", "invoice", "both"), default="both")
+
+    def handle(self, *args, **options):
+        kinds = ("quote", "invoice") if options["kind"] == "both" else (options["kind"],)
+        querysets = {
+            "quote": Quote.objects.select_related("company", "quote_request").prefetch_related("items__service"),
+            "invoice": Invoice.objects.select_related("quote__company", "quote__quote_request")
+            .prefetch_related("quote__items__service"),
+        }
+
+        documents = []
+        for kind in kinds:
+            for obj in querysets[kind].order_by("-created_at")[:options["count"]]:
+                company = obj.company if kind == "quote" else obj.quote.company
+                original = company.logo.path if company and company.logo else None
+                documents.append((TEMPLATES[kind], document_context(obj), original))
+        if not documents:
+            raise CommandError("No quotes or invoices to render.")
+
+        results = {}
+        for variant, pdf_options in (("before", {}), ("after", pdf_options())):
+            sizes, timings = [], []
+            for template, context, original_logo in documents:
+                if variant == "before":
+                    context = {**context, "company": {**context["company"], "logo_path": original_logo}}
+                started = time.perf_counter()
+                pdf = html_to_pdf(render_to_string(template, context), pdf_options)
+                timings.append(time.perf_counter() - started)
+                sizes.append(len(pdf))
+            results[variant] = (sizes, timings)
+
+        self.stdout.write(f"{len(documents)} document(s)")
+        self.stdout.write(f"{'':8}{'total KB':>10}{'avg KB':>10}{'avg ms':>10}{'max ms':>10}")
+        for variant, (sizes, timings) in results.items():
+            self.stdout.write(
+                f"{variant:8}{sum(sizes) / 1024:>10.1f}{statistics.mean(sizes) / 1024:>10.1f}"
+                f"{statistics.mean(timings) * 1000:>10.1f}{max(timings) * 1000:>10.1f}"
+            )
+        before, after = (sum(results[variant][0]) for variant in ("before", "after"))
+        self.stdout.write(self.style.SUCCESS(f"Attachments are {100 * (1 - after / before):.1f}% smaller."))
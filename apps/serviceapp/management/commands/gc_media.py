@@ -0,0 +1,166 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+
+from apps.serviceapp.models import Invoice, Quote
+
+
+def file_fields():
+    """Every (model, FileField) pair in the project, ImageFields included."""
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field
+
+
+def referenced_files():
+    referenced = set()
+    for model, field in file_fields():
+        values = (
+            model._default_manager.exclude(**{field.name: ""})
+            .exclude(**{f"{field.name}__isnull": True})
+            .values_list(field.name, flat=True)
+        )
+        for name in values.iterator(chunk_size=5000):
+            referenced.add(os.path.normpath(name))
+    return referenced
+
+
+def upload_dirs():
+    """Directories under MEDIA_ROOT that FileFields upload into; nothing else is touched.
+
+    A directory inside another one is dropped, since walking the outer one covers it.
+    """
+    dirs = set()
+    for _, field in file_fields():
+        if isinstance(field.upload_to, str) and field.upload_to:
+            dirs.add(os.path.normpath(field.upload_to.split("%")[0]))
+    top = []
+    for path in sorted(dirs):
+        if not any(path.startswith(parent + os.sep) for parent in top):
+            top.append(path)
+    return top
+
+
+def walk(root):
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            entries = os.scandir(path)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def _regenerate(model, pk):
+    try:
+        if model is Quote:
+            Quote.objects.select_related("company", "quote_request").get(pk=pk).generate_quote()
+        else:
+            Invoice.objects.select_related("quote__company", "quote__quote_request").get(pk=pk).generate_invoice()
+        return None
+    except Exception as e:
+        return f"{model.__name__} {pk}: {e}"
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete files under MEDIA_ROOT that no FileField/ImageField references, and "
+        "regenerate quote and invoice PDFs whose stored file is missing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report without deleting or regenerating.")
+        parser.add_argument("--min-age", type=float, default=24, help="Only delete orphans older than this many hours.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Orphans deleted per batch.")
+        parser.add_argument("--workers", type=int, default=4, help="Parallel PDF regenerations.")
+        parser.add_argument("--skip-orphans", action="store_true")
+        parser.add_argument("--skip-missing", action="store_true")
+
+    def handle(self, *args, **options):
+        if not options["skip_orphans"]:
+            self.collect_orphans(options)
+        if not options["skip_missing"]:
+            self.reconcile_missing(options)
+
+    def collect_orphans(self, options):
+        media_root = os.path.abspath(settings.MEDIA_ROOT)
+        referenced = referenced_files()
+        cutoff = time.time() - options["min_age"] * 3600
+
+        orphans = []
+        reclaimed = deleted = 0
+
+        def flush():
+            nonlocal deleted
+            for path in orphans:
+                try:
+                    os.remove(path)
+                    deleted += 1
+                except FileNotFoundError:
+                    pass
+            orphans.clear()
+
+        for upload_dir in upload_dirs():
+            for entry in walk(os.path.join(media_root, upload_dir)):
+                name = os.path.relpath(entry.path, media_root)
+                if name in referenced:
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                # Recent files may belong to an upload or render still in progress
+                if stat.st_mtime > cutoff:
+                    continue
+                reclaimed += stat.st_size
+                if options["dry_run"]:
+                    self.stdout.write(f"orphan: {name}")
+                    continue
+                orphans.append(entry.path)
+                if len(orphans) >= options["batch_size"]:
+                    flush()
+        if not options["dry_run"]:
+            flush()
+
+        verb = "Would reclaim" if options["dry_run"] else f"Deleted {deleted} file(s), reclaimed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {reclaimed} bytes ({reclaimed / (1024 * 1024):.1f} MB)."))
+
+    def reconcile_missing(self, options):
+        media_root = os.path.abspath(settings.MEDIA_ROOT)
+        missing = []
+        for model, field in ((Quote, "quotation_file"), (Invoice, "invoice_file")):
+            rows = model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True}).values_list("pk", field)
+            for pk, name in rows.iterator(chunk_size=5000):
+                if not os.path.exists(os.path.join(media_root, name)):
+                    missing.append((model, pk))
+
+        if options["dry_run"] or not missing:
+            for model, pk in missing:
+                self.stdout.write(f"missing: {model.__name__} {pk}")
+            self.stdout.write(self.style.SUCCESS(f"{len(missing)} missing document(s)."))
+            return
+
+        failures = []
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = [pool.submit(_regenerate, model, pk) for model, pk in missing]
+            for future in as_completed(futures):
+                error = future.result()
+                if error:
+                    failures.append(error)
+
+        for error in failures:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Regenerated {len(missing) - len(failures)} of {len(missing)} missing document(s)."
+        ))
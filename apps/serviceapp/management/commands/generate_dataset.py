@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from apps.serviceapp import dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic quote requests, quotes, items, invoices, payments, contacts and "
+        f"applications for load testing (addresses @{dataset.DOMAIN}). Run against a development or staging "
+        "database only. --delete removes the generated rows again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quote-requests", type=int, default=1000)
+        parser.add_argument("--quote-ratio", type=float, default=0.6, help="Share of requests that get a quote.")
+        parser.add_argument("--invoice-ratio", type=float, default=0.5, help="Share of quotes that are invoiced.")
+        parser.add_argument("--paid-ratio", type=float, default=0.5, help="Share of invoices paid in full.")
+        parser.add_argument("--items-per-quote", type=int, default=3)
+        parser.add_argument("--contacts", type=int, default=500)
+        parser.add_argument("--applications", type=int, default=200)
+        parser.add_argument("--days", type=int, default=365, help="Spread creation dates over this many days.")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=None, help="Random seed, for a repeatable dataset.")
+        parser.add_argument("--delete", action="store_true", help="Delete previously generated rows instead.")
+
+    def handle(self, *args, **options):
+        if options["delete"]:
+            for label, count in dataset.delete().items():
+                self.stdout.write(f"{label}: {count} deleted")
+            self.stdout.write(self.style.SUCCESS("Generated rows deleted."))
+            return
+
+        def progress(counts):
+            self.stdout.write(f"  {counts['quote_requests']} quote requests")
+
+        counts = dataset.generate(
+            quote_requests=options["quote_requests"],
+            quote_ratio=options["quote_ratio"],
+            invoice_ratio=options["invoice_ratio"],
+            paid_ratio=options["paid_ratio"],
+            items_per_quote=options["items_per_quote"],
+            contacts=options["contacts"],
+            applications=options["applications"],
+            days=options["days"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+            progress=progress,
+        )
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            "Dataset generated. Run rebuild_daily_summary and rebuild_search_index so reports and search include it."
+        ))
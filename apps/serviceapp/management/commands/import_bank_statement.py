@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.serviceapp.payments import StatementError, parse_statement, reconcile
+
+
+class Command(BaseCommand):
+    help = "Record invoice payments from a bank CSV statement, matched on invoice number or quote reference."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--dry-run", action="store_true", help="Show matches without recording anything.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as f:
+                lines = parse_statement(f)
+        except (OSError, StatementError) as e:
+            raise CommandError(str(e))
+
+        result = reconcile(lines, apply=not options["dry_run"])
+        for line in result.unmatched:
+            self.stdout.write(f"unmatched line {line.line}: {line.amount} {line.text}")
+        verb = "would be recorded" if options["dry_run"] else "recorded"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(result.matches)} payment(s) totalling {result.matched_total} {verb} on "
+            f"{len(result.invoices)} invoice(s); {len(result.unmatched)} line(s) unmatched, "
+            f"{len(result.duplicates)} already recorded."
+        ))
@@ -0,0 +1,22 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.serviceapp.reports import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily revenue/pipeline summary table from quotes, items and invoices."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only rebuild days from this date (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = datetime.date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since must be a date in YYYY-MM-DD format.")
+        total = rebuild(since)
+        self.stdout.write(self.style.SUCCESS(f"Daily summary rebuilt: {total} row(s)."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.serviceapp.search import SEARCH_FIELDS, rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the admin full-text search index for contacts, quote requests, quotes and applications."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        for model in SEARCH_FIELDS:
+            total = rebuild(model, batch_size=options["batch_size"])
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {total} indexed")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.serviceapp.notifications import send_queued_notifications
+
+
+class Command(BaseCommand):
+    help = "Send queued applicant status emails in throttled batches over one SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Messages per batch.")
+        parser.add_argument("--pause", type=float, default=None, help="Seconds to wait between batches.")
+
+    def handle(self, *args, **options):
+        result = send_queued_notifications(batch_size=options["batch_size"], pause=options["pause"])
+        self.stdout.write(self.style.SUCCESS(f"Sent {result['sent']} notification(s), {result['failed']} failed."))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.serviceapp.models import Quote, QuoteRequest, Vacancy
+from apps.serviceapp.reports import schedule_refresh
+
+
+CLOSED_QUOTE_STATUS = ("rejected", "cancelled", "expired")
+
+
+class Command(BaseCommand):
+    help = (
+        "Deactivate vacancies past expired_at and mark open quotes past expiry_date as expired. "
+        "Intended to run daily from cron."
+    )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+
+        with transaction.atomic():
+            vacancies = Vacancy.objects.expired(today).update(is_active=False)
+
+            # Requests still waiting on an expired quote lapse with it, unless
+            # another of their quotes is still open or has been accepted
+            expired_quotes = Quote.objects.expired(today)
+            live_quotes = Quote.objects.exclude(status__in=CLOSED_QUOTE_STATUS).exclude(
+                pk__in=expired_quotes.values("pk")
+            )
+            requests = (
+                QuoteRequest.objects.filter(status="replied", quote__in=expired_quotes.values("pk"))
+                .exclude(quote__in=live_quotes.values("pk"))
+                .update(status="expired")
+            )
+            # update() sends no signals, so move the quotes' summary rows to "expired" here
+            for created_at in expired_quotes.values_list("created_at", flat=True):
+                schedule_refresh(created_at)
+            quotes = expired_quotes.update(status="expired")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Expired {vacancies} vacancy(ies), {quotes} quote(s) and {requests} quote request(s)."
+        ))
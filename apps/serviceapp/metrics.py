@@ -0,0 +1,124 @@
+"""Prometheus metrics for the quote/invoice pipeline, served at ``/metrics``.
+
+With several gunicorn workers, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty
+directory (wiped on each deploy) before the workers start. Every worker then
+records into memory-mapped files there and ``/metrics`` merges them, so
+counters and histograms add up across processes; ``gunicorn.conf.py`` tidies
+up after workers that exit. Without the variable the serving process's own
+registry is exported, which is right for runserver.
+"""
+import functools
+import hmac
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+
+REQUEST_LATENCY = Histogram(
+    "serviceapp_request_duration_seconds",
+    "Request latency by URL name.",
+    ["view", "method", "status"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+PDF_RENDER = Histogram(
+    "serviceapp_pdf_render_seconds",
+    "WeasyPrint render time by document type.",
+    ["document"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16),
+)
+EMAIL_SEND = Histogram(
+    "serviceapp_email_send_seconds",
+    "SMTP send time by message type.",
+    ["type"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+EMAIL_FAILURES = Counter(
+    "serviceapp_email_failures_total",
+    "Emails the SMTP server did not accept, by message type.",
+    ["type"],
+)
+FORM_SUBMISSIONS = Counter(
+    "serviceapp_form_submissions_total",
+    "Public form POSTs by form and rate limiter outcome (allowed, limited, busy).",
+    ["form", "outcome"],
+)
+CACHE_LOOKUPS = Counter(
+    "serviceapp_cache_lookups_total",
+    "Cache lookups by cache and result (hit, miss).",
+    ["cache", "result"],
+)
+
+
+@functools.cache
+def app_url_names():
+    from . import urls
+
+    return frozenset(pattern.name for pattern in urls.urlpatterns if pattern.name)
+
+
+def view_label(request):
+    """Bounded label for a request: the serviceapp URL name, else "admin", "other" or "unmatched"."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    if match.url_name in app_url_names():
+        return match.url_name
+    return "admin" if "admin" in match.namespaces else "other"
+
+
+def cache_lookup(cache, hits, misses=0):
+    """Count ``hits`` and ``misses`` (numbers or booleans) against ``cache``."""
+    if hits:
+        CACHE_LOOKUPS.labels(cache, "hit").inc(int(hits))
+    if misses:
+        CACHE_LOOKUPS.labels(cache, "miss").inc(int(misses))
+
+
+@contextmanager
+def pdf_render(document):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        PDF_RENDER.labels(document or "unknown").observe(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        REQUEST_LATENCY.labels(
+            view_label(request), request.method, f"{response.status_code // 100}xx",
+        ).observe(time.perf_counter() - started)
+        return response
+
+
+def _registry():
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """Prometheus text exposition, for requests with ``Authorization: Bearer METRICS_TOKEN``.
+
+    The client address is not trusted: behind the proxy every request comes
+    from 127.0.0.1, and X-Forwarded-For can be forged. Without a token the
+    endpoint does not exist.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not token:
+        raise Http404
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
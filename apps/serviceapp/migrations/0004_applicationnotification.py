@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0003_contact_is_read'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('init', 'Initial Reply'), ('quote', 'Quote Sent'), ('invoice', 'Invoice Sent'), ('shortlist', 'Shortlist Sent'), ('selected', 'Selected'), ('rejected', 'Rejected')], max_length=255)),
+                ('email', models.EmailField(max_length=254)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('sent', 'Sent'), ('failed', 'Failed')], db_index=True, default='queued', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='serviceapp.application')),
+            ],
+            options={
+                'verbose_name': 'Application Notification',
+                'verbose_name_plural': 'Application Notifications',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0004_applicationnotification'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quote',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('replied', 'Replied'), ('rejected', 'Rejected'), ('approved', 'Approved'), ('cancelled', 'Cancelled'), ('completed', 'Completed'), ('expired', 'Expired')], default='pending', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='quoterequest',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('replied', 'Replied'), ('rejected', 'Rejected'), ('approved', 'Approved'), ('cancelled', 'Cancelled'), ('completed', 'Completed'), ('expired', 'Expired')], default='pending', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['status', 'expiry_date'], name='quote_status_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['is_active', 'expired_at'], name='vacancy_active_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:22
+
+from django.db import migrations, models
+
+
+SEQUENCES = (
+    # (sequence name, model, number field, file field, format)
+    ("quote", "Quote", "quote_id", "quotation_file", "fwz-{:07d}"),
+    ("invoice", "Invoice", "invoice_id", "invoice_file", "fwz-inv-{:07d}"),
+)
+
+
+def renumber_duplicates(apps, schema_editor):
+    """Give every row that shares its number with an older row a fresh one from the sequence.
+
+    The oldest row keeps the original number. A renumbered row's stored PDF was
+    written under the shared name, so it is cleared and regenerated on next send.
+    Blank numbers are always renumbered; NULLs are allowed by the unique index.
+    """
+    DocumentSequence = apps.get_model("serviceapp", "DocumentSequence")
+    for name, model_name, field, file_field, fmt in SEQUENCES:
+        model = apps.get_model("serviceapp", model_name)
+        sequence, _ = DocumentSequence.objects.get_or_create(name=name)
+
+        duplicated = list(
+            model.objects.exclude(**{f"{field}__isnull": True})
+            .values(field)
+            .annotate(n=models.Count("pk"))
+            .filter(models.Q(n__gt=1) | models.Q(**{field: ""}))
+            .values_list(field, flat=True)
+        )
+        for value in duplicated:
+            rows = list(model.objects.filter(**{field: value}).order_by("created_at", "pk"))
+            for row in rows[1 if value else 0:]:
+                setattr(row, field, fmt.format(sequence.next_value))
+                setattr(row, file_field, None)
+                sequence.next_value += 1
+                row.save(update_fields=[field, file_field])
+        sequence.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0005_expiry_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(renumber_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0006_documentsequence'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoice',
+            name='invoice_id',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True, verbose_name='Invoice ID'),
+        ),
+        migrations.AlterField(
+            model_name='quote',
+            name='quote_id',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True, verbose_name='Quote ID'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:25
+
+from django.db import migrations, models
+
+
+FTS_TABLE = "serviceapp_searchdocument_fts"
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(body, content='serviceapp_searchdocument', content_rowid='id')",
+    f"""CREATE TRIGGER serviceapp_searchdocument_ai AFTER INSERT ON serviceapp_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.id, new.body);
+    END""",
+    f"""CREATE TRIGGER serviceapp_searchdocument_ad AFTER DELETE ON serviceapp_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body);
+    END""",
+    f"""CREATE TRIGGER serviceapp_searchdocument_au AFTER UPDATE ON serviceapp_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.id, new.body);
+    END""",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS serviceapp_searchdocument_ai",
+    "DROP TRIGGER IF EXISTS serviceapp_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS serviceapp_searchdocument_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+POSTGRES_FORWARD = [
+    "CREATE INDEX serviceapp_searchdocument_body_gin ON serviceapp_searchdocument "
+    "USING gin (to_tsvector('simple', body))",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS serviceapp_searchdocument_body_gin",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == "postgresql":
+        _run(schema_editor, POSTGRES_FORWARD)
+
+
+def drop_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_REVERSE)
+    elif vendor == "postgresql":
+        _run(schema_editor, POSTGRES_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0007_unique_document_numbers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('body', models.TextField(blank=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('model', 'object_id'), name='searchdocument_unique_object')],
+            },
+        ),
+        migrations.RunPython(create_text_index, drop_text_index),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0008_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['created_at', 'id'], name='contact_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['created_at', 'id'], name='invoice_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['created_at', 'id'], name='quote_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quoterequest',
+            index=models.Index(fields=['created_at', 'id'], name='quoterequest_created_idx'),
+        ),
+    ]
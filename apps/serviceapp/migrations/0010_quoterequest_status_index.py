@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0009_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quoterequest',
+            index=models.Index(fields=['status', 'created_at'], name='quoterequest_status_idx'),
+        ),
+    ]
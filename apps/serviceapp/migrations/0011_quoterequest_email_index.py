@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0010_quoterequest_status_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quoterequest',
+            index=models.Index(fields=['email'], name='quoterequest_email_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0011_quoterequest_email_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedContact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True)),
+                ('first_name', models.CharField(max_length=255)),
+                ('last_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('email', models.EmailField(db_index=True, max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=255, null=True)),
+                ('subject', models.CharField(blank=True, max_length=255, null=True)),
+                ('message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('is_read', models.BooleanField(default=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Contact',
+                'verbose_name_plural': 'Archived Contacts',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedApplication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('email', models.EmailField(db_index=True, max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=255)),
+                ('resume', models.FileField(blank=True, upload_to='serviceapp/resumes')),
+                ('message', models.TextField(blank=True)),
+                ('applied_at', models.DateTimeField()),
+                ('is_reviewed', models.BooleanField(default=False)),
+                ('comments', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'PENDING'), ('shortlist', 'SHORT LISTED'), ('selected', 'SELECTED'), ('rejected', 'REJECTED')], default='pending', max_length=255)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('vacancy', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_applications', to='serviceapp.vacancy')),
+            ],
+            options={
+                'verbose_name': 'Archived Application',
+                'verbose_name_plural': 'Archived Applications',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedQuoteRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('email', models.EmailField(db_index=True, max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=255)),
+                ('city', models.CharField(blank=True, max_length=255, null=True)),
+                ('postal_code', models.CharField(blank=True, max_length=255, null=True)),
+                ('address', models.CharField(blank=True, max_length=255, null=True)),
+                ('message', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('replied', 'Replied'), ('rejected', 'Rejected'), ('approved', 'Approved'), ('cancelled', 'Cancelled'), ('completed', 'Completed'), ('expired', 'Expired')], default='pending', max_length=255)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('service', models.ManyToManyField(blank=True, related_name='archived_quote_requests', to='serviceapp.service')),
+            ],
+            options={
+                'verbose_name': 'Archived Quote Request',
+                'verbose_name_plural': 'Archived Quote Requests',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0012_archive_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('replied', 'Replied'), ('rejected', 'Rejected'), ('approved', 'Approved'), ('cancelled', 'Cancelled'), ('completed', 'Completed'), ('expired', 'Expired')], max_length=255)),
+                ('quotes', models.PositiveIntegerField(default=0)),
+                ('quote_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('invoiced', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily summaries',
+                'ordering': ('-date', 'status'),
+                'constraints': [models.UniqueConstraint(fields=('date', 'status'), name='dailysummary_unique_day_status')],
+            },
+        ),
+    ]
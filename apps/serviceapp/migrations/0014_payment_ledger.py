@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    """Carry each invoice's recorded ``pay`` figure over as its first ledger entry."""
+    Invoice = apps.get_model("serviceapp", "Invoice")
+    Payment = apps.get_model("serviceapp", "Payment")
+    invoices = Invoice.objects.filter(pay__gt=0).only("pk", "pay", "updated_at").iterator(chunk_size=1000)
+    Payment.objects.bulk_create(
+        (
+            Payment(invoice_id=invoice.pk, amount=invoice.pay, date=invoice.updated_at.date(),
+                    method="other", reference="Opening balance")
+            for invoice in invoices
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0013_dailysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('date', models.DateField(default=django.utils.timezone.localdate)),
+                ('method', models.CharField(choices=[('bank', 'Bank transfer'), ('card', 'Card'), ('cash', 'Cash'), ('other', 'Other')], default='bank', max_length=20)),
+                ('reference', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('-date', '-id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(condition=models.Q(('is_paid', False)), fields=['due_date'], name='invoice_unpaid_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='invoice',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='serviceapp.invoice'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['invoice', 'date'], name='payment_invoice_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['date'], name='payment_date_idx'),
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
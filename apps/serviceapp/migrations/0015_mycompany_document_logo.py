@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0014_payment_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mycompany',
+            name='document_logo',
+            field=models.ImageField(blank=True, editable=False, upload_to='serviceapp/images/documents'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0015_mycompany_document_logo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document', models.CharField(choices=[('quote', 'Quote'), ('invoice', 'Invoice')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('accessed_at', models.DateTimeField(auto_now_add=True)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('user_agent', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'verbose_name_plural': 'Document accesses',
+                'ordering': ('-accessed_at',),
+                'indexes': [models.Index(fields=['document', 'object_id', 'accessed_at'], name='documentaccess_object_idx')],
+            },
+        ),
+    ]
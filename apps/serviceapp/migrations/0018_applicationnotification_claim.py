@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0017_requestprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicationnotification',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='applicationnotification',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], db_index=True, default='queued', max_length=20),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+# A frozen copy of search.SEARCH_FIELDS, by model name
+SEARCH_FIELDS = {
+    "contact": ("first_name", "last_name", "email", "phone", "subject", "message"),
+    "quoterequest": ("name", "email", "phone", "city", "postal_code", "address", "message"),
+    "quote": ("quote_id", "reference", "city", "postal_code", "address", "quote_request__name", "quote_request__email"),
+    "application": ("name", "email", "phone", "message", "vacancy__title"),
+}
+BATCH_SIZE = 2000
+
+
+def backfill(apps, schema_editor):
+    """Index the rows that existed before 0008 created the (empty) search index."""
+    SearchDocument = apps.get_model("serviceapp", "SearchDocument")
+    for model_name, fields in SEARCH_FIELDS.items():
+        model = apps.get_model("serviceapp", model_name)
+        label = f"serviceapp.{model_name}"
+        indexed = set(SearchDocument.objects.filter(model=label).values_list("object_id", flat=True))
+        batch = []
+        for row in model.objects.values_list("pk", *fields).iterator(chunk_size=BATCH_SIZE):
+            if row[0] in indexed:
+                continue
+            body = " ".join(str(value) for value in row[1:] if value)
+            batch.append(SearchDocument(model=label, object_id=row[0], body=body))
+            if len(batch) >= BATCH_SIZE:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0018_applicationnotification_claim'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
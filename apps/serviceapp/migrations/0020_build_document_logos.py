@@ -0,0 +1,57 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.db import migrations
+from PIL import Image
+
+
+# A frozen copy of documents.document_logo, with its default size and quality
+LOGO_MAX_SIZE = 300
+LOGO_QUALITY = 85
+
+
+def document_logo(logo):
+    try:
+        logo.open("rb")
+        with Image.open(logo) as image:
+            image.load()
+    except (OSError, ValueError):
+        return None
+    finally:
+        logo.close()
+
+    image.thumbnail((LOGO_MAX_SIZE, LOGO_MAX_SIZE), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    base = os.path.splitext(os.path.basename(logo.name))[0]
+    if image.mode in ("RGBA", "LA", "P") and (image.mode != "P" or "transparency" in image.info):
+        image.save(buffer, "PNG", optimize=True)
+        name = f"{base}.png"
+    else:
+        image.convert("RGB").save(buffer, "JPEG", quality=LOGO_QUALITY, optimize=True, progressive=True)
+        name = f"{base}.jpg"
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+def build_document_logos(apps, schema_editor):
+    """Give companies saved before 0015 the downscaled logo that MyCompany.save() now builds."""
+    MyCompany = apps.get_model("serviceapp", "MyCompany")
+    for company in MyCompany.objects.exclude(logo=""):
+        if company.document_logo:
+            continue
+        derivative = document_logo(company.logo)
+        if derivative is None:
+            continue  # missing or unreadable file; PDFs keep using the original logo
+        company.document_logo.save(f"{company.slug or 'company'}-{derivative.name}", derivative, save=False)
+        company.save(update_fields=["document_logo"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('serviceapp', '0019_backfill_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_document_logos, migrations.RunPython.noop),
+    ]
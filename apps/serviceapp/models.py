@@ -1,11 +1,8 @@
 import os
-import uuid
 from django.conf import settings
 from django.utils import timezone
 from django.db import models
 from django.utils.text import slugify
-from django.template.loader import render_to_string
-from weasyprint import HTML
 
 
 from ckeditor.fields import RichTextField
@@ -37,8 +34,25 @@ class MyCompany(models.Model):
     reg_no = models.CharField(max_length=255, blank=True, null=True)
     established = models.DateField(blank=True, null=True)
 
+    # Downscaled copy of the logo embedded in quote/invoice PDFs, rebuilt whenever the logo changes
+    document_logo = models.ImageField(upload_to='serviceapp/images/documents', blank=True, editable=False)
+
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        from .documents import document_logo
+
+        previous = MyCompany.objects.filter(pk=self.pk).values_list("logo", flat=True).first() if self.pk else None
+        if not self.logo:
+            self.document_logo = None
+        elif self.logo.name != previous or not self.document_logo:
+            derivative = document_logo(self.logo)
+            if derivative is None:
+                self.document_logo = None
+            else:
+                self.document_logo.save(f"{self.slug or 'company'}-{derivative.name}", derivative, save=False)
+        super().save(*args, **kwargs)
     
 
 
@@ -109,6 +123,11 @@ class Contact(models.Model):
     # count unread message
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="contact_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name or ''}".strip()
 
@@ -120,8 +139,12 @@ QUOTE_STATUS = (
     ('approved', 'Approved'),
     ('cancelled', 'Cancelled'),
     ('completed', 'Completed'),
+    ('expired', 'Expired'),
 )
 
+# Quotes in these states lapse once their expiry_date has passed
+OPEN_QUOTE_STATUS = ('pending', 'replied')
+
 class QuoteRequest(models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField()
@@ -135,17 +158,37 @@ class QuoteRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
-
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="quoterequest_created_idx"),
+            models.Index(fields=["status", "created_at"], name="quoterequest_status_idx"),
+            models.Index(fields=["email"], name="quoterequest_email_idx"),
+        ]
 
     def __str__(self):
         return f'{self.name} - {self.email}'
 
 
+class DocumentSequence(models.Model):
+    """Counter behind quote and invoice numbers; see numbering.next_number."""
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
+class QuoteQuerySet(models.QuerySet):
+    def expired(self, today=None):
+        today = today or timezone.now().date()
+        return self.filter(status__in=OPEN_QUOTE_STATUS, expiry_date__lt=today)
+
+
 class Quote(models.Model):
     company = models.ForeignKey(MyCompany, on_delete=models.CASCADE, blank=True, null=True)
     quote_request = models.ForeignKey(QuoteRequest, on_delete=models.CASCADE, blank=True, null=True)
 
-    quote_id = models.CharField(max_length=255, blank=True, null=True, verbose_name="Quote ID")
+    quote_id = models.CharField(max_length=255, blank=True, null=True, unique=True, verbose_name="Quote ID")
     city = models.CharField(max_length=255, blank=True, null=True)
     postal_code = models.CharField(max_length=255, blank=True, null=True)
     address = models.CharField(max_length=255, blank=True, null=True)
@@ -161,6 +204,14 @@ class Quote(models.Model):
     quotation_file = models.FileField(upload_to="serviceapp/quotes", blank=True, null=True)
     # invoice_file = models.FileField(upload_to="serviceapp/invoices", blank=True, null=True)
 
+    objects = QuoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "expiry_date"], name="quote_status_expiry_idx"),
+            models.Index(fields=["created_at", "id"], name="quote_created_idx"),
+        ]
+
     def __str__(self):
         return f'{self.quote_id} - {self.quote_request.email}'
 
@@ -178,21 +229,28 @@ class Quote(models.Model):
         return self.total + self.gst_amount
 
     def generate_quote(self):
+        """Write the quote PDF to MEDIA_ROOT. Only needed when it is sent; staff view it through the admin."""
+        from .documents import render_pdf
+
         quotes_dir = os.path.join(settings.MEDIA_ROOT, "serviceapp/quotes")
         os.makedirs(quotes_dir, exist_ok=True)
 
         filename = f"quote_{self.quote_id}.pdf"
         path = os.path.join(quotes_dir, filename)
 
-        html = render_to_string("quotes/quote.html", {"quote": self})
-        HTML(string=html).write_pdf(path)
+        with open(path, "wb") as f:
+            f.write(render_pdf(self))
 
-        Quote.objects.filter(pk=self.pk).update(quotation_file=f"serviceapp/quotes/{filename}")
+        self.quotation_file.name = f"serviceapp/quotes/{filename}"
+        Quote.objects.filter(pk=self.pk).update(quotation_file=self.quotation_file.name)
         return path
 
     def save(self, *args, **kwargs):
-        if not self.quote_id:
-            self.quote_id = f"fwz-{uuid.uuid4().hex[:6]}"
+        from .numbering import next_document_id, save_numbered
+
+        numbered = not self.quote_id
+        if numbered:
+            self.quote_id = next_document_id("quote")
             if self.status == 'pending':
                 self.status = 'replied'
                 if self.quote_request:
@@ -200,11 +258,60 @@ class Quote(models.Model):
                     self.quote_request.save()
             if not self.company:
                 self.company = MyCompany.objects.first()
-        super().save(*args, **kwargs)
+        if numbered:
+            save_numbered(self, "quote_id", "quote", lambda: super(Quote, self).save(*args, **kwargs))
+        else:
+            super().save(*args, **kwargs)
+
+
+class InvoiceQuerySet(models.QuerySet):
+    def with_balance(self):
+        """Annotate ``paid_total``, ``amount_due`` and ``balance`` straight from the payment ledger."""
+        return self.annotate(
+            paid_total=payments_total("pk"),
+            amount_due=invoice_total("quote_id"),
+        ).annotate(balance=models.F("amount_due") - models.F("paid_total"))
+
+    def update_balances(self):
+        """Recompute the cached ``pay``/``due`` columns from the ledger in a single UPDATE.
+
+        ``is_paid`` is ticked once payments cover the total but never cleared
+        here, so invoices staff mark as paid by hand stay that way.
+        """
+        paid = payments_total("pk")
+        total = invoice_total("quote_id")
+        settled = models.Q(models.lookups.GreaterThan(paid, 0)) & models.Q(models.lookups.GreaterThanOrEqual(paid, total))
+        return self.update(
+            pay=paid,
+            due=total - paid,
+            is_paid=models.Case(models.When(settled, then=models.Value(True)), default=models.F("is_paid")),
+            updated_at=timezone.now(),
+        )
+
+    def outstanding(self):
+        return self.filter(is_paid=False, due__gt=0)
+
+    def overdue(self, today=None):
+        today = today or timezone.now().date()
+        return self.outstanding().filter(due_date__lt=today)
+
+    def debtors(self):
+        """Who owes us money: one row per customer email, largest balance first."""
+        return (
+            self.outstanding()
+            .values("quote__quote_request__email")
+            .annotate(
+                name=models.Max("quote__quote_request__name"),
+                owed=models.Sum("due"),
+                invoices=models.Count("pk"),
+                oldest_due_date=models.Min("due_date"),
+            )
+            .order_by("-owed")
+        )
 
 
 class Invoice(models.Model):
-    invoice_id = models.CharField(max_length=255, blank=True, null=True, verbose_name="Invoice ID")
+    invoice_id = models.CharField(max_length=255, blank=True, null=True, unique=True, verbose_name="Invoice ID")
     quote = models.ForeignKey(Quote, on_delete=models.CASCADE, related_name="invoice")
     message = RichTextField(blank=True, null=True)
     invoice_file = models.FileField(upload_to="serviceapp/invoices", blank=True, null=True)
@@ -218,6 +325,14 @@ class Invoice(models.Model):
     due_date = models.DateField(blank=True, null=True)
     payment_term = models.CharField(max_length=255, blank=True, null=True, help_text="e.g., 'Due within 3 days', 'Due on receipt'")
 
+    objects = InvoiceQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="invoice_created_idx"),
+            models.Index(fields=["due_date"], condition=models.Q(is_paid=False), name="invoice_unpaid_due_idx"),
+        ]
+
     def __str__(self):
         return str(self.invoice_id)
     
@@ -234,30 +349,40 @@ class Invoice(models.Model):
         return self.quote.total_with_gst
 
     def save(self, *args, **kwargs):
-        # if pay deduct from due
-        if self.pay:    
-            self.due = self.total_with_gst - self.pay
-        else:
-            self.due = self.quote.total_with_gst
+        from decimal import Decimal
+        from .numbering import next_document_id, save_numbered
+
+        # pay/due cache the payment ledger; read both totals in one query
+        ledger = Payment.objects.filter(invoice_id=self.pk).values("invoice").annotate(total=models.Sum("amount")).values("total")
+        paid, total = Quote.objects.filter(pk=self.quote_id).values_list(
+            _coalesce_money(models.Subquery(ledger)), invoice_total("pk"),
+        ).get()
+        self.pay = paid
+        self.due = (total - paid).quantize(Decimal("0.01"))
+        if paid > 0 and paid >= total:
+            self.is_paid = True
 
-        
         if not self.invoice_id:
-            self.invoice_id = f"fwz-inv-{uuid.uuid4().hex[:6]}"
-        super().save(*args, **kwargs)
-
-        self.generate_invoice()
+            self.invoice_id = next_document_id("invoice")
+            save_numbered(self, "invoice_id", "invoice", lambda: super(Invoice, self).save(*args, **kwargs))
+        else:
+            super().save(*args, **kwargs)
 
     def generate_invoice(self):
+        """Write the invoice PDF to MEDIA_ROOT. Only needed when it is sent; staff view it through the admin."""
+        from .documents import render_pdf
+
         invoices_dir = os.path.join(settings.MEDIA_ROOT, "serviceapp/invoices")
         os.makedirs(invoices_dir, exist_ok=True)
 
         filename = f"invoice_{self.invoice_id}.pdf"
         path = os.path.join(invoices_dir, filename)
 
-        html = render_to_string("invoices/invoice.html", {"invoice": self})
-        HTML(string=html).write_pdf(path)
+        with open(path, "wb") as f:
+            f.write(render_pdf(self))
 
-        Invoice.objects.filter(pk=self.pk).update(invoice_file=f"serviceapp/invoices/{filename}")
+        self.invoice_file.name = f"serviceapp/invoices/{filename}"
+        Invoice.objects.filter(pk=self.pk).update(invoice_file=self.invoice_file.name)
         return path
 
 
@@ -278,6 +403,81 @@ class QuoteItem(models.Model):
         super().save(*args, **kwargs)
 
 
+def quote_subtotal(quote_ref="pk"):
+    """Sum of a quote's item amounts as a correlated subquery.
+
+    ``quote_ref`` names the column holding the quote id on the outer query,
+    e.g. ``"pk"`` for quotes or ``"quote_id"`` for invoices.
+    """
+    items = (
+        QuoteItem.objects.filter(quote=models.OuterRef(quote_ref))
+        .values("quote")
+        .annotate(total=models.Sum("amount"))
+        .values("total")
+    )
+    return _coalesce_money(models.Subquery(items))
+
+
+def invoice_total(quote_ref="pk"):
+    """A quote's total including GST, rounded to cents, as a correlated subquery."""
+    from decimal import Decimal
+    from django.db.models.functions import Round
+
+    return models.ExpressionWrapper(
+        Round(quote_subtotal(quote_ref) * models.Value(Decimal("1.1")), 2),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def payments_total(invoice_ref="pk"):
+    """Sum of the payments recorded against an invoice as a correlated subquery."""
+    payments = (
+        Payment.objects.filter(invoice=models.OuterRef(invoice_ref))
+        .values("invoice")
+        .annotate(total=models.Sum("amount"))
+        .values("total")
+    )
+    return _coalesce_money(models.Subquery(payments))
+
+
+def _coalesce_money(expression):
+    from decimal import Decimal
+    from django.db.models.functions import Coalesce
+
+    return Coalesce(
+        expression, models.Value(Decimal("0")),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+PAYMENT_METHOD = (
+    ('bank', 'Bank transfer'),
+    ('card', 'Card'),
+    ('cash', 'Cash'),
+    ('other', 'Other'),
+)
+
+
+class Payment(models.Model):
+    """One entry in an invoice's payment ledger. ``Invoice.pay``/``due`` cache the running balance."""
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name="payments")
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    date = models.DateField(default=timezone.localdate)
+    method = models.CharField(max_length=20, choices=PAYMENT_METHOD, default='bank')
+    reference = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-date", "-id")
+        indexes = [
+            models.Index(fields=["invoice", "date"], name="payment_invoice_date_idx"),
+            models.Index(fields=["date"], name="payment_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.invoice} {self.amount} on {self.date}"
+
+
 class Review(models.Model):
     name = models.CharField(max_length=255)
     message = models.TextField(blank=True)
@@ -347,6 +547,19 @@ JOB_TYPE =(
     ('volunteer', 'Volunteer'),
     ('other', 'Other'),
 )
+class VacancyQuerySet(models.QuerySet):
+    def open(self, today=None):
+        """Active vacancies whose expiry date has not passed, whether or not the sweeper has run yet."""
+        today = today or timezone.now().date()
+        return self.filter(is_active=True).filter(
+            models.Q(expired_at__isnull=True) | models.Q(expired_at__gte=today)
+        )
+
+    def expired(self, today=None):
+        today = today or timezone.now().date()
+        return self.filter(is_active=True, expired_at__lt=today)
+
+
 class Vacancy(models.Model):
     title = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True)
@@ -359,6 +572,13 @@ class Vacancy(models.Model):
 
     expired_at = models.DateField(blank=True, null=True)
 
+    objects = VacancyQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["is_active", "expired_at"], name="vacancy_active_expiry_idx"),
+        ]
+
     def __str__(self):
         return self.title
     
@@ -370,10 +590,8 @@ class Vacancy(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
-            self.save()
         if self.is_expired():
             self.is_active = False
-            self.save()
         super().save(*args, **kwargs)
 
 
@@ -422,6 +640,31 @@ class EmailMessageTemplate(models.Model):
         verbose_name_plural = "Email Message Templates"
 
 
+NOTIFICATION_STATUS = (
+    ('queued', 'Queued'),
+    ('sending', 'Sending'),
+    ('sent', 'Sent'),
+    ('failed', 'Failed'),
+)
+class ApplicationNotification(models.Model):
+    """One templated status email for an applicant, and the result of sending it."""
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name="notifications")
+    type = models.CharField(max_length=255, choices=MESSAGE_TYPE)
+    email = models.EmailField()
+    status = models.CharField(max_length=20, choices=NOTIFICATION_STATUS, default='queued', db_index=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.get_type_display()} - {self.email}"
+
+    class Meta:
+        verbose_name = "Application Notification"
+        verbose_name_plural = "Application Notifications"
+
+
 class PageContent(models.Model):
     PAGE_CHOICES = [
         ('privacy', 'Privacy Policy'),
@@ -473,3 +716,163 @@ class Pricing(models.Model):
 
     class Meta:
         ordering = ["order"]
+
+
+
+class SearchDocument(models.Model):
+    """Flattened text of one row, indexed for admin search (see search.py).
+
+    The migration adds an FTS5 table on SQLite or a GIN index on PostgreSQL.
+    """
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    body = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["model", "object_id"], name="searchdocument_unique_object"),
+        ]
+
+    def __str__(self):
+        return f"{self.model}:{self.object_id}"
+
+
+class DailySummary(models.Model):
+    """Quotes created on ``date`` that are now in ``status``, with their invoice totals.
+
+    Maintained by signal hooks (see reports.py); rebuild with ``rebuild_daily_summary``.
+    """
+    date = models.DateField()
+    status = models.CharField(max_length=255, choices=QUOTE_STATUS)
+    quotes = models.PositiveIntegerField(default=0)
+    quote_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    invoiced = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("-date", "status")
+        verbose_name_plural = "Daily summaries"
+        constraints = [
+            models.UniqueConstraint(fields=["date", "status"], name="dailysummary_unique_day_status"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status}"
+
+
+DOCUMENT_KIND = (
+    ('quote', 'Quote'),
+    ('invoice', 'Invoice'),
+)
+
+
+class DocumentAccess(models.Model):
+    """One open of a quote or invoice through the signed link in its email."""
+    document = models.CharField(max_length=20, choices=DOCUMENT_KIND)
+    object_id = models.BigIntegerField()
+    accessed_at = models.DateTimeField(auto_now_add=True)
+    ip_address = models.GenericIPAddressField(blank=True, null=True)
+    user_agent = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ("-accessed_at",)
+        verbose_name_plural = "Document accesses"
+        indexes = [
+            models.Index(fields=["document", "object_id", "accessed_at"], name="documentaccess_object_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.document} {self.object_id} at {self.accessed_at}"
+
+
+class RequestProfile(models.Model):
+    """One request run under the profiler by a staff user (apps/serviceapp/profiling.py)."""
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    query_ms = models.FloatField()
+    peak_memory = models.PositiveBigIntegerField(help_text="Peak traced allocation in bytes")
+    stats = models.BinaryField(help_text="Marshalled pstats data")
+    allocations = models.JSONField(default=list)
+    queries = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+
+# ---------------------------------------------------
+# Archive (cold) tables, filled by the archive_old_records command
+# ---------------------------------------------------
+class ArchivedQuoteRequest(models.Model):
+    original_id = models.BigIntegerField(unique=True)
+    name = models.CharField(max_length=255)
+    email = models.EmailField(db_index=True)
+    phone = models.CharField(max_length=255, blank=True)
+    service = models.ManyToManyField(Service, blank=True, related_name="archived_quote_requests")
+    city = models.CharField(max_length=255, blank=True, null=True)
+    postal_code = models.CharField(max_length=255, blank=True, null=True)
+    address = models.CharField(max_length=255, blank=True, null=True)
+    message = models.TextField(blank=True)
+    status = models.CharField(max_length=255, choices=QUOTE_STATUS, default='pending')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} - {self.email}'
+
+    class Meta:
+        verbose_name = "Archived Quote Request"
+        verbose_name_plural = "Archived Quote Requests"
+
+
+class ArchivedContact(models.Model):
+    original_id = models.BigIntegerField(unique=True)
+    first_name = models.CharField(max_length=255)
+    last_name = models.CharField(max_length=255, blank=True, null=True)
+    email = models.EmailField(db_index=True)
+    phone = models.CharField(max_length=255, blank=True, null=True)
+    subject = models.CharField(max_length=255, blank=True, null=True)
+    message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    is_read = models.BooleanField(default=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name or ''}".strip()
+
+    class Meta:
+        verbose_name = "Archived Contact"
+        verbose_name_plural = "Archived Contacts"
+
+
+class ArchivedApplication(models.Model):
+    original_id = models.BigIntegerField(unique=True)
+    vacancy = models.ForeignKey(Vacancy, on_delete=models.SET_NULL, blank=True, null=True, related_name="archived_applications")
+    name = models.CharField(max_length=255)
+    email = models.EmailField(db_index=True)
+    phone = models.CharField(max_length=255, blank=True)
+    resume = models.FileField(upload_to='serviceapp/resumes', blank=True)
+    message = models.TextField(blank=True)
+    applied_at = models.DateTimeField()
+    is_reviewed = models.BooleanField(default=False)
+    comments = models.TextField(blank=True)
+    status = models.CharField(max_length=255, choices=APPLICATION_STATUS, default='pending')
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "Archived Application"
+        verbose_name_plural = "Archived Applications"
@@ -0,0 +1,139 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import Application, ApplicationNotification, EmailMessageTemplate
+
+
+DEFAULT_SUBJECTS = {
+    "shortlist": "Your application has been shortlisted",
+    "selected": "Congratulations, you have been selected",
+    "rejected": "Update on your application",
+}
+DEFAULT_BODIES = {
+    "shortlist": "Thank you for applying. We are pleased to let you know that you have been shortlisted. We will be in touch soon.",
+    "selected": "Thank you for applying. We are happy to let you know that you have been selected. We will contact you with the next steps.",
+    "rejected": "Thank you for applying. Unfortunately we will not be moving forward with your application at this time.",
+}
+
+def update_application_status(queryset, status):
+    """Set ``status`` on every application in ``queryset`` with a single UPDATE and
+    queue the matching templated email for each applicant.
+
+    Returns the number of applications updated.
+    """
+    rows = list(queryset.values_list("pk", "email"))
+    if not rows:
+        return 0
+
+    with transaction.atomic():
+        updated = Application.objects.filter(pk__in=[pk for pk, _ in rows]).update(
+            status=status, is_reviewed=True
+        )
+        if status in DEFAULT_SUBJECTS:
+            ApplicationNotification.objects.bulk_create([
+                ApplicationNotification(application_id=pk, type=status, email=email)
+                for pk, email in rows
+            ])
+            transaction.on_commit(send_queued_notifications_async)
+    return updated
+
+
+def send_queued_notifications_async():
+    threading.Thread(target=_send_in_thread, daemon=True).start()
+
+
+def _send_in_thread():
+    try:
+        send_queued_notifications()
+    finally:
+        # The thread's database connection is not closed by any request cycle
+        connections.close_all()
+
+
+def _claim(notification):
+    """Move one queued row to "sending"; False if another sender got there first."""
+    claimed = ApplicationNotification.objects.filter(pk=notification.pk, status="queued").update(
+        status="sending", claimed_at=timezone.now()
+    )
+    return claimed == 1
+
+
+def release_stale_claims():
+    """Mark rows left in "sending" by a sender that died as failed.
+
+    The message may or may not have gone out, so they are not queued again
+    automatically; "Retry failed notifications" in the admin does that.
+    """
+    timeout = getattr(settings, "APPLICATION_NOTIFICATION_CLAIM_TIMEOUT", 600)
+    return ApplicationNotification.objects.filter(
+        status="sending", claimed_at__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(status="failed", error="Interrupted while sending; it may have been delivered.")
+
+
+def send_queued_notifications(batch_size=None, pause=None):
+    """Send every queued notification over one SMTP connection.
+
+    Messages go out in batches of ``batch_size`` with ``pause`` seconds between
+    batches so a large hiring round stays under the mail provider's rate limit.
+    Each row is claimed with a conditional UPDATE before its message is sent
+    and marked with the result straight after, so concurrent senders in other
+    threads or processes never send the same row twice, and a crash leaves at
+    most one row in "sending" instead of resending the batch.
+    """
+    batch_size = batch_size or getattr(settings, "APPLICATION_NOTIFICATION_BATCH_SIZE", 50)
+    if pause is None:
+        pause = getattr(settings, "APPLICATION_NOTIFICATION_BATCH_PAUSE", 1.0)
+
+    release_stale_claims()
+    sent = failed = 0
+    templates = {
+        t.type: t
+        for t in EmailMessageTemplate.objects.filter(type__in=DEFAULT_SUBJECTS, is_active=True).order_by("-pk")
+    }
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    try:
+        last_pk = 0
+        while True:
+            batch = list(
+                ApplicationNotification.objects.filter(status="queued", pk__gt=last_pk)
+                .order_by("pk")[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            for notification in batch:
+                if not _claim(notification):
+                    continue
+                template = templates.get(notification.type)
+                mail = EmailMessage(
+                    subject=template.subject if template else DEFAULT_SUBJECTS[notification.type],
+                    body=template.body if template else DEFAULT_BODIES[notification.type],
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[notification.email],
+                    connection=connection,
+                )
+                mail.message_type = notification.type
+                try:
+                    mail.send(fail_silently=False)
+                except Exception as e:
+                    result = {"status": "failed", "error": str(e)}
+                    failed += 1
+                else:
+                    result = {"status": "sent", "error": "", "sent_at": timezone.now()}
+                    sent += 1
+                ApplicationNotification.objects.filter(pk=notification.pk).update(**result)
+
+            if len(batch) == batch_size and pause:
+                time.sleep(pause)
+    finally:
+        connection.close()
+
+    return {"sent": sent, "failed": failed}
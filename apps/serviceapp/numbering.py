@@ -0,0 +1,78 @@
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import DocumentSequence
+
+
+SEQUENCE_FORMATS = {
+    # 7 digits so new numbers can never equal a legacy 6-character hex id
+    "quote": "fwz-{:07d}",
+    "invoice": "fwz-inv-{:07d}",
+}
+
+_lock = threading.Lock()
+_blocks = {}  # sequence name -> [next number, end of block)
+
+
+def _reserve_block(name, size):
+    with transaction.atomic():
+        DocumentSequence.objects.get_or_create(name=name)
+        DocumentSequence.objects.filter(name=name).update(next_value=F("next_value") + size)
+        end = DocumentSequence.objects.values_list("next_value", flat=True).get(name=name)
+    return [end - size, end]
+
+
+def next_number(name):
+    """Return the next document number for ``name``.
+
+    Each process reserves ``DOCUMENT_NUMBER_BLOCK_SIZE`` numbers at a time with
+    one UPDATE, then hands them out from memory, so concurrent workers only
+    touch the sequence row once per block. Unused numbers in a block are lost
+    when the process exits, which leaves gaps but never duplicates.
+    """
+    size = getattr(settings, "DOCUMENT_NUMBER_BLOCK_SIZE", 20)
+    with _lock:
+        block = _blocks.get(name)
+        if block is None or block[0] >= block[1]:
+            block = _blocks[name] = _reserve_block(name, size)
+        number = block[0]
+        block[0] += 1
+    return number
+
+
+def discard_block(name):
+    with _lock:
+        _blocks.pop(name, None)
+
+
+def next_document_id(name):
+    return SEQUENCE_FORMATS[name].format(next_number(name))
+
+
+def reserve_document_ids(name, count):
+    """Reserve ``count`` consecutive document ids with one UPDATE, for rows created with bulk_create."""
+    start, end = _reserve_block(name, count)
+    return [SEQUENCE_FORMATS[name].format(number) for number in range(start, end)]
+
+
+def save_numbered(instance, field, name, save, attempts=3):
+    """Call ``save()`` for an instance whose ``field`` was just allocated from ``name``.
+
+    If the surrounding transaction that reserved a block was rolled back,
+    another process can be handed the same numbers. The unique index catches
+    that; the block is then dropped and a fresh number is tried.
+    """
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            model = type(instance)
+            taken = model._default_manager.filter(**{field: getattr(instance, field)}).exclude(pk=instance.pk).exists()
+            if not taken or attempt == attempts - 1:
+                raise
+            discard_block(name)
+            setattr(instance, field, next_document_id(name))
@@ -0,0 +1,136 @@
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .metrics import cache_lookup
+
+
+KEYSET_ORDERINGS = {
+    ("-created_at", "-pk"): "lt",
+    ("created_at", "pk"): "gt",
+}
+
+
+def estimated_table_count(model):
+    """Row count from the planner statistics, or ``None`` when there are none.
+
+    PostgreSQL keeps ``reltuples`` up to date through autovacuum; SQLite only
+    has ``sqlite_stat1`` after ``ANALYZE``.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == "sqlite":
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+def _cache():
+    # Counts and boundaries are only hints: a worker that misses falls back to
+    # COUNT and OFFSET, so the per-process default cache is enough. Point this
+    # at a shared cache to let workers reuse each other's boundaries, at the
+    # cost of a cache round trip on every changelist page.
+    return caches[getattr(settings, "PAGINATOR_CACHE", "default")]
+
+
+class KeysetPaginator(Paginator):
+    """Admin paginator that avoids ``COUNT(*)`` and deep ``OFFSET`` scans.
+
+    The total comes from planner statistics for large unfiltered changelists,
+    otherwise from a briefly cached ``COUNT``. When the list is ordered by
+    ``(created_at, pk)``, the last row of every rendered page is remembered so
+    the next page seeks past it through the index instead of skipping rows.
+    Pages reached without a known boundary nearby still use ``OFFSET``.
+    """
+
+    @cached_property
+    def _query_key(self):
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+        except EmptyResultSet:
+            sql, params = "empty", ()
+        digest = hashlib.md5(f"{sql}{params}".encode()).hexdigest()
+        return f"paginator:{self.object_list.model._meta.label_lower}:{digest}"
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_table_count(queryset.model)
+            if estimate is not None and estimate >= getattr(settings, "PAGINATOR_ESTIMATE_THRESHOLD", 10000):
+                return estimate
+        timeout = getattr(settings, "PAGINATOR_COUNT_CACHE_TIMEOUT", 60)
+        cache = _cache()
+        key = f"{self._query_key}:count"
+        count = cache.get(key)
+        cache_lookup("changelist_count", hits=count is not None, misses=count is None)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, timeout)
+        return count
+
+    @cached_property
+    def _seek_lookup(self):
+        # The changelist repeats the admin ordering and may spell the pk as "id"
+        ordering = []
+        for part in self.object_list.query.order_by:
+            if not isinstance(part, str):
+                return None
+            part = part.replace("id", "pk") if part.lstrip("-") == "id" else part
+            if part not in ordering:
+                ordering.append(part)
+        return KEYSET_ORDERINGS.get(tuple(ordering))
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self._seek_lookup is None:
+            return super().page(number)
+
+        queryset = self.object_list
+        skip_pages = number - 1
+
+        # Look for the closest remembered boundary within the previous few pages
+        previous = range(number - 1, max(number - 11, 0), -1)
+        keys = {f"{self._query_key}:page:{n}": n for n in previous}
+        cache = _cache()
+        boundaries = cache.get_many(keys)
+        cache_lookup("changelist_page", hits=bool(boundaries), misses=bool(keys) and not boundaries)
+        for key, n in sorted(keys.items(), key=lambda item: -item[1]):
+            if key in boundaries:
+                created_at, pk = boundaries[key]
+                lookup = self._seek_lookup
+                queryset = queryset.filter(
+                    Q(**{f"created_at__{lookup}": created_at})
+                    | Q(created_at=created_at, **{f"pk__{lookup}": pk})
+                )
+                skip_pages = number - 1 - n
+                break
+
+        bottom = skip_pages * self.per_page
+        # Keep the page a (pre-evaluated) queryset: list_editable builds its formset from it
+        page_queryset = queryset[bottom:bottom + self.per_page]
+        object_list = list(page_queryset)
+        if object_list:
+            last = object_list[-1]
+            cache.set(
+                f"{self._query_key}:page:{number}",
+                (last.created_at, last.pk),
+                getattr(settings, "PAGINATOR_BOUNDARY_CACHE_TIMEOUT", 300),
+            )
+        return self._get_page(page_queryset, number, self)
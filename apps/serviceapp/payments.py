@@ -0,0 +1,197 @@
+import csv
+import io
+import re
+import threading
+import uuid
+from collections import Counter, defaultdict, namedtuple
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Invoice, Payment, invoice_total
+from .reports import schedule_refresh
+
+
+# Header names (lower case) recognised in bank CSV exports
+AMOUNT_COLUMNS = ("amount", "credit", "credit amount", "deposit", "paid in", "money in")
+TEXT_COLUMNS = ("reference", "description", "narrative", "details", "memo", "particulars", "transaction details")
+DATE_COLUMNS = ("date", "transaction date", "posted date", "value date")
+
+TOKEN = re.compile(r"[A-Za-z0-9][A-Za-z0-9-]*[A-Za-z0-9]")
+
+StatementLine = namedtuple("StatementLine", "line date amount text")
+Match = namedtuple("Match", "line invoice_id amount")
+
+# Parsed statements wait here between the preview and the confirmation, which
+# may be served by different workers
+PREVIEW_CACHE = "shared"
+PREVIEW_TIMEOUT = 600
+
+
+class StatementError(ValueError):
+    pass
+
+
+def parse_statement(fileobj):
+    """Read credit lines from a bank CSV export. Debits and blank amounts are skipped."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="") if isinstance(fileobj.read(0), bytes) else fileobj
+    reader = csv.DictReader(text)
+    headers = {name.strip().lower(): name for name in reader.fieldnames or ()}
+
+    amount_column = next((headers[c] for c in AMOUNT_COLUMNS if c in headers), None)
+    if amount_column is None:
+        raise StatementError(f"No amount column found; expected one of: {', '.join(AMOUNT_COLUMNS)}.")
+    text_columns = [headers[c] for c in TEXT_COLUMNS if c in headers]
+    if not text_columns:
+        raise StatementError(f"No reference column found; expected one of: {', '.join(TEXT_COLUMNS)}.")
+    date_column = next((headers[c] for c in DATE_COLUMNS if c in headers), None)
+
+    lines = []
+    for number, row in enumerate(reader, start=2):
+        raw = (row.get(amount_column) or "").replace("$", "").replace(",", "").strip()
+        try:
+            amount = Decimal(raw)
+        except InvalidOperation:
+            continue
+        if amount <= 0:
+            continue
+        date = parse_date((row.get(date_column) or "").strip()) if date_column else None
+        lines.append(StatementLine(number, date, amount, " ".join(row.get(c) or "" for c in text_columns)))
+    return lines
+
+
+def store_preview(lines):
+    """Keep parsed ``lines`` for the confirmation step and return the key to fetch them with."""
+    token = uuid.uuid4().hex
+    caches[PREVIEW_CACHE].set(f"statement:{token}", lines, PREVIEW_TIMEOUT)
+    return token
+
+
+def take_preview(token):
+    """The lines stored under ``token``, removed so a second submit can't apply them again; None once expired."""
+    cache = caches[PREVIEW_CACHE]
+    lines = cache.get(f"statement:{token}")
+    cache.delete(f"statement:{token}")
+    return lines
+
+
+def _tokens(text):
+    return {token.lower() for token in TOKEN.findall(text)}
+
+
+class ReconcileResult:
+    def __init__(self):
+        self.matches = []
+        self.unmatched = []
+        self.duplicates = []
+        self.invoices = []
+
+    @property
+    def matched_total(self):
+        return sum((m.amount for m in self.matches), Decimal("0"))
+
+
+def _ledger_key(invoice_pk, line):
+    return invoice_pk, line.date or timezone.localdate(), line.amount, line.text[:255]
+
+
+def reconcile(lines, apply=True):
+    """Match statement lines to invoices and record them in the payment ledger.
+
+    Every token of every line is looked up in one query; the resulting
+    invoice number / quote reference -> invoice map is then used as an
+    in-memory hash index. Invoice numbers win over quote references, and
+    both are compared case-insensitively.
+    Lines already in the ledger (same invoice, date, amount and text) are
+    reported as duplicates, so importing a statement twice is harmless.
+    New payments go in with one ``bulk_create`` and the cached balances
+    are refreshed with one UPDATE; PDFs already sent to the customer are
+    re-rendered in the background afterwards.
+    """
+    result = ReconcileResult()
+    line_tokens = [(line, _tokens(line.text)) for line in lines]
+    all_tokens = set().union(*(tokens for _, tokens in line_tokens)) if line_tokens else set()
+    if not all_tokens:
+        result.unmatched = list(lines)
+        return result
+
+    with transaction.atomic():
+        invoices = (
+            Invoice.objects.select_for_update(of=("self",))
+            .alias(number_lower=Lower("invoice_id"), reference_lower=Lower("quote__reference"))
+            .filter(Q(number_lower__in=all_tokens) | Q(reference_lower__in=all_tokens))
+            .annotate(statement_total=invoice_total("quote_id"))
+            .select_related("quote")
+            .only("invoice_id", "pay", "due", "is_paid", "invoice_file", "quote__reference", "quote__created_at")
+        )
+        by_number, by_reference = {}, {}
+        for invoice in invoices:
+            if invoice.invoice_id:
+                by_number[invoice.invoice_id.lower()] = invoice
+            if invoice.quote.reference:
+                by_reference.setdefault(invoice.quote.reference.lower(), invoice)
+        candidates = {i.pk: i for i in (*by_number.values(), *by_reference.values())}
+
+        recorded = Counter(
+            (payment.invoice_id, payment.date, payment.amount, payment.reference)
+            for payment in Payment.objects.filter(invoice__in=list(candidates), method="bank")
+            .only("invoice_id", "date", "amount", "reference")
+        )
+        received = defaultdict(Decimal)
+        payments = []
+        for line, tokens in line_tokens:
+            invoice = next((by_number[t] for t in tokens if t in by_number), None) or \
+                next((by_reference[t] for t in tokens if t in by_reference), None)
+            if invoice is None:
+                result.unmatched.append(line)
+                continue
+            key = _ledger_key(invoice.pk, line)
+            if recorded[key]:
+                recorded[key] -= 1
+                result.duplicates.append(Match(line, invoice.invoice_id, line.amount))
+                continue
+            received[invoice.pk] += line.amount
+            result.matches.append(Match(line, invoice.invoice_id, line.amount))
+            payments.append(Payment(invoice=invoice, date=key[1], amount=line.amount, method="bank", reference=key[3]))
+
+        for invoice in candidates.values():
+            if invoice.pk not in received:
+                continue
+            invoice.pay += received[invoice.pk]
+            invoice.due = invoice.statement_total.quantize(Decimal("0.01")) - invoice.pay
+            invoice.is_paid = invoice.is_paid or invoice.due <= 0
+            result.invoices.append(invoice)
+
+        if not apply:
+            transaction.set_rollback(True)
+            return result
+
+        Payment.objects.bulk_create(payments, batch_size=500)
+        Invoice.objects.filter(pk__in=received).update_balances()
+        # Neither bulk_create nor update() sends signals, so refresh the revenue summary here
+        for invoice in result.invoices:
+            schedule_refresh(invoice.quote.created_at)
+
+        stale = [invoice.pk for invoice in result.invoices if invoice.invoice_file]
+        if stale:
+            transaction.on_commit(lambda: regenerate_invoice_pdfs_async(stale))
+    return result
+
+
+def regenerate_invoice_pdfs_async(pks):
+    threading.Thread(target=regenerate_invoice_pdfs, args=(pks,), daemon=True).start()
+
+
+def regenerate_invoice_pdfs(pks):
+    """Re-render stored invoice PDFs so copies on disk show the new balance."""
+    try:
+        invoices = Invoice.objects.filter(pk__in=pks).select_related("quote__company", "quote__quote_request")
+        for invoice in invoices.prefetch_related("quote__items__service"):
+            invoice.generate_invoice()
+    finally:
+        connection.close()
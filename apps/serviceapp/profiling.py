@@ -0,0 +1,201 @@
+"""On-demand profiling of a single request, for staff.
+
+Add ``?_profile=<token>`` to any URL, with a token from "Profile a page"
+in the admin (``profile_token``). The token is signed for the staff user
+who asked for it and expires after PROFILE_TOKEN_MAX_AGE seconds.
+``ProfilingMiddleware`` then runs that request under cProfile with
+tracemalloc on and records every SQL query with its duration. It stores
+a ``RequestProfile`` and adds an ``X-Profile-URL`` header pointing at the
+report. Requests without the parameter pay for one dictionary lookup.
+"""
+import cProfile
+import marshal
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.urls import reverse
+
+
+PARAM = "_profile"
+SALT = "serviceapp.profiling"
+MAX_QUERIES = 2000
+
+# tracemalloc is process wide, so only one request is profiled at a time
+_lock = threading.Lock()
+
+
+def profile_token(user):
+    return signing.dumps(user.pk, salt=SALT)
+
+
+def _token_valid(request, token):
+    max_age = getattr(settings, "PROFILE_TOKEN_MAX_AGE", 3600)
+    try:
+        pk = signing.loads(token, salt=SALT, max_age=max_age)
+    except signing.BadSignature:
+        return False
+    user = request.user
+    return user.is_authenticated and user.is_staff and user.pk == pk
+
+
+class _QueryLog:
+    def __init__(self):
+        self.queries = []
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append({"sql": sql, "ms": round(elapsed * 1000, 3), "many": many})
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "PROFILING_ENABLED", True)
+
+    def __call__(self, request):
+        token = request.GET.get(PARAM) if self.enabled else None
+        if token is not None:
+            # Hide the parameter from views; the admin changelist rejects unknown ones
+            request.GET = request.GET.copy()
+            del request.GET[PARAM]
+            request.GET._mutable = False
+        if not token or not _token_valid(request, token):
+            return self.get_response(request)
+        if not _lock.acquire(blocking=False):
+            response = self.get_response(request)
+            response["X-Profile-URL"] = "busy"
+            return response
+        try:
+            return self.profile(request)
+        finally:
+            _lock.release()
+
+    def profile(self, request):
+        from .models import RequestProfile
+
+        queries = _QueryLog()
+        profiler = cProfile.Profile()
+        tracemalloc.start(getattr(settings, "PROFILE_TRACEMALLOC_FRAMES", 10))
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(queries))
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                    # Streaming bodies are consumed after we return and are not covered
+                    if not response.streaming and hasattr(response, "render") and not response.is_rendered:
+                        response.render()
+                finally:
+                    profiler.disable()
+            elapsed = time.perf_counter() - started
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        stats = pstats.Stats(profiler)
+        profile = RequestProfile.objects.create(
+            user=request.user,
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            status=response.status_code,
+            duration_ms=elapsed * 1000,
+            query_count=queries.count,
+            query_ms=queries.seconds * 1000,
+            peak_memory=peak,
+            stats=marshal.dumps(stats.stats),
+            allocations=top_allocations(snapshot),
+            queries=queries.queries,
+        )
+        response["X-Profile-URL"] = reverse("admin:serviceapp_requestprofile_report", args=[profile.pk])
+        return response
+
+
+def top_allocations(snapshot, limit=30):
+    """The ``limit`` source lines holding the most memory still allocated when the request finished."""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    rows = []
+    for stat in snapshot.statistics("lineno")[:limit]:
+        frame = stat.traceback[0]
+        rows.append({"file": frame.filename, "line": frame.lineno, "size": stat.size, "count": stat.count})
+    return rows
+
+
+# Report ---------------------------------------------------------------------
+
+def _label(func):
+    filename, line, name = func
+    if filename == "~":
+        return name  # built-in
+    return f"{name}  ({filename}:{line})"
+
+
+def call_tree(raw_stats, max_depth=25, min_fraction=0.005):
+    """Nested call tree from marshalled pstats data, heaviest branch first.
+
+    Each node is ``{"label", "calls", "own", "cumulative", "percent", "children"}``. Branches
+    costing less than ``min_fraction`` of the total are dropped, and recursion
+    is cut where a function reappears on its own path.
+    """
+    stats = marshal.loads(raw_stats)
+    children = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, calls, own, cumulative) in callers.items():
+            children.setdefault(caller, []).append((func, calls, own, cumulative))
+
+    roots = [func for func, (*_, callers) in stats.items() if not callers]
+    # The middleware chain calls itself (handler -> middleware -> handler), so
+    # the function that was entered first may still list callers
+    heaviest = max(stats, key=lambda func: stats[func][3], default=None)
+    if heaviest is not None and heaviest not in roots:
+        roots.append(heaviest)
+    total = sum(stats[func][3] for func in roots) or 1e-9
+
+    def build(func, calls, own, cumulative, path, depth):
+        node = {
+            "label": _label(func),
+            "calls": calls,
+            "own": own * 1000,
+            "cumulative": cumulative * 1000,
+            "percent": 100 * cumulative / total,
+            "children": [],
+        }
+        if depth < max_depth:
+            for child, c_calls, c_own, c_cumulative in sorted(children.get(func, ()), key=lambda c: -c[3]):
+                if c_cumulative / total < min_fraction or child in path:
+                    continue
+                node["children"].append(build(child, c_calls, c_own, c_cumulative, path | {child}, depth + 1))
+        return node
+
+    nodes = [build(func, stats[func][1], stats[func][2], stats[func][3], {func}, 0) for func in roots]
+    return sorted(nodes, key=lambda n: -n["cumulative"]), total * 1000
+
+
+def top_functions(raw_stats, limit=40):
+    """Flat list of the functions with the most time spent in their own body."""
+    stats = marshal.loads(raw_stats)
+    rows = [
+        {"label": _label(func), "calls": calls, "own": own * 1000, "cumulative": cumulative * 1000}
+        for func, (_, calls, own, cumulative, _) in stats.items()
+    ]
+    return sorted(rows, key=lambda r: -r["own"])[:limit]
@@ -0,0 +1,176 @@
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+
+# Per endpoint token buckets: (requests, seconds). A bucket holds at most
+# `requests` tokens and refills completely over `seconds`.
+DEFAULT_RULES = {
+    "quote_request": (5, 3600),
+    "contact": (5, 3600),
+    "job_application": (3, 3600),
+}
+
+
+def _cache():
+    # Must be shared by every worker (database, Redis or Memcached); the
+    # serviceapp.E001 check refuses a per-process LocMem cache.
+    return caches[getattr(settings, "RATELIMIT_CACHE", "default")]
+
+
+def _rules():
+    return getattr(settings, "RATELIMIT_RULES", DEFAULT_RULES)
+
+
+def client_ip(request):
+    """The client's address, as seen by the first of ``RATELIMIT_TRUSTED_PROXIES`` proxies.
+
+    Each proxy appends the address it received the request from to
+    X-Forwarded-For, so only the right-most ``RATELIMIT_TRUSTED_PROXIES``
+    entries can be trusted; anything left of them was sent by the client.
+    """
+    proxies = getattr(settings, "RATELIMIT_TRUSTED_PROXIES", 0)
+    if proxies:
+        forwarded = [hop.strip() for hop in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if hop.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def take_tokens(keys, capacity, period):
+    """Take one token from each bucket in ``keys``, or from none of them.
+
+    Returns ``(allowed, retry_after_seconds)``. When any bucket is empty the
+    others are left untouched, so a rejected email doesn't also cost the IP a
+    token. Read-modify-write is not atomic across processes, so a burst can
+    overshoot by a token or two; that is fine for abuse protection.
+    """
+    cache = _cache()
+    now = time.time()
+    states = cache.get_many(keys)
+    buckets = {}
+    for key in keys:
+        state = states.get(key)
+        if state is None:
+            buckets[key] = float(capacity)
+        else:
+            tokens, stamp = state
+            buckets[key] = min(capacity, tokens + (now - stamp) * capacity / period)
+
+    lowest = min(buckets.values())
+    if lowest < 1:
+        return False, int((1 - lowest) * period / capacity) + 1
+
+    cache.set_many({key: (tokens - 1, now) for key, tokens in buckets.items()}, period)
+    return True, 0
+
+
+def count(name, outcome):
+    from .metrics import FORM_SUBMISSIONS
+
+    FORM_SUBMISSIONS.labels(name, outcome).inc()
+    cache = _cache()
+    key = f"ratelimit:count:{name}:{outcome}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr
+        cache.set(key, 1, None)
+
+
+def stats():
+    cache = _cache()
+    data = {}
+    for name in _rules():
+        data[name] = {
+            outcome: cache.get(f"ratelimit:count:{name}:{outcome}", 0)
+            for outcome in ("allowed", "limited", "busy")
+        }
+    data["in_flight"] = len(cache.get_many([_slot_key(n) for n in range(_max_concurrent())]))
+    return data
+
+
+# In-flight cap --------------------------------------------------------------
+# Each expensive POST holds one of RATELIMIT_MAX_CONCURRENT slot keys, taken
+# with cache.add(), which is atomic in every backend (a unique-key insert in
+# the database cache). A shared counter would need incr/decr, which the
+# database cache implements as get-then-set and which resets the expiry, so
+# it drifts. A slot left behind by a killed worker expires on its own.
+SLOT_TIMEOUT = 60
+
+
+def _max_concurrent():
+    return getattr(settings, "RATELIMIT_MAX_CONCURRENT", 4)
+
+
+def _slot_key(number):
+    return f"ratelimit:inflight:{number}"
+
+
+def acquire_slot():
+    """Take a free in-flight slot and return its key, or None when all are taken."""
+    cache = _cache()
+    for number in range(_max_concurrent()):
+        key = _slot_key(number)
+        if cache.add(key, 1, SLOT_TIMEOUT):
+            return key
+    return None
+
+
+def release_slot(key):
+    _cache().delete(key)
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        "Too many requests. Please try again later.", status=429, content_type="text/plain"
+    )
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def rate_limited(name, expensive=False):
+    """Limit POSTs to a public form view by client IP and submitted email.
+
+    Rejections short-circuit with a 429 before the view runs. ``expensive`` views
+    also share a global cap on concurrent POSTs (``RATELIMIT_MAX_CONCURRENT``)
+    so a flood can't tie up every worker. Multipart bodies are not parsed here,
+    so uploads are only limited by IP.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != "POST" or not getattr(settings, "RATELIMIT_ENABLED", True):
+                return view(request, *args, **kwargs)
+
+            capacity, period = _rules()[name]
+            keys = [f"ratelimit:{name}:ip:{client_ip(request)}"]
+            if not request.content_type.startswith("multipart/"):
+                email = request.POST.get("email", "").strip().lower()
+                if email:
+                    keys.append(f"ratelimit:{name}:email:{email}")
+
+            allowed, retry_after = take_tokens(keys, capacity, period)
+            if not allowed:
+                count(name, "limited")
+                return too_many_requests(retry_after)
+
+            if not expensive:
+                count(name, "allowed")
+                return view(request, *args, **kwargs)
+
+            slot = acquire_slot()
+            if slot is None:
+                count(name, "busy")
+                return too_many_requests(5)
+            try:
+                count(name, "allowed")
+                return view(request, *args, **kwargs)
+            finally:
+                release_slot(slot)
+        return wrapper
+    return decorator
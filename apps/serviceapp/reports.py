@@ -0,0 +1,175 @@
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import DailySummary, Invoice, Quote, QuoteItem
+
+
+GST_MULTIPLIER = Decimal("1.1")
+ZERO = Decimal("0")
+CENTS = Decimal("0.01")
+
+SUMMARY_FIELDS = ("quotes", "quote_value", "invoiced", "paid", "outstanding")
+
+
+def _totals(quotes, group_by):
+    """Summary values for ``quotes``, keyed by the tuple of ``group_by(prefix)`` values.
+
+    ``group_by`` maps a path prefix to the quote the rows hang off ("" or
+    "quote__") to a dict of annotation name -> expression.
+
+    Three grouped queries: quote counts, item totals and invoice totals.
+    Paid counts an invoice's full amount once it is ticked as paid,
+    otherwise whatever part payment has been recorded.
+    """
+    names = list(group_by(""))
+    rows = defaultdict(lambda: dict.fromkeys(SUMMARY_FIELDS, ZERO))
+
+    for row in quotes.annotate(**group_by("")).values(*names).annotate(n=Count("pk")):
+        rows[tuple(row[n] for n in names)]["quotes"] = row["n"]
+
+    items = QuoteItem.objects.filter(quote__in=quotes).annotate(**group_by("quote__"))
+    for row in items.values(*names).annotate(subtotal=Sum("amount")):
+        subtotal = row["subtotal"] or ZERO
+        rows[tuple(row[n] for n in names)]["quote_value"] = (subtotal * GST_MULTIPLIER).quantize(CENTS)
+
+    invoices = Invoice.objects.filter(quote__in=quotes).annotate(**group_by("quote__"))
+    for row in invoices.values(*names).annotate(
+        pay=Sum("pay"),
+        due_paid=Sum("due", filter=Q(is_paid=True)),
+        due_unpaid=Sum("due", filter=Q(is_paid=False)),
+    ):
+        values = rows[tuple(row[n] for n in names)]
+        pay, due_paid, due_unpaid = (row[k] or ZERO for k in ("pay", "due_paid", "due_unpaid"))
+        values["paid"] = pay + due_paid
+        values["outstanding"] = due_unpaid
+        values["invoiced"] = pay + due_paid + due_unpaid
+    return rows
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return start, start + datetime.timedelta(days=1)
+
+
+def refresh_day(day):
+    """Recompute every status row for quotes created on ``day``."""
+    start, end = _day_bounds(day)
+    quotes = Quote.objects.filter(created_at__gte=start, created_at__lt=end)
+    rows = _totals(quotes, lambda p: {"summary_status": F(f"{p}status")})
+    with transaction.atomic():
+        for (status,), values in rows.items():
+            DailySummary.objects.update_or_create(date=day, status=status, defaults=values)
+        DailySummary.objects.filter(date=day).exclude(status__in=[status for (status,) in rows]).delete()
+
+
+def rebuild(since=None):
+    """Rebuild the whole table (or every day from ``since``) in a handful of grouped queries."""
+    quotes = Quote.objects.all()
+    existing = DailySummary.objects.all()
+    if since:
+        quotes = quotes.filter(created_at__gte=_day_bounds(since)[0])
+        existing = existing.filter(date__gte=since)
+
+    rows = _totals(quotes, lambda p: {
+        "summary_date": TruncDate(f"{p}created_at"),
+        "summary_status": F(f"{p}status"),
+    })
+    with transaction.atomic():
+        existing.delete()
+        DailySummary.objects.bulk_create(
+            [DailySummary(date=day, status=status, **values) for (day, status), values in rows.items()],
+            batch_size=1000,
+        )
+    return len(rows)
+
+
+def _pending_days():
+    """Days waiting to be refreshed on this thread's connection (connections are per thread)."""
+    pending = getattr(connection, "_summary_pending_days", None)
+    if pending is None:
+        pending = connection._summary_pending_days = set()
+    return pending
+
+
+def _refresh_pending_days():
+    pending = _pending_days()
+    while pending:
+        refresh_day(pending.pop())
+
+
+def schedule_refresh(created_at):
+    """Refresh the summary for the day of ``created_at`` when the transaction commits.
+
+    Days are collected in a set and each on_commit hook drains it, so a
+    transaction touching many rows refreshes each day once; the later hooks
+    find the set empty. A rolled-back transaction drops its hooks but may
+    leave days in the set; the next commit refreshes those too, which is
+    harmless because refresh_day recomputes from the current rows.
+    """
+    if created_at is None:
+        return
+    day = timezone.localdate(created_at)
+    if not connection.in_atomic_block:
+        refresh_day(day)
+        return
+    _pending_days().add(day)
+    transaction.on_commit(_refresh_pending_days)
+
+
+# ---------------------------------------------------
+# Read side: reports page and dashboard
+# ---------------------------------------------------
+def monthly_totals(months=12):
+    """Per-month totals for the last ``months`` months, oldest first."""
+    today = timezone.localdate()
+    first = today.replace(day=1)
+    for _ in range(months - 1):
+        first = (first - datetime.timedelta(days=1)).replace(day=1)
+
+    rows = (
+        DailySummary.objects.filter(date__gte=first)
+        .annotate(month=TruncMonth("date"))
+        .values("month")
+        .annotate(
+            quotes_sum=Sum("quotes"),
+            quote_value_sum=Sum("quote_value"),
+            invoiced_sum=Sum("invoiced"),
+            paid_sum=Sum("paid"),
+            outstanding_sum=Sum("outstanding"),
+            completed_sum=Sum("quotes", filter=Q(status="completed")),
+        )
+        .order_by("month")
+    )
+    return [_with_conversion(row) for row in rows]
+
+
+def status_totals(start=None, end=None):
+    """Totals per status for quotes created between ``start`` and ``end`` (inclusive)."""
+    queryset = DailySummary.objects.all()
+    if start:
+        queryset = queryset.filter(date__gte=start)
+    if end:
+        queryset = queryset.filter(date__lte=end)
+    return list(
+        queryset.values("status")
+        .annotate(
+            quotes_sum=Sum("quotes"),
+            quote_value_sum=Sum("quote_value"),
+            invoiced_sum=Sum("invoiced"),
+            paid_sum=Sum("paid"),
+            outstanding_sum=Sum("outstanding"),
+        )
+        .order_by("status")
+    )
+
+
+def _with_conversion(row):
+    completed = row["completed_sum"] or 0
+    row["conversion"] = round(100 * completed / row["quotes_sum"], 1) if row["quotes_sum"] else 0
+    return row
@@ -0,0 +1,175 @@
+import re
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import connection, models
+
+from .models import Application, Contact, Quote, QuoteRequest, SearchDocument, Vacancy
+
+
+# Columns indexed for each model's admin search box. Related lookups are
+# flattened into the document when the row is saved.
+SEARCH_FIELDS = {
+    Contact: ("first_name", "last_name", "email", "phone", "subject", "message"),
+    QuoteRequest: ("name", "email", "phone", "city", "postal_code", "address", "message"),
+    Quote: ("quote_id", "reference", "city", "postal_code", "address", "quote_request__name", "quote_request__email"),
+    Application: ("name", "email", "phone", "message", "vacancy__title"),
+}
+
+# Documents that copy columns from another model, which must be rebuilt when
+# that model is saved: {saved model: [(indexed model, lookup back to it)]}
+DEPENDENT_DOCUMENTS = {
+    QuoteRequest: [(Quote, "quote_request")],
+    Vacancy: [(Application, "vacancy")],
+}
+
+FTS_TABLE = "serviceapp_searchdocument_fts"
+
+_fts_available = None
+
+
+def _resolve(instance, path):
+    value = instance
+    for part in path.split("__"):
+        value = getattr(value, part, None)
+        if value is None:
+            return ""
+    return str(value)
+
+
+def build_body(values):
+    return " ".join(str(v) for v in values if v)
+
+
+def index_instance(instance):
+    fields = SEARCH_FIELDS[type(instance)]
+    body = build_body(_resolve(instance, f) for f in fields)
+    SearchDocument.objects.update_or_create(
+        model=instance._meta.label_lower, object_id=instance.pk, defaults={"body": body}
+    )
+
+
+def unindex_instance(instance):
+    SearchDocument.objects.filter(model=instance._meta.label_lower, object_id=instance.pk).delete()
+
+
+def reindex_dependents(instance):
+    """Rebuild the documents that embed columns of ``instance``."""
+    for model, lookup in DEPENDENT_DOCUMENTS.get(type(instance), ()):
+        queryset = model.objects.filter(**{lookup: instance})
+        label = model._meta.label_lower
+        SearchDocument.objects.filter(model=label, object_id__in=queryset.values("pk")).delete()
+        _index_rows(model, queryset)
+
+
+def rebuild(model, batch_size=2000):
+    """Rebuild every search document for ``model``. Returns the number indexed."""
+    SearchDocument.objects.filter(model=model._meta.label_lower).delete()
+    return _index_rows(model, model.objects.all(), batch_size)
+
+
+def _index_rows(model, queryset, batch_size=2000):
+    label = model._meta.label_lower
+    fields = SEARCH_FIELDS[model]
+    batch = []
+    total = 0
+    for row in queryset.values_list("pk", *fields).iterator(chunk_size=batch_size):
+        batch.append(SearchDocument(model=label, object_id=row[0], body=build_body(row[1:])))
+        if len(batch) >= batch_size:
+            SearchDocument.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        SearchDocument.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+def _terms(search_term):
+    return re.findall(r"\w+", search_term.lower())[:10]
+
+
+def sqlite_fts_available():
+    global _fts_available
+    if _fts_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _fts_available = cursor.fetchone() is not None
+    return _fts_available
+
+
+def result_limit():
+    return getattr(settings, "ADMIN_SEARCH_RESULT_LIMIT", 500)
+
+
+def search_ids(model, search_term, limit=None):
+    """Return matching primary keys for ``model``, best match first.
+
+    Uses the SQLite FTS5 table or the PostgreSQL GIN expression index created
+    by the migration. Returns ``None`` when the database has neither, so the
+    caller can fall back to Django's own search.
+    """
+    terms = _terms(search_term)
+    if not terms:
+        return None
+    limit = limit or result_limit()
+    label = model._meta.label_lower
+
+    if connection.vendor == "sqlite":
+        if not sqlite_fts_available():
+            return None
+        query = " ".join(f'"{term}"*' for term in terms)
+        sql = (
+            f"SELECT d.object_id FROM {FTS_TABLE} f "
+            f"JOIN serviceapp_searchdocument d ON d.id = f.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND d.model = %s ORDER BY f.rank LIMIT %s"
+        )
+        params = [query, label, limit]
+    elif connection.vendor == "postgresql":
+        query = " & ".join(f"{term}:*" for term in terms)
+        sql = (
+            "SELECT object_id FROM serviceapp_searchdocument "
+            "WHERE to_tsvector('simple', body) @@ to_tsquery('simple', %s) AND model = %s "
+            "ORDER BY ts_rank(to_tsvector('simple', body), to_tsquery('simple', %s)) DESC LIMIT %s"
+        )
+        params = [query, label, query, limit]
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+class IndexedSearchMixin:
+    """Back an admin's search box with the full-text index instead of
+    ``OR``ed ``icontains`` scans, and order results by relevance.
+
+    Only the best ``ADMIN_SEARCH_RESULT_LIMIT`` matches are shown; the
+    changelist says so when the limit is reached.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        ids = search_ids(self.model, search_term) if search_term else None
+        if ids is None:
+            return super().get_search_results(request, queryset, search_term)
+        if len(ids) >= result_limit():
+            self.message_user(
+                request,
+                f"Showing the best {len(ids)} matches only. Add words to the search to narrow it down.",
+                messages.WARNING,
+            )
+
+        rank = models.Case(
+            *[models.When(pk=pk, then=models.Value(i)) for i, pk in enumerate(ids)],
+            default=models.Value(len(ids)),
+            output_field=models.IntegerField(),
+        ) if ids else models.Value(0)
+        request._search_ranked = True
+        return queryset.filter(pk__in=ids).annotate(_search_rank=rank), False
+
+    def get_ordering(self, request):
+        # Keep relevance order unless the user clicked a column header
+        if getattr(request, "_search_ranked", False) and "o" not in request.GET:
+            return ("_search_rank",)
+        return super().get_ordering(request)
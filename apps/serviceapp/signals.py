@@ -1,41 +1,40 @@
-import os
 from django.core.mail import EmailMessage
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import Quote, QuoteItem,Contact, Invoice, QuoteRequest, EmailMessageTemplate
+from .models import Quote, QuoteItem,Contact, Invoice, Payment, QuoteRequest, EmailMessageTemplate
 from django.core.cache import cache
+from .search import DEPENDENT_DOCUMENTS, SEARCH_FIELDS, index_instance, reindex_dependents, unindex_instance
+from .utils import clear_autofill
+from .reports import schedule_refresh
+from .documents import attach_document, default_email_body
 
 
 @receiver(post_save, sender=QuoteItem)
 def regenerate_docs_on_item_save(sender, instance, **kwargs):
     quote = instance.quote
-    if quote.items.exists():
-        quote.generate_quote()
-        quote.refresh_from_db()
-        
-        # If the quote status is "replied" and email hasn't been sent yet, send the email
-        if quote.status == "replied" and not quote.mail_sent:
-            # Build email
-            template = EmailMessageTemplate.objects.filter(type="quote", is_active=True).first()
-            email = EmailMessage(
-                subject= template.subject if template else "Your quote is ready",
-                body= template.body if template else "Your quote is ready. Please find the attached PDF.",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[quote.quote_request.email],
-            )
+    quote.refresh_from_db()
+
+    # If the quote status is "replied" and email hasn't been sent yet, send the email.
+    # The PDF is only written to disk for the attachment; staff preview it from the admin.
+    if quote.status == "replied" and not quote.mail_sent:
+        # Build email
+        template = EmailMessageTemplate.objects.filter(type="quote", is_active=True).first()
+        email = EmailMessage(
+            subject= template.subject if template else "Your quote is ready",
+            body= template.body if template else default_email_body("quote"),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[quote.quote_request.email],
+        )
 
-            # Attach generated file
-            if quote.quotation_file and hasattr(quote.quotation_file, "path"):
-                file_path = quote.quotation_file.path
-                if os.path.exists(file_path):
-                    email.attach_file(file_path)
+        # Attach the PDF (or a signed link to it)
+        attach_document(email, quote)
 
-            email.send(fail_silently=False)
-            
-            # Mark mail as sent
-            quote.mail_sent = True
-            quote.save(update_fields=["mail_sent"])
+        email.send(fail_silently=False)
+        
+        # Mark mail as sent
+        quote.mail_sent = True
+        quote.save(update_fields=["mail_sent"])
 
 # when a quote request is created, send a mail to the users
 @receiver(post_save, sender=QuoteRequest)
@@ -49,6 +48,7 @@ def quote_request_recieved_alter(sender, instance, created, **kwargs):
             from_email=settings.DEFAULT_FROM_EMAIL,
             to=[instance.email],
         )
+        mail.message_type = "init"
         mail.send(fail_silently=False)
 
 
@@ -62,25 +62,17 @@ def handle_quote_status(sender, instance, **kwargs):
 
         # Check if the quote has items and email hasn't been sent yet
         if instance.items.exists() and not instance.mail_sent:
-            # Generate Quote PDF
-            instance.generate_quote()
-            # Refresh instance from database to get updated quotation_file field
-            instance.refresh_from_db()
-
             template = EmailMessageTemplate.objects.filter(type="quote", is_active=True).first()
             # Build email
             email = EmailMessage(
                 subject= template.subject if template else "Your quote is ready",
-                body= template.body if template else "Your quote is ready. Please find the attached PDF.",
+                body= template.body if template else default_email_body("quote"),
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 to=[instance.quote_request.email],
             )
 
-            # Attach generated file
-            if instance.quotation_file and hasattr(instance.quotation_file, "path"):
-                file_path = instance.quotation_file.path
-                if os.path.exists(file_path):
-                    email.attach_file(file_path)
+            # Attach the PDF (or a signed link to it)
+            attach_document(email, instance)
 
             email.send(fail_silently=False)
             
@@ -99,36 +91,27 @@ def handle_quote_status(sender, instance, **kwargs):
         if instance.items.exists():
             # Get or create Invoice
             invoice, created = Invoice.objects.get_or_create(quote=instance)
-            
-            # Generate Invoice PDF
-            invoice.generate_invoice()
 
             template = EmailMessageTemplate.objects.filter(type="invoice", is_active=True).first()
             # Build email
             email = EmailMessage(
                 subject= template.subject if template else "Your invoice is ready",
-                body= template.body if template else "Your invoice is ready. Please find the attached PDF.",
+                body= template.body if template else default_email_body("invoice"),
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 to=[instance.quote_request.email],
             )
 
-            # Attach generated file
-            if invoice.invoice_file and hasattr(invoice.invoice_file, "path"):
-                file_path = invoice.invoice_file.path
-                if os.path.exists(file_path):
-                    email.attach_file(file_path)
+            # Attach the PDF (or a signed link to it)
+            attach_document(email, invoice)
 
             email.send(fail_silently=False)
         
 
-# save invoice: generate pdf when invoice is created and change quote status to completed
+# save invoice: change quote status to completed when invoice is created.
+# The PDF is written when the invoice email goes out (handle_quote_status).
 @receiver(post_save, sender=Invoice)
 def handle_invoice_status(sender, instance, created, **kwargs):
     if created:
-        # refresh database
-        instance.refresh_from_db()
-        # Generate Invoice PDF
-        instance.generate_invoice()
         # Change quote status to completed
         instance.quote.status = "completed"
         instance.quote.save(update_fields=["status"])
@@ -197,7 +180,83 @@ def handle_invoice_status(sender, instance, created, **kwargs):
 
 
 
+@receiver(post_save, sender=QuoteRequest)
+@receiver(post_delete, sender=QuoteRequest)
+def clear_autofill_cache(sender, instance, **kwargs):
+    clear_autofill(instance.pk)
+
+
+@receiver(m2m_changed, sender=QuoteRequest.service.through)
+def clear_autofill_cache_on_services(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and isinstance(instance, QuoteRequest):
+        clear_autofill(instance.pk)
+
+
 @receiver(post_save, sender=Contact)
 def clear_unread_cache(sender, instance, **kwargs):
     # Whenever a contact changes (read/unread), clear the cached count
-    cache.delete("unread_message_count")
\ No newline at end of file
+    cache.delete("unread_message_count")
+
+
+# Keep the admin search index in step with the searchable models
+def update_search_document(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        index_instance(instance)
+        if not created:
+            reindex_dependents(instance)
+
+
+def update_dependent_search_documents(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        reindex_dependents(instance)
+
+
+def delete_search_document(sender, instance, **kwargs):
+    unindex_instance(instance)
+
+
+for search_model in SEARCH_FIELDS:
+    post_save.connect(update_search_document, sender=search_model, dispatch_uid=f"search_index_{search_model.__name__}")
+    post_delete.connect(delete_search_document, sender=search_model, dispatch_uid=f"search_unindex_{search_model.__name__}")
+
+for source_model in set(DEPENDENT_DOCUMENTS) - set(SEARCH_FIELDS):
+    post_save.connect(
+        update_dependent_search_documents, sender=source_model, dispatch_uid=f"search_dependents_{source_model.__name__}"
+    )
+
+
+# Keep the daily revenue/pipeline summary in step with quotes, items and invoices
+def refresh_daily_summary(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        quote = instance if sender is Quote else instance.quote
+    except Quote.DoesNotExist:
+        # Deleted along with its quote, whose own signal covers the day
+        return
+    schedule_refresh(quote.created_at)
+
+
+for summary_model in (Quote, QuoteItem, Invoice):
+    post_save.connect(refresh_daily_summary, sender=summary_model, dispatch_uid=f"daily_summary_save_{summary_model.__name__}")
+    post_delete.connect(refresh_daily_summary, sender=summary_model, dispatch_uid=f"daily_summary_delete_{summary_model.__name__}")
+
+
+# Invoice.pay/due cache the payment ledger and the quote total
+def refresh_invoice_balance(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if sender is Payment:
+        invoices = Invoice.objects.filter(pk=instance.invoice_id)
+        quotes = Quote.objects.filter(invoice__pk=instance.invoice_id)
+    else:
+        invoices = Invoice.objects.filter(quote_id=instance.quote_id)
+        quotes = Quote.objects.filter(pk=instance.quote_id)
+    if invoices.update_balances():
+        # update() sends no signals, so refresh the revenue summary here
+        schedule_refresh(quotes.values_list("created_at", flat=True).first())
+
+
+for balance_model in (Payment, QuoteItem):
+    post_save.connect(refresh_invoice_balance, sender=balance_model, dispatch_uid=f"invoice_balance_save_{balance_model.__name__}")
+    post_delete.connect(refresh_invoice_balance, sender=balance_model, dispatch_uid=f"invoice_balance_delete_{balance_model.__name__}")
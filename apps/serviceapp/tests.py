@@ -1,3 +1,1129 @@
-from django.test import TestCase
+import csv
+import importlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import urlsplit
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse
+from django.template.backends.django import Template as DjangoTemplate
+from django.core.cache import caches
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .documents import document_context, document_url, html_to_pdf, pdf_cache, render_html
+from .exports import csv_stream, export_rows, xlsx_stream
+from .models import (
+    FAQ, QUOTE_STATUS, Application, ApplicationNotification, ArchivedApplication, ArchivedQuoteRequest, Contact,
+    DailySummary, DocumentAccess, DocumentSequence, Invoice, MyCompany, Payment, Pricing, Quote, QuoteItem,
+    QuoteRequest, Review, SearchDocument, Service, ServiceLocation, Vacancy,
+)
+from . import dataset
+from .archive import SPECS, archive, restore
+from .checks import ratelimit_cache_check
+from .notifications import send_queued_notifications, send_queued_notifications_async
+from .numbering import discard_block, next_number, save_numbered
+from .pagination import KeysetPaginator
+from .payments import StatementError, StatementLine, parse_statement, reconcile, store_preview, take_preview
+from .ratelimit import client_ip, rate_limited, stats as ratelimit_stats, take_tokens
+from .reports import SUMMARY_FIELDS, rebuild
+from .search import search_ids
+from .uploads import is_docx
+from .utils import autofill_cache_key
+
+
+class DocumentRenderQueryTests(TestCase):
+    """Rendering a quote or invoice template costs a fixed number of queries, however many items it has."""
+
+    @classmethod
+    def setUpTestData(cls):
+        company = MyCompany.objects.create(
+            name="Fawz", slug="fawz", logo="serviceapp/images/logo.png", bsb="062-000", account_number="12345678",
+        )
+        request = QuoteRequest.objects.create(name="Sam", email="sam@example.com", city="Sydney")
+        # mail_sent stops the signal handlers from rendering and emailing while the fixture is built
+        cls.quote = Quote.objects.create(company=company, quote_request=request, reference="REF-1", mail_sent=True)
+        cls.invoice = Invoice.objects.create(quote=cls.quote)
+        for n in range(5):
+            service = Service.objects.create(name=f"Service {n}")
+            QuoteItem.objects.create(quote=cls.quote, service=service, quantity=2, rate=Decimal("10.00"))
+
+    def test_quote_html_queries(self):
+        quote = Quote.objects.get(pk=self.quote.pk)
+        with self.assertNumQueries(2):
+            html = render_html(quote)
+        self.assertIn("Service 4", html)
+        self.assertIn("$110.00", html)
+
+    def test_invoice_html_queries(self):
+        invoice = Invoice.objects.get(pk=self.invoice.pk)
+        with self.assertNumQueries(2):
+            html = render_html(invoice)
+        self.assertIn("sam@example.com", html)
+        self.assertIn("BSB: 062-000", html)
+        self.assertIn("$110.00", html)
+
+    def test_prefetched_invoice_needs_no_queries(self):
+        invoice = (
+            Invoice.objects.select_related("quote__company", "quote__quote_request")
+            .prefetch_related("quote__items__service")
+            .get(pk=self.invoice.pk)
+        )
+        with self.assertNumQueries(0):
+            render_html(invoice)
+
+    def test_totals(self):
+        totals = document_context(self.quote)["totals"]
+        self.assertEqual(totals["subtotal"], Decimal("100.00"))
+        self.assertEqual(totals["gst"], Decimal("10.00"))
+        self.assertEqual(totals["total"], Decimal("110.00"))
+
+
+class TempMediaMixin:
+    """Point MEDIA_ROOT at a fresh directory (``self.media``) for each test."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        media_root = override_settings(MEDIA_ROOT=media)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.media = media
+
+
+class DocumentLogoTests(TempMediaMixin, TestCase):
+
+    def test_migration_builds_missing_document_logos(self):
+        from PIL import Image
+
+        os.makedirs(os.path.join(self.media, "serviceapp", "images"))
+        Image.new("RGB", (1200, 600), "green").save(os.path.join(self.media, "serviceapp", "images", "logo.jpg"))
+        # bulk_create skips MyCompany.save(), like rows saved before 0015
+        [company] = MyCompany.objects.bulk_create([MyCompany(name="Fawz", slug="fawz", logo="serviceapp/images/logo.jpg")])
+        migration = importlib.import_module("apps.serviceapp.migrations.0020_build_document_logos")
+        migration.build_document_logos(apps, None)
+
+        company.refresh_from_db()
+        self.assertTrue(company.document_logo.name.startswith("serviceapp/images/documents/fawz-"))
+        with Image.open(company.document_logo.path) as image:
+            self.assertLessEqual(max(image.size), 300)
+
+    def test_pdf_options_read_at_render_time(self):
+        with override_settings(DOCUMENT_PDF_OPTIONS={"optimize_images": True}), \
+                mock.patch("apps.serviceapp.documents.HTML") as html:
+            html_to_pdf("<p>x</p>")
+        html.return_value.write_pdf.assert_called_once_with(optimize_images=True)
+
+
+class GcMediaTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        old = time.time() - 48 * 3600
+        for name, size, mtime in (
+            ("serviceapp/resumes/cv.pdf", 10, old),
+            ("serviceapp/images/documents/stale.png", 100, old),
+            ("serviceapp/images/fresh.png", 1000, None),
+            ("elsewhere/keep.txt", 10, old),
+        ):
+            path = os.path.join(self.media, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(b"x" * size)
+            if mtime:
+                os.utime(path, (mtime, mtime))
+        vacancy = Vacancy.objects.create(title="Gardener")
+        Application.objects.create(vacancy=vacancy, name="Tom", email="tom@example.com", resume="serviceapp/resumes/cv.pdf")
+
+    def gc(self, *args):
+        out = io.StringIO()
+        call_command("gc_media", "--skip-missing", *args, stdout=out)
+        return out.getvalue()
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media, name))
+
+    def test_dry_run_reports_each_old_orphan_once(self):
+        out = self.gc("--dry-run")
+        self.assertEqual(out.count("orphan: "), 1)
+        self.assertIn("orphan: serviceapp/images/documents/stale.png", out)
+        self.assertIn("Would reclaim 100 bytes", out)
+        self.assertTrue(self.exists("serviceapp/images/documents/stale.png"))
+
+    def test_deletes_only_old_unreferenced_files_in_upload_dirs(self):
+        self.assertIn("Deleted 1 file(s), reclaimed 100 bytes", self.gc())
+        self.assertFalse(self.exists("serviceapp/images/documents/stale.png"))
+        self.assertTrue(self.exists("serviceapp/images/fresh.png"))
+        self.assertTrue(self.exists("serviceapp/resumes/cv.pdf"))
+        self.assertTrue(self.exists("elsewhere/keep.txt"))
+
+    def test_min_age(self):
+        self.assertIn("Deleted 2 file(s), reclaimed 1100 bytes", self.gc("--min-age", "0"))
+        self.assertFalse(self.exists("serviceapp/images/fresh.png"))
+        self.assertTrue(self.exists("serviceapp/resumes/cv.pdf"))
+
+
+class DocumentDownloadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = MyCompany.objects.create(name="Fawz", slug="fawz", logo="serviceapp/images/logo.png")
+        request = QuoteRequest.objects.create(name="Sam", email="sam@example.com")
+        quote = Quote.objects.create(company=company, quote_request=request, mail_sent=True)
+        cls.url = urlsplit(document_url(quote)).path
+
+    def test_get_is_logged(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(DocumentAccess.objects.count(), 1)
+
+    def test_head_and_prefetch_are_not_logged(self):
+        self.assertEqual(self.client.head(self.url).status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_SEC_PURPOSE="prefetch").status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_PURPOSE="prefetch").status_code, 200)
+        self.assertFalse(DocumentAccess.objects.exists())
+
+    @override_settings(DOCUMENT_DELIVERY="link")
+    def test_link_email_does_not_mention_an_attachment(self):
+        request = QuoteRequest.objects.create(name="Lee", email="lee@example.com")
+        quote = Quote.objects.create(quote_request=request, status="replied")
+        QuoteItem.objects.create(quote=quote, service=Service.objects.create(name="Mowing"), rate=Decimal("50.00"))
+        [message] = [m for m in mail.outbox if getattr(m, "message_type", None) == "quote"]
+        self.assertEqual(message.attachments, [])
+        self.assertNotIn("attached", message.body)
+        self.assertIn("View or download your quote: http", message.body)
+
+
+def _zip(*names):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name in names:
+            archive.writestr(name, "<xml/>")
+    return buffer.getvalue()
+
+
+@override_settings(RATELIMIT_ENABLED=False)
+class ResumeUploadTests(TempMediaMixin, TestCase):
+    """Resumes are kept only when the application is saved; every other outcome leaves MEDIA_ROOT empty."""
+
+    PDF = b"%PDF-1.4 resume"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vacancy = Vacancy.objects.create(title="Cleaner")
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media)
+            for root, _, names in os.walk(self.media) for name in names
+        )
+
+    def post(self, vacancy_id=None, client=None, **files):
+        data = {"name": "Alex", "email": "alex@example.com", "message": "Hello"}
+        data.update(files)
+        url = reverse("job_application", args=[vacancy_id or self.vacancy.pk])
+        return (client or self.client).post(url, data)
+
+    def test_saved_application_keeps_resume(self):
+        response = self.post(resume=SimpleUploadedFile("cv.pdf", self.PDF))
+        self.assertEqual(response.status_code, 302)
+        application = Application.objects.get()
+        self.assertEqual(application.resume.name, "serviceapp/resumes/cv.pdf")
+        self.assertEqual(self.stored_files(), [os.path.join("serviceapp", "resumes", "cv.pdf")])
+
+    def test_csrf_failure_leaves_nothing(self):
+        client = Client(enforce_csrf_checks=True)
+        response = self.post(client=client, resume=SimpleUploadedFile("cv.pdf", self.PDF))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_missing_vacancy_leaves_nothing(self):
+        response = self.post(vacancy_id=self.vacancy.pk + 100, resume=SimpleUploadedFile("cv.pdf", self.PDF))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_other_file_fields_are_skipped(self):
+        response = self.post(
+            resume=SimpleUploadedFile("cv.pdf", self.PDF),
+            photo=SimpleUploadedFile("photo.pdf", self.PDF),
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.stored_files(), [os.path.join("serviceapp", "resumes", "cv.pdf")])
+
+    @mock.patch("apps.serviceapp.views.render", return_value=HttpResponse())
+    def test_zip_that_is_not_docx_is_rejected(self, render):
+        self.post(resume=SimpleUploadedFile("cv.docx", _zip("payload.exe")))
+        form = render.call_args.args[2]["form"]
+        self.assertIn("resume", form.errors)
+        self.assertFalse(Application.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_is_docx(self):
+        self.assertTrue(is_docx(io.BytesIO(_zip("[Content_Types].xml", "word/document.xml"))))
+        self.assertFalse(is_docx(io.BytesIO(_zip("[Content_Types].xml"))))
+        self.assertFalse(is_docx(io.BytesIO(b"PK\x03\x04 not a zip")))
+
+
+class _Crash(BaseException):
+    """Stands in for the worker being killed mid-send; not caught by the sender's ``except Exception``."""
+
+
+class NotificationSendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        vacancy = Vacancy.objects.create(title="Cleaner")
+        for n in range(3):
+            application = Application.objects.create(vacancy=vacancy, name=f"Applicant {n}", email=f"a{n}@example.com")
+            ApplicationNotification.objects.create(application=application, type="shortlist", email=application.email)
+
+    def statuses(self):
+        return list(ApplicationNotification.objects.order_by("pk").values_list("status", flat=True))
+
+    def test_sends_each_row_once(self):
+        self.assertEqual(send_queued_notifications(pause=0), {"sent": 3, "failed": 0})
+        self.assertEqual(send_queued_notifications(pause=0), {"sent": 0, "failed": 0})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(self.statuses(), ["sent"] * 3)
+
+    def test_rows_claimed_elsewhere_are_skipped(self):
+        first = ApplicationNotification.objects.order_by("pk").first()
+        ApplicationNotification.objects.filter(pk=first.pk).update(status="sending", claimed_at=timezone.now())
+        self.assertEqual(send_queued_notifications(pause=0), {"sent": 2, "failed": 0})
+        self.assertNotIn(first.email, [message.to[0] for message in mail.outbox])
+
+    def test_crash_does_not_resend(self):
+        send = mail.backends.locmem.EmailBackend.send_messages
+        calls = []
+
+        def crash_on_second(backend, messages):
+            calls.append(messages)
+            if len(calls) == 2:
+                raise _Crash()
+            return send(backend, messages)
+
+        with mock.patch.object(mail.backends.locmem.EmailBackend, "send_messages", crash_on_second):
+            with self.assertRaises(_Crash):
+                send_queued_notifications(pause=0)
+        self.assertEqual(self.statuses(), ["sent", "sending", "queued"])
+
+        with override_settings(APPLICATION_NOTIFICATION_CLAIM_TIMEOUT=-1):
+            self.assertEqual(send_queued_notifications(pause=0), {"sent": 1, "failed": 0})
+        self.assertEqual(self.statuses(), ["sent", "failed", "sent"])
+        self.assertEqual([message.to[0] for message in mail.outbox], ["a0@example.com", "a2@example.com"])
+
+    def test_background_thread_closes_its_connection(self):
+        with mock.patch("apps.serviceapp.notifications.threading.Thread") as thread, \
+                mock.patch("apps.serviceapp.notifications.connections.close_all") as close_all:
+            send_queued_notifications_async()
+            thread.call_args.kwargs["target"]()
+        close_all.assert_called_once()
+        self.assertEqual(self.statuses(), ["sent"] * 3)
+
+
+class MetricsAccessTests(TestCase):
+    def test_disabled_without_token(self):
+        with override_settings(METRICS_TOKEN=""):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_requires_token_even_from_loopback(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="127.0.0.1").status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR="127.0.0.1").status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+
+
+class AutofillTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("staff", password="x", is_staff=True)
+        cls.request = QuoteRequest.objects.create(name="Jo", email="jo@example.com", city="Perth")
+
+    def setUp(self):
+        caches["shared"].clear()
+        self.url = reverse("get_quote_request", args=[self.request.pk])
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_login(User.objects.create_user("visitor", password="x"))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(reverse("get_quote_requests"), {"ids": self.request.pk}).status_code, 403)
+
+    def test_etag_revalidation(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["city"], "Perth")
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_saving_clears_the_shared_entry(self):
+        self.client.force_login(self.staff)
+        etag = self.client.get(self.url)["ETag"]
+        self.assertIsNotNone(caches["shared"].get(autofill_cache_key(self.request.pk)))
+
+        self.request.city = "Fremantle"
+        self.request.save()
+        self.assertIsNone(caches["shared"].get(autofill_cache_key(self.request.pk)))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["city"], "Fremantle")
+
+    def test_service_changes_clear_the_entry(self):
+        self.client.force_login(self.staff)
+        self.client.get(self.url)
+        self.request.service.add(Service.objects.create(name="Mowing"))
+        self.assertEqual([s["name"] for s in self.client.get(self.url).json()["services"]], ["Mowing"])
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        caches["shared"].clear()
+
+    def test_client_ip_takes_hop_added_by_trusted_proxy(self):
+        request = RequestFactory().get("/", REMOTE_ADDR="127.0.0.1", HTTP_X_FORWARDED_FOR="6.6.6.6, 203.0.113.5")
+        with override_settings(RATELIMIT_TRUSTED_PROXIES=0):
+            self.assertEqual(client_ip(request), "127.0.0.1")
+        with override_settings(RATELIMIT_TRUSTED_PROXIES=1):
+            self.assertEqual(client_ip(request), "203.0.113.5")
+        with override_settings(RATELIMIT_TRUSTED_PROXIES=2):
+            self.assertEqual(client_ip(request), "6.6.6.6")
+        with override_settings(RATELIMIT_TRUSTED_PROXIES=3):
+            self.assertEqual(client_ip(request), "127.0.0.1")
+
+    def test_rejected_email_does_not_spend_ip_token(self):
+        self.assertEqual(take_tokens(["email"], 1, 3600), (True, 0))
+        allowed, _ = take_tokens(["ip", "email"], 1, 3600)
+        self.assertFalse(allowed)
+        self.assertEqual(take_tokens(["ip"], 1, 3600), (True, 0))
+
+    @override_settings(RATELIMIT_RULES={"busy": (100, 3600)}, RATELIMIT_MAX_CONCURRENT=2)
+    def test_in_flight_cap_with_overlapping_requests(self):
+        factory = RequestFactory()
+        statuses = []
+
+        @rate_limited("busy", expensive=True)
+        def view(request, depth):
+            # Each level is still running while the next request arrives
+            if depth:
+                statuses.append(view(factory.post("/", REMOTE_ADDR=f"10.0.0.{depth}"), depth - 1).status_code)
+            statuses.append(ratelimit_stats()["in_flight"])
+            return HttpResponse()
+
+        view(factory.post("/", REMOTE_ADDR="10.0.0.9"), 2)
+        # The third request found both slots taken; the second freed its slot when it finished
+        self.assertEqual(statuses, [429, 2, 200, 1])
+        self.assertEqual(ratelimit_stats()["in_flight"], 0)
+        self.assertEqual(view(factory.post("/", REMOTE_ADDR="10.0.0.9"), 0).status_code, 200)
+
+    @override_settings(RATELIMIT_RULES={"busy": (100, 3600)}, RATELIMIT_MAX_CONCURRENT=1)
+    def test_slot_released_when_view_fails(self):
+        @rate_limited("busy", expensive=True)
+        def view(request):
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            view(RequestFactory().post("/"))
+        self.assertEqual(ratelimit_stats()["in_flight"], 0)
+
+    def test_locmem_cache_is_refused(self):
+        self.assertEqual(ratelimit_cache_check(None), [])
+        with override_settings(RATELIMIT_CACHE="default"):
+            self.assertEqual([error.id for error in ratelimit_cache_check(None)], ["serviceapp.E001"])
+        with override_settings(RATELIMIT_CACHE="default", RATELIMIT_ENABLED=False):
+            self.assertEqual(ratelimit_cache_check(None), [])
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.request = QuoteRequest.objects.create(name="Priya Sharma", email="priya@example.com", city="Sydney")
+        cls.quote = Quote.objects.create(quote_request=cls.request, mail_sent=True)
+        cls.vacancy = Vacancy.objects.create(title="Gardener")
+        cls.application = Application.objects.create(vacancy=cls.vacancy, name="Tom", email="tom@example.com")
+
+    def test_backfill_indexes_existing_rows(self):
+        SearchDocument.objects.all().delete()
+        migration = importlib.import_module("apps.serviceapp.migrations.0019_backfill_search_index")
+        migration.backfill(apps, None)
+        self.assertEqual(search_ids(QuoteRequest, "priya"), [self.request.pk])
+        self.assertEqual(search_ids(Quote, "priya"), [self.quote.pk])
+        self.assertEqual(search_ids(Application, "gardener"), [self.application.pk])
+
+    def test_saving_quote_request_reindexes_its_quotes(self):
+        self.request.name = "Priya Patel"
+        self.request.save()
+        self.assertEqual(search_ids(Quote, "patel"), [self.quote.pk])
+        self.assertEqual(search_ids(Quote, "sharma"), [])
+
+    def test_saving_vacancy_reindexes_its_applications(self):
+        self.vacancy.title = "Window cleaner"
+        self.vacancy.save()
+        self.assertEqual(search_ids(Application, "window"), [self.application.pk])
+        self.assertEqual(search_ids(Application, "gardener"), [])
+
+    @override_settings(ADMIN_SEARCH_RESULT_LIMIT=2)
+    def test_changelist_says_when_results_are_cut(self):
+        for n in range(3):
+            QuoteRequest.objects.create(name=f"Priya {n}", email=f"p{n}@example.com")
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        response = self.client.get(reverse("admin:serviceapp_quoterequest_changelist"), {"q": "priya"})
+        self.assertContains(response, "Showing the best 2 matches only")
+
+
+class BankStatementTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        request = QuoteRequest.objects.create(name="Jo Smith", email="jo@example.com")
+        quote = Quote.objects.create(quote_request=request, reference="SMITH42", mail_sent=True)
+        QuoteItem.objects.create(quote=quote, service=Service.objects.create(name="Mowing"), quantity=1, rate=Decimal("100.00"))
+        # bulk_create skips the signals that would render and email the invoice
+        [cls.invoice] = Invoice.objects.bulk_create([Invoice(quote=quote, invoice_id="fwz-inv-0000042")])
+
+    def line(self, text, amount="110.00", number=2):
+        return StatementLine(number, timezone.localdate(), Decimal(amount), text)
+
+    def test_parse_statement(self):
+        csv_file = io.BytesIO(
+            b"\xef\xbb\xbfDate,Description,Credit Amount\n"
+            b"2026-03-01,DEPOSIT SMITH42,\"$1,100.50\"\n"
+            b"2026-03-02,CARD PURCHASE,-20.00\n"
+            b"2026-03-03,PENDING,\n"
+        )
+        lines = parse_statement(csv_file)
+        self.assertEqual(lines, [StatementLine(2, date(2026, 3, 1), Decimal("1100.50"), "DEPOSIT SMITH42")])
+
+    def test_parse_statement_needs_amount_and_reference(self):
+        with self.assertRaises(StatementError):
+            parse_statement(io.StringIO("Date,Description\n2026-03-01,x\n"))
+        with self.assertRaises(StatementError):
+            parse_statement(io.StringIO("Date,Amount\n2026-03-01,10\n"))
+
+    def test_matches_reference_in_any_case(self):
+        result = reconcile([self.line("DEPOSIT smith42"), self.line("Transfer from Jo", number=3)])
+        self.assertEqual([match.invoice_id for match in result.matches], [self.invoice.invoice_id])
+        self.assertEqual([line.line for line in result.unmatched], [3])
+        invoice = Invoice.objects.get(pk=self.invoice.pk)
+        self.assertEqual((invoice.pay, invoice.due, invoice.is_paid), (Decimal("110.00"), Decimal("0.00"), True))
+
+    def test_matches_invoice_number_in_any_case(self):
+        result = reconcile([self.line(f"PAYMENT {self.invoice.invoice_id.upper()}", amount="50.00")])
+        self.assertEqual(len(result.matches), 1)
+        self.assertEqual(Invoice.objects.get(pk=self.invoice.pk).due, Decimal("60.00"))
+
+    def test_importing_twice_records_once(self):
+        reconcile([self.line("SMITH42", amount="40.00")])
+        result = reconcile([self.line("SMITH42", amount="40.00")])
+        self.assertEqual((len(result.matches), len(result.duplicates)), (0, 1))
+        self.assertEqual(Payment.objects.filter(invoice=self.invoice).count(), 1)
+
+    def test_preview_records_nothing(self):
+        result = reconcile([self.line("SMITH42")], apply=False)
+        self.assertEqual(len(result.matches), 1)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_preview_is_taken_once(self):
+        lines = [self.line("SMITH42")]
+        token = store_preview(lines)
+        self.assertEqual(take_preview(token), lines)
+        self.assertIsNone(take_preview(token))
+
+
+class DocumentNumberingTests(TestCase):
+    def setUp(self):
+        discard_block("quote")
+        self.addCleanup(discard_block, "quote")
+
+    @override_settings(DOCUMENT_NUMBER_BLOCK_SIZE=5)
+    def test_numbers_come_from_reserved_blocks(self):
+        numbers = [next_number("quote") for _ in range(7)]
+        self.assertEqual(numbers, list(range(numbers[0], numbers[0] + 7)))
+        self.assertEqual(DocumentSequence.objects.get(name="quote").next_value, numbers[0] + 10)
+
+    def test_new_numbers_never_match_legacy_ids(self):
+        legacy = Quote.objects.create(quote_id="fwz-000001", mail_sent=True)
+        quotes = [Quote.objects.create(mail_sent=True) for _ in range(3)]
+        ids = [quote.quote_id for quote in quotes]
+        self.assertEqual(ids, ["fwz-0000001", "fwz-0000002", "fwz-0000003"])
+        self.assertNotIn(legacy.quote_id, ids)
+
+    def test_collision_retries_with_a_fresh_block(self):
+        first = Quote.objects.create(mail_sent=True)
+        # A reservation lost to a rollback hands the same numbers out again
+        DocumentSequence.objects.filter(name="quote").update(next_value=1)
+        discard_block("quote")
+
+        second = Quote.objects.create(mail_sent=True)
+        self.assertNotEqual(second.quote_id, first.quote_id)
+        self.assertEqual(Quote.objects.filter(quote_id=second.quote_id).count(), 1)
+
+    def test_other_integrity_errors_are_not_retried(self):
+        quote = Quote.objects.create(mail_sent=True)
+        with self.assertRaises(IntegrityError):
+            save_numbered(quote, "quote_id", "quote", mock.Mock(side_effect=IntegrityError))
+
+
+class RenumberDuplicatesMigrationTests(TransactionTestCase):
+    """0006 renumbers legacy duplicate and blank ids before 0007 makes them unique."""
+
+    before = [("serviceapp", "0005_expiry_indexes")]
+    after = [("serviceapp", "0006_documentsequence")]
+
+    def migrate(self, targets=None):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets or executor.loader.graph.leaf_nodes())
+        return executor.loader.project_state(targets).apps if targets else None
+
+    def setUp(self):
+        discard_block("quote")
+        self.addCleanup(discard_block, "quote")
+        self.addCleanup(self.migrate)
+        old_apps = self.migrate(self.before)
+        LegacyQuote = old_apps.get_model("serviceapp", "Quote")
+        self.kept = LegacyQuote.objects.create(quote_id="fwz-1a2b3c", quotation_file="serviceapp/quotes/a.pdf")
+        self.clash = LegacyQuote.objects.create(quote_id="fwz-1a2b3c", quotation_file="serviceapp/quotes/a.pdf")
+        self.blank = LegacyQuote.objects.create(quote_id="")
+        self.unique = LegacyQuote.objects.create(quote_id="fwz-4d5e6f")
+
+    def test_duplicates_and_blanks_are_renumbered(self):
+        new_apps = self.migrate(self.after)
+        ids = dict(new_apps.get_model("serviceapp", "Quote").objects.values_list("pk", "quote_id"))
+        self.assertEqual(ids[self.kept.pk], "fwz-1a2b3c")
+        self.assertEqual(ids[self.unique.pk], "fwz-4d5e6f")
+        self.assertEqual({ids[self.clash.pk], ids[self.blank.pk]}, {"fwz-0000001", "fwz-0000002"})
+        self.assertEqual(new_apps.get_model("serviceapp", "DocumentSequence").objects.get(name="quote").next_value, 3)
+
+        clash = new_apps.get_model("serviceapp", "Quote").objects.get(pk=self.clash.pk)
+        self.assertFalse(clash.quotation_file)
+
+        # Numbers handed out afterwards continue past the renumbered rows
+        self.migrate()
+        quote = Quote.objects.create(mail_sent=True)
+        self.assertEqual(quote.quote_id, "fwz-0000003")
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        start = timezone.now() - timedelta(days=1)
+        for n in range(25):
+            request = QuoteRequest.objects.create(name=f"Customer {n}", email=f"c{n}@example.com")
+            # Pairs share a timestamp so the pk tie-break matters
+            QuoteRequest.objects.filter(pk=request.pk).update(created_at=start + timedelta(minutes=n // 2))
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def paginate(self, *ordering):
+        return KeysetPaginator(QuoteRequest.objects.order_by(*ordering), 10)
+
+    def assertMatchesOffsetPages(self, *ordering):
+        expected = Paginator(QuoteRequest.objects.order_by(*ordering), 10)
+        for number in (1, 2, 3):
+            page = self.paginate(*ordering).page(number)
+            self.assertEqual(list(page.object_list), list(expected.page(number).object_list))
+
+    def test_ordering_spelled_with_id_seeks(self):
+        self.assertEqual(self.paginate("-created_at", "-id")._seek_lookup, "lt")
+        self.assertEqual(self.paginate("created_at", "id", "pk")._seek_lookup, "gt")
+        self.assertIsNone(self.paginate("name")._seek_lookup)
+
+    def test_next_page_seeks_past_the_cached_boundary(self):
+        self.paginate("-created_at", "-pk").page(1)
+        with CaptureQueriesContext(connection) as queries:
+            list(self.paginate("-created_at", "-pk").page(2).object_list)
+        [sql] = [q["sql"] for q in queries if "serviceapp_quoterequest" in q["sql"]]
+        self.assertNotIn("OFFSET", sql)
+        self.assertIn('"created_at" <', sql)
+
+    def test_pages_match_offset_pagination(self):
+        self.assertMatchesOffsetPages("-created_at", "-pk")
+
+    def test_reverse_ordering(self):
+        self.assertMatchesOffsetPages("created_at", "pk")
+
+    def test_page_without_a_boundary_uses_offset(self):
+        with CaptureQueriesContext(connection) as queries:
+            list(self.paginate("-created_at", "-pk").page(3).object_list)
+        self.assertIn("OFFSET", queries[-1]["sql"])
+
+    @override_settings(PAGINATOR_ESTIMATE_THRESHOLD=100)
+    def test_estimated_and_filtered_counts(self):
+        with mock.patch("apps.serviceapp.pagination.estimated_table_count", return_value=5000):
+            self.assertEqual(self.paginate("-created_at", "-pk").count, 5000)
+            filtered = KeysetPaginator(QuoteRequest.objects.filter(name__startswith="Customer 1").order_by("-pk"), 10)
+            self.assertEqual(filtered.count, 11)
+        with mock.patch("apps.serviceapp.pagination.estimated_table_count", return_value=50):
+            self.assertEqual(self.paginate("-created_at", "-pk").count, 25)
+
+
+class TabularExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.request = QuoteRequest.objects.create(
+            name='=HYPERLINK("http://evil.example","x")', email="eve@example.com", phone="+61 400 000 000",
+            city="@Sydney", address="-1 Street",
+        )
+        QuoteRequest.objects.filter(pk=cls.request.pk).update(
+            created_at=timezone.make_aware(datetime(2026, 3, 1, 12, 0))
+        )
+
+    def test_csv_formulas_are_neutralised(self):
+        [header, row] = list(export_rows(QuoteRequest.objects.all()))
+        self.assertEqual(dict(zip(header, row))["Phone"], "+61 400 000 000")
+
+        lines = "".join(csv_stream(export_rows(QuoteRequest.objects.all()))).splitlines()
+        values = dict(zip(lines[0].split(","), next(csv.reader(lines[1:]))))
+        self.assertEqual(values["Name"], '\'=HYPERLINK("http://evil.example","x")')
+        self.assertEqual(values["Phone"], "'+61 400 000 000")
+        self.assertEqual(values["City"], "'@Sydney")
+        self.assertEqual(values["Address"], "'-1 Street")
+        self.assertEqual(values["Email"], "eve@example.com")
+
+    def test_xlsx_text_is_unchanged(self):
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(xlsx_stream(export_rows(QuoteRequest.objects.all())))))
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode()
+        cells = re.findall(r'<t xml:space="preserve">([^<]*)</t>', sheet)
+        self.assertIn("+61 400 000 000", cells)
+        self.assertIn("-1 Street", cells)
+        self.assertIn("@Sydney", cells)
+        self.assertIn('=HYPERLINK("http://evil.example","x")', cells)
+        self.assertNotIn("'", "".join(cells))
+
+    def test_xlsx_dates_are_date_cells(self):
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(xlsx_stream(export_rows(QuoteRequest.objects.all())))))
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode()
+        self.assertIn('<c s="2"><v>46082.5</v></c>', sheet)
+        self.assertIn("xl/styles.xml", archive.namelist())
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.old = timezone.now() - timedelta(days=400)
+        cls.services = [Service.objects.create(name="Mowing"), Service.objects.create(name="Weeding")]
+        cls.request = QuoteRequest.objects.create(name="Old", email="old@example.com", status="cancelled")
+        cls.request.service.set(cls.services)
+        cls.quoted = QuoteRequest.objects.create(name="Quoted", email="quoted@example.com", status="completed")
+        Quote.objects.create(quote_request=cls.quoted, mail_sent=True)
+        cls.vacancy = Vacancy.objects.create(title="Gardener")
+        cls.application = Application.objects.create(vacancy=cls.vacancy, name="Tom", email="tom@example.com")
+        QuoteRequest.objects.update(created_at=cls.old)
+        Application.objects.update(applied_at=cls.old)
+
+    def test_quote_request_round_trip(self):
+        self.assertEqual(archive(SPECS["quote_requests"]), 1)
+        self.assertEqual(list(QuoteRequest.objects.values_list("name", flat=True)), ["Quoted"])
+
+        self.assertEqual(restore(SPECS["quote_requests"], ArchivedQuoteRequest.objects.all()), (1, 0))
+        restored = QuoteRequest.objects.get(pk=self.request.pk)
+        self.assertEqual(restored.created_at, self.old)
+        self.assertEqual(set(restored.service.all()), set(self.services))
+        self.assertFalse(ArchivedQuoteRequest.objects.exists())
+
+    def test_quoted_requests_stay(self):
+        self.assertFalse(SPECS["quote_requests"].eligible(timezone.now()).filter(pk=self.quoted.pk).exists())
+
+    def test_application_round_trip(self):
+        self.assertEqual(archive(SPECS["applications"]), 1)
+        self.assertEqual(restore(SPECS["applications"], ArchivedApplication.objects.all()), (1, 0))
+        self.assertEqual(Application.objects.get(pk=self.application.pk).vacancy, self.vacancy)
+
+    def test_application_without_vacancy_is_skipped(self):
+        archive(SPECS["applications"])
+        self.vacancy.delete()
+        self.assertEqual(restore(SPECS["applications"], ArchivedApplication.objects.all()), (0, 1))
+        self.assertEqual(ArchivedApplication.objects.count(), 1)
+
+
+class ServerTimingTests(TestCase):
+    def test_header_for_staff_only(self):
+        url = reverse("about")
+        self.assertNotIn("Server-Timing", self.client.get(url))
+        self.client.force_login(User.objects.create_user("staff", "staff@example.com", "pw", is_staff=True))
+        self.assertIn("db;dur=", self.client.get(url)["Server-Timing"])
+
+    def test_public_header_setting(self):
+        with override_settings(SERVER_TIMING_PUBLIC=True):
+            self.assertIn("total;dur=", self.client.get(reverse("about"))["Server-Timing"])
+
+
+class InvoiceBalanceTests(TestCase):
+    """``Invoice.pay``/``due``/``is_paid`` follow the payment ledger and the quote's items (total $110 inc. GST)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        request = QuoteRequest.objects.create(name="Jo", email="jo@example.com")
+        cls.quote = Quote.objects.create(quote_request=request, mail_sent=True)
+        cls.item = QuoteItem.objects.create(
+            quote=cls.quote, service=Service.objects.create(name="Mowing"), quantity=1, rate=Decimal("100.00"),
+        )
+        [cls.invoice] = Invoice.objects.bulk_create([Invoice(quote=cls.quote, invoice_id="fwz-inv-0000007")])
+        Invoice.objects.filter(pk=cls.invoice.pk).update_balances()
+
+    def pay(self, amount):
+        return Payment.objects.create(invoice=self.invoice, amount=Decimal(amount))
+
+    def balance(self):
+        invoice = Invoice.objects.get(pk=self.invoice.pk)
+        return invoice.pay, invoice.due, invoice.is_paid
+
+    def test_unpaid(self):
+        self.assertEqual(self.balance(), (Decimal("0.00"), Decimal("110.00"), False))
+
+    def test_partial_payment(self):
+        self.pay("50.00")
+        self.assertEqual(self.balance(), (Decimal("50.00"), Decimal("60.00"), False))
+        invoice = Invoice.objects.with_balance().get(pk=self.invoice.pk)
+        self.assertEqual(
+            (invoice.paid_total, invoice.amount_due, invoice.balance),
+            (Decimal("50.00"), Decimal("110.00"), Decimal("60.00")),
+        )
+
+    def test_payments_covering_the_total_mark_paid(self):
+        self.pay("60.00")
+        self.pay("50.00")
+        self.assertEqual(self.balance(), (Decimal("110.00"), Decimal("0.00"), True))
+
+    def test_overpayment(self):
+        self.pay("150.00")
+        self.assertEqual(self.balance(), (Decimal("150.00"), Decimal("-40.00"), True))
+
+    def test_manually_paid_stays_paid(self):
+        Invoice.objects.filter(pk=self.invoice.pk).update(is_paid=True)
+        payment = self.pay("10.00")
+        self.assertEqual(self.balance(), (Decimal("10.00"), Decimal("100.00"), True))
+        payment.delete()
+        self.assertEqual(self.balance(), (Decimal("0.00"), Decimal("110.00"), True))
+
+    def test_deleting_a_payment(self):
+        self.pay("50.00")
+        second = self.pay("20.00")
+        second.delete()
+        self.assertEqual(self.balance(), (Decimal("50.00"), Decimal("60.00"), False))
+
+    def test_changing_items_updates_due(self):
+        self.pay("50.00")
+        self.item.rate = Decimal("200.00")
+        self.item.save()
+        self.assertEqual(self.balance(), (Decimal("50.00"), Decimal("170.00"), False))
+
+
+class SweepExpiredTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.past = self.today - timedelta(days=1)
+
+    def quote(self, request, expiry_date, status="replied"):
+        return Quote.objects.create(quote_request=request, status=status, expiry_date=expiry_date, mail_sent=True)
+
+    def request(self, name):
+        return QuoteRequest.objects.create(name=name, email=f"{name.lower()}@example.com")
+
+    def sweep(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("sweep_expired", stdout=io.StringIO())
+
+    def status(self, obj):
+        obj.refresh_from_db()
+        return obj.status
+
+    def test_request_lapses_when_all_its_quotes_expire(self):
+        single, both = self.request("Single"), self.request("Both")
+        lapsed = self.quote(single, self.past)
+        self.quote(both, self.past)
+        self.quote(both, self.past - timedelta(days=3))
+        self.sweep()
+        self.assertEqual((self.status(single), self.status(both), self.status(lapsed)), ("expired", "expired", "expired"))
+
+    def test_request_with_a_live_quote_stays_open(self):
+        waiting, accepted = self.request("Waiting"), self.request("Accepted")
+        lapsed = self.quote(waiting, self.past)
+        open_quote = self.quote(waiting, self.today + timedelta(days=7))
+        self.quote(accepted, self.past)
+        self.quote(accepted, self.past, status="approved")
+        self.sweep()
+        self.assertEqual(self.status(lapsed), "expired")
+        self.assertEqual(self.status(open_quote), "replied")
+        self.assertEqual((self.status(waiting), self.status(accepted)), ("replied", "replied"))
+
+    def test_request_whose_other_quote_was_rejected_lapses(self):
+        request = self.request("Rejected")
+        self.quote(request, None, status="rejected")
+        self.quote(request, self.past)
+        request.status = "replied"
+        request.save()
+        self.sweep()
+        self.assertEqual(self.status(request), "expired")
+
+    def test_vacancies(self):
+        # Saved while still current; its date has passed since
+        lapsed = Vacancy.objects.create(title="Lapsed", expired_at=self.today)
+        Vacancy.objects.filter(pk=lapsed.pk).update(expired_at=self.past)
+        current = Vacancy.objects.create(title="Current", expired_at=self.today)
+        undated = Vacancy.objects.create(title="Undated")
+        self.assertEqual(set(Vacancy.objects.open()), {current, undated})
+        self.assertEqual(list(Vacancy.objects.expired()), [lapsed])
+
+        self.sweep()
+        lapsed.refresh_from_db()
+        self.assertFalse(lapsed.is_active)
+        self.assertEqual(set(Vacancy.objects.open()), {current, undated})
+        self.assertFalse(Vacancy.objects.expired().exists())
+
+
+class DailySummaryTests(TestCase):
+    """Rows kept up to date by signals and the expiry sweep match a full ``rebuild()``."""
+
+    def snapshot(self):
+        return list(DailySummary.objects.order_by("date", "status").values("date", "status", *SUMMARY_FIELDS))
+
+    def make_quote(self, days_ago, **fields):
+        created = timezone.now() - timedelta(days=days_ago)
+        with mock.patch("django.utils.timezone.now", return_value=created):
+            request = QuoteRequest.objects.create(name="Jo", email="jo@example.com")
+            return Quote.objects.create(quote_request=request, mail_sent=True, **fields)
+
+    def test_incremental_maintenance_matches_rebuild(self):
+        service = Service.objects.create(name="Mowing")
+        yesterday = timezone.localdate() - timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            lapsing = self.make_quote(3, status="replied", expiry_date=yesterday)
+            QuoteItem.objects.create(quote=lapsing, service=service, quantity=2, rate=Decimal("40.00"))
+            self.make_quote(3, status="pending", expiry_date=yesterday + timedelta(days=7))
+            paid = self.make_quote(1, status="replied")
+            QuoteItem.objects.create(quote=paid, service=service, quantity=1, rate=Decimal("100.00"))
+            [invoice] = Invoice.objects.bulk_create([Invoice(quote=paid, invoice_id="fwz-inv-0000009")])
+            Payment.objects.create(invoice=invoice, amount=Decimal("30.00"))
+            paid.status = "rejected"
+            paid.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("sweep_expired", stdout=io.StringIO())
+
+        incremental = self.snapshot()
+        self.assertIn("expired", {row["status"] for row in incremental})
+        rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_rolled_back_days_are_refreshed_later(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.make_quote(2)
+                raise RuntimeError
+            self.make_quote(0)
+        incremental = self.snapshot()
+        rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+
+def build_dataset(quote_requests=200):
+    """A site with a realistic amount of content plus ``dataset.generate()`` requests, quotes and invoices.
+
+    Rows go in with bulk_create, so no signal handlers render documents or send mail.
+    """
+    today = timezone.localdate()
+    company = MyCompany.objects.create(name="Fawz", slug="fawz", email="office@example.com", bsb="062-000")
+    services = Service.objects.bulk_create(
+        Service(name=f"Service {n}", slug=f"service-{n}", is_popular=n < 4) for n in range(12)
+    )
+    FAQ.objects.bulk_create(
+        FAQ(service=services[n % len(services)], question=f"Question {n}?", is_general=n % 2 == 0) for n in range(30)
+    )
+    Review.objects.bulk_create(Review(name=f"Reviewer {n}", message="Great job", rating=5) for n in range(20))
+    Pricing.objects.bulk_create(Pricing(title=f"Plan {n}", price="from $99", features="A\nB\nC", order=n) for n in range(4))
+    ServiceLocation.objects.bulk_create(ServiceLocation(name=f"Suburb {n}") for n in range(15))
+    Vacancy.objects.bulk_create(
+        Vacancy(title=f"Cleaner {n}", slug=f"cleaner-{n}", expired_at=today + timedelta(days=30)) for n in range(8)
+    )
+    dataset.generate(quote_requests=quote_requests, quote_ratio=1, contacts=150, applications=120, days=60, seed=1)
+    quotes = list(Quote.objects.order_by("pk"))
+    invoices = list(Invoice.objects.order_by("pk"))
+    return company, quotes, invoices, list(QuoteItem.objects.order_by("pk"))
+
+
+class DatasetTests(TestCase):
+    def test_delete_removes_generated_rows_and_placeholders(self):
+        real = QuoteRequest.objects.create(name="Jo", email="jo@example.com")
+        counts = dataset.generate(quote_requests=20, contacts=5, applications=5, seed=1)
+        self.assertEqual(counts["quote_requests"], 20)
+        self.assertEqual(Service.objects.filter(slug__startswith=dataset.SERVICE_SLUG).count(), 8)
+        self.assertEqual(Vacancy.objects.filter(slug__startswith=dataset.VACANCY_SLUG).count(), 3)
+
+        deleted = dataset.delete()
+        self.assertEqual(deleted["serviceapp.QuoteRequest"], 20)
+        self.assertEqual((deleted["serviceapp.Service"], deleted["serviceapp.Vacancy"]), (8, 3))
+        self.assertFalse(Service.objects.exists())
+        self.assertFalse(Vacancy.objects.exists())
+        self.assertEqual(list(QuoteRequest.objects.all()), [real])
+
+    def test_placeholders_in_real_use_are_kept(self):
+        dataset.generate(quote_requests=5, contacts=0, applications=0, seed=1)
+        service = Service.objects.get(slug=f"{dataset.SERVICE_SLUG}0")
+        vacancy = Vacancy.objects.get(slug=f"{dataset.VACANCY_SLUG}0")
+        QuoteRequest.objects.create(name="Jo", email="jo@example.com").service.add(service)
+        Application.objects.create(vacancy=vacancy, name="Tom", email="tom@example.com")
+
+        dataset.delete()
+        self.assertEqual(list(Service.objects.all()), [service])
+        self.assertEqual(list(Vacancy.objects.all()), [vacancy])
+
+
+class _RenderTimer:
+    """Adds up the time spent in Django template rendering while active.
+
+    Widgets and other templates rendered from inside a template count once, as
+    part of the outer render.
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.depth = 0
+
+    def __enter__(self):
+        original = DjangoTemplate.render
+
+        def render(template, *args, **kwargs):
+            self.depth += 1
+            started = time.perf_counter()
+            try:
+                return original(template, *args, **kwargs)
+            finally:
+                self.depth -= 1
+                if not self.depth:
+                    self.seconds += time.perf_counter() - started
+
+        self._patch = mock.patch.object(DjangoTemplate, "render", render)
+        self._patch.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._patch.stop()
+
+
+# Queries each page may run against build_dataset(); raise a budget only when
+# the page really needs another query, never to let an N+1 through
+PUBLIC_BUDGETS = {
+    "home": 8,
+    "about": 3,
+    "services": 2,
+    "service_detail": 3,
+    "contact": 3,
+    "career": 3,
+    "privacy_policy": 3,
+    "terms_conditions": 3,
+}
+
+# Changelists by model name. Every serviceapp model registered with the admin
+# must have an entry; 5 is the floor (session, user, count, rows, filters)
+ADMIN_BUDGETS = {
+    "application": 6,
+    "applicationnotification": 5,
+    "archivedapplication": 5,
+    "archivedcontact": 5,
+    "archivedquoterequest": 5,
+    "blog": 5,
+    "contact": 5,
+    "dailysummary": 7,
+    "documentaccess": 7,
+    "emailmessagetemplate": 5,
+    "faq": 5,
+    "herosection": 5,
+    "imagegallery": 5,
+    "invoice": 5,
+    "mycompany": 5,
+    "pagecontent": 5,
+    "payment": 7,
+    "pricing": 5,
+    "quote": 5,
+    "quoteitem": 5,
+    "quoterequest": 5,
+    "requestprofile": 9,
+    "review": 6,
+    "service": 5,
+    "servicelocation": 5,
+    "team": 5,
+    "vacancy": 5,
+}
+
+DASHBOARD_BUDGET = 9
+
+# The admin PDF views: session and user, then the document and its items
+PDF_BUDGETS = {
+    "quote": 4,
+    "invoice": 4,
+}
+
+# Per page, generous enough for a slow CI machine; a template that loops over a
+# whole table blows straight through it
+TEMPLATE_BUDGET_MS = 1000
+
+
+class QueryBudgetTests(TestCase):
+    """Every public page, admin changelist and PDF stays within its query and template time budget."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company, cls.quotes, cls.invoices, _ = build_dataset()
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+
+    def setUp(self):
+        pdf_cache.clear()
+
+    def assertWithinBudget(self, label, budget, request):
+        """Run ``request()`` and fail if it runs more than ``budget`` queries or renders too slowly."""
+        with CaptureQueriesContext(connection) as queries, _RenderTimer() as timer:
+            response = request()
+        self.assertLess(response.status_code, 400, f"{label} returned {response.status_code}")
+        if len(queries) > budget:
+            statements = "\n".join(f"  {n}. {query['sql']}" for n, query in enumerate(queries.captured_queries, 1))
+            self.fail(f"{label} ran {len(queries)} queries, budget is {budget}:\n{statements}")
+        self.assertLessEqual(
+            timer.seconds * 1000, TEMPLATE_BUDGET_MS,
+            f"{label} spent {timer.seconds * 1000:.0f} ms rendering templates, budget is {TEMPLATE_BUDGET_MS} ms",
+        )
+        return response
+
+    def test_public_pages(self):
+        kwargs = {"service_detail": {"slug": "service-3"}}
+        for name, budget in PUBLIC_BUDGETS.items():
+            with self.subTest(page=name):
+                url = reverse(name, kwargs=kwargs.get(name))
+                self.assertWithinBudget(name, budget, lambda: self.client.get(url))
+
+    def test_admin_dashboard(self):
+        self.client.force_login(self.admin)
+        self.assertWithinBudget("dashboard", DASHBOARD_BUDGET, lambda: self.client.get(reverse("admin:index")))
+
+    def test_every_changelist_has_a_budget(self):
+        registered = {model._meta.model_name for model in admin.site._registry if model._meta.app_label == "serviceapp"}
+        self.assertEqual(registered, set(ADMIN_BUDGETS), "add the new admin's changelist to ADMIN_BUDGETS")
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.admin)
+        for name, budget in ADMIN_BUDGETS.items():
+            with self.subTest(model=name):
+                url = reverse(f"admin:serviceapp_{name}_changelist")
+                self.assertWithinBudget(f"{name} changelist", budget, lambda: self.client.get(url))
+
+    def test_pdfs(self):
+        self.client.force_login(self.admin)
+        for kind, obj in (("quote", self.quotes[0]), ("invoice", self.invoices[0])):
+            with self.subTest(document=kind):
+                url = reverse(f"admin:{kind}_pdf", args=[obj.pk])
+                self.assertWithinBudget(f"{kind} PDF", PDF_BUDGETS[kind], lambda: self.client.get(url))
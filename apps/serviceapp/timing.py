@@ -0,0 +1,178 @@
+"""Per-request phase timings, reported as a Server-Timing header and one log line.
+
+The header shows how long the database and PDF rendering took, which helps
+an attacker time their probes, so it only goes to staff unless
+SERVER_TIMING_PUBLIC is set (the benchmark does that). The log line is
+written for every request slower than SERVER_TIMING_LOG_THRESHOLD_MS.
+
+``ServerTimingMiddleware`` opens a collector for each request. Database
+queries are timed through ``connection.execute_wrapper``. Document
+templates, PDF rendering and SMTP sends are timed by wrapping them in
+``phase(...)``. Outside a request (management commands, worker threads)
+``phase`` is a no-op, so the hooks are safe everywhere.
+
+Phases can overlap: a query run while a template renders counts towards
+both ``db`` and ``template``.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend as SMTPBackend
+from django.db import connections
+
+from .metrics import EMAIL_FAILURES, EMAIL_SEND
+
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("serviceapp_timings", default=None)
+
+# Header order; anything else is appended in the order it was first seen
+PHASES = ("db", "template", "pdf", "smtp")
+
+
+class Timings:
+    __slots__ = ("started", "phases")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    def add(self, name, seconds):
+        entry = self.phases.get(name)
+        if entry is None:
+            self.phases[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def header(self, total):
+        names = [p for p in PHASES if p in self.phases] + [p for p in self.phases if p not in PHASES]
+        parts = [f'{name};dur={self.phases[name][0] * 1000:.1f};desc="{self.phases[name][1]}x"' for name in names]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def current():
+    """The collector for the request being handled on this thread, or None."""
+    return _current.get()
+
+
+@contextmanager
+def phase(name):
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def _time_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings = _current.get()
+        if timings is not None:
+            timings.add("db", time.perf_counter() - started)
+
+
+class ServerTimingMiddleware:
+    """Adds ``Server-Timing`` (db, template, pdf, smtp, total) for staff and logs slow requests as JSON."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "SERVER_TIMING", True)
+        self.public = getattr(settings, "SERVER_TIMING_PUBLIC", False)
+        self.log_threshold = getattr(settings, "SERVER_TIMING_LOG_THRESHOLD_MS", 500) / 1000
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        timings = Timings()
+        token = _current.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_time_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        total = timings.total
+        if self.public or _is_staff(request):
+            response["Server-Timing"] = timings.header(total)
+        if total >= self.log_threshold:
+            self.log(request, response, timings, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # Render here, inside the phase; the handler's own render() is then a no-op
+        with phase("template"):
+            return response.render()
+
+    def log(self, request, response, timings, total):
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 1),
+        }
+        for name, (seconds, count) in timings.phases.items():
+            record[f"{name}_ms"] = round(seconds * 1000, 1)
+            record[f"{name}_count"] = count
+        logger.info(json.dumps(record))
+
+
+def _is_staff(request):
+    user = getattr(request, "user", None)
+    return user is not None and user.is_authenticated and user.is_staff
+
+
+class TimedEmailBackend(SMTPBackend):
+    """SMTP backend whose sends show up as the ``smtp`` phase and in the email metrics.
+
+    Messages are labelled by their ``message_type`` attribute (a MESSAGE_TYPE
+    key set by the sender), or "other".
+    """
+
+    def send_messages(self, email_messages):
+        with phase("smtp"):
+            try:
+                return super().send_messages(email_messages)
+            except Exception:
+                # Failed to connect: count the messages that never reached _send
+                for message in email_messages:
+                    if not getattr(message, "_send_attempted", False):
+                        EMAIL_FAILURES.labels(_message_type(message)).inc()
+                raise
+
+    def _send(self, email_message):
+        email_message._send_attempted = True
+        message_type = _message_type(email_message)
+        started = time.perf_counter()
+        sent = False
+        try:
+            sent = super()._send(email_message)
+            return sent
+        finally:
+            EMAIL_SEND.labels(message_type).observe(time.perf_counter() - started)
+            if not sent:
+                EMAIL_FAILURES.labels(message_type).inc()
+
+
+def _message_type(message):
+    return getattr(message, "message_type", "other")
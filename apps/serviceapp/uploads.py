@@ -0,0 +1,174 @@
+import os
+import uuid
+import zipfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+from django.utils.text import get_valid_filename
+
+
+RESUME_UPLOAD_TO = "serviceapp/resumes"
+# Uploads wait here until the application is accepted; gc_media sweeps leftovers
+PENDING_UPLOAD_TO = os.path.join(RESUME_UPLOAD_TO, "pending")
+RESUME_FIELD = "resume"
+
+# Leading bytes of each accepted resume format
+SIGNATURES = {
+    "pdf": (b"%PDF-",),
+    "docx": (b"PK\x03\x04",),
+    "doc": (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",),
+    "rtf": (b"{\\rtf",),
+}
+SNIFF_BYTES = 8
+
+
+def max_resume_size():
+    return getattr(settings, "RESUME_MAX_UPLOAD_SIZE", 5 * 1024 * 1024)
+
+
+def allowed_resume_types():
+    return getattr(settings, "RESUME_ALLOWED_TYPES", ("pdf", "doc", "docx"))
+
+
+def sniff_type(head):
+    for kind, signatures in SIGNATURES.items():
+        if head.startswith(signatures):
+            return kind
+    return None
+
+
+def is_docx(fileobj):
+    """Whether ``fileobj`` is a Word document and not just any ZIP archive."""
+    try:
+        with zipfile.ZipFile(fileobj) as archive:
+            names = set(archive.namelist())
+    except (zipfile.BadZipFile, OSError):
+        return False
+    return {"[Content_Types].xml", "word/document.xml"} <= names
+
+
+class StoredUploadedFile(UploadedFile):
+    """An upload that has been written to a pending name in storage.
+
+    ``commit()`` moves it under ``RESUME_UPLOAD_TO`` once the application is
+    accepted; until then ``ResumeUploadHandler.discard_pending()`` removes it.
+    """
+
+    def __init__(self, name, storage_name, size, content_type, kind):
+        super().__init__(file=None, name=name, content_type=content_type, size=size)
+        self.storage_name = storage_name
+        self.kind = kind
+
+    def open(self, mode="rb"):
+        return default_storage.open(self.storage_name, mode)
+
+    def commit(self):
+        """Move the upload to its final name and return that name."""
+        name = os.path.join(RESUME_UPLOAD_TO, get_valid_filename(os.path.basename(self.name)))
+        pending = self.storage_name
+        with default_storage.open(pending, "rb") as source:
+            self.storage_name = default_storage.save(name, source)
+        default_storage.delete(pending)
+        return self.storage_name
+
+    def discard(self):
+        default_storage.delete(self.storage_name)
+
+
+class ResumeUploadHandler(FileUploadHandler):
+    """Stream an applicant's resume into ``serviceapp/resumes/pending``.
+
+    Chunks are written to storage as they arrive, so only one chunk is held in
+    memory and no temp file is involved. The upload is stopped without reading
+    the rest of the body as soon as it exceeds ``RESUME_MAX_UPLOAD_SIZE`` or its
+    first bytes don't match an allowed type. The reason is left on
+    ``request.upload_error`` for the form to report.
+
+    Parsing happens before the CSRF check and the vacancy lookup, so nothing
+    reaches its final name here: the view commits the file once the
+    application is saved and calls ``discard_pending()`` on every way out.
+    Only one file, in the ``resume`` field, is accepted.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.pending = []
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.content_length = content_length
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        if field_name != RESUME_FIELD or self.pending:
+            raise SkipFile()
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.storage_name = None
+        self.out = None
+        self.received = 0
+        self.head = b""
+        self.kind = None
+
+        # The whole request is bigger than any acceptable resume plus the form fields
+        if self.content_length and self.content_length > max_resume_size() + 64 * 1024:
+            self._abort("The resume is too large.")
+
+        name = os.path.join(PENDING_UPLOAD_TO, f"{uuid.uuid4().hex}.part")
+        self.storage_name = default_storage.save(name, ContentFile(b""))
+        self.pending.append(self.storage_name)
+        self.out = default_storage.open(self.storage_name, "wb")
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > max_resume_size():
+            self._abort("The resume is too large.")
+
+        if self.kind is None:
+            self.head += raw_data[:SNIFF_BYTES]
+            if len(self.head) >= SNIFF_BYTES:
+                self.kind = sniff_type(self.head)
+                if self.kind not in allowed_resume_types():
+                    self._abort("Please upload your resume as a PDF or Word document.")
+
+        self.out.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.out is None:
+            return None
+        self.out.close()
+        self.out = None
+
+        kind = self.kind or sniff_type(self.head)
+        if kind == "docx":
+            with default_storage.open(self.storage_name, "rb") as stored:
+                if not is_docx(stored):
+                    kind = None
+        if kind not in allowed_resume_types():
+            default_storage.delete(self.storage_name)
+            self.request.upload_error = "Please upload your resume as a PDF or Word document."
+            return None
+
+        return StoredUploadedFile(
+            name=self.file_name,
+            storage_name=self.storage_name,
+            size=file_size,
+            content_type=self.content_type,
+            kind=kind,
+        )
+
+    def _abort(self, error):
+        if self.out is not None:
+            self.out.close()
+            self.out = None
+        if self.storage_name:
+            default_storage.delete(self.storage_name)
+        self.request.upload_error = error
+        raise StopUpload(connection_reset=True)
+
+    def discard_pending(self):
+        """Delete whatever is still waiting under a pending name."""
+        for name in self.pending:
+            default_storage.delete(name)
+        self.pending = []
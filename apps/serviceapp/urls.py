@@ -21,5 +21,6 @@ urlpatterns = [
     path('terms-conditions/', views.terms_conditions, name='terms_conditions'),
     path('contact/', views.contact, name='contact'),
     path("api/unread-count/", views.unread_count_api, name="unread_count_api"),
+    path("documents/<str:token>/", views.document_download, name="document_download"),
 
 ]
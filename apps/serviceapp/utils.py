@@ -1,17 +1,150 @@
-from django.http import JsonResponse
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from .metrics import cache_lookup
 from .models import QuoteRequest
 
+
+MAX_AUTOFILL_IDS = 100
+# Every worker must see the invalidation in signals.py, so not the per-process default cache
+AUTOFILL_CACHE = "shared"
+
+
+def autofill_cache_key(pk):
+    return f"autofill:quoterequest:{pk}"
+
+
+def clear_autofill(pk):
+    caches[AUTOFILL_CACHE].delete(autofill_cache_key(pk))
+
+
+def _load_autofill(pks):
+    """Build autofill payloads for ``pks`` with three projection queries."""
+    rows = list(
+        QuoteRequest.objects.filter(pk__in=pks).values(
+            "pk", "name", "email", "phone", "city", "postal_code", "address", "updated_at"
+        )
+    )
+    if not rows:
+        return {}
+
+    services = {}
+    links = QuoteRequest.service.through.objects.filter(quoterequest_id__in=[r["pk"] for r in rows])
+    for request_id, service_id, service_name in links.values_list("quoterequest_id", "service_id", "service__name"):
+        services.setdefault(request_id, []).append({"id": service_id, "name": service_name})
+
+    history = {
+        h["email"]: h
+        for h in QuoteRequest.objects.filter(email__in={r["email"] for r in rows})
+        .values("email")
+        .annotate(
+            requests=Count("pk", distinct=True),
+            quotes=Count("quote", distinct=True),
+            invoices=Count("quote__invoice", distinct=True),
+            paid_invoices=Count("quote__invoice", filter=Q(quote__invoice__is_paid=True), distinct=True),
+        )
+    }
+
+    payloads = {}
+    for row in rows:
+        customer = history.get(row["email"], {})
+        payloads[row["pk"]] = {
+            "id": row["pk"],
+            "name": row["name"],
+            "email": row["email"],
+            "phone": row["phone"] or "",
+            "city": row["city"] or "",
+            "postal_code": row["postal_code"] or "",
+            "address": row["address"] or "",
+            "services": services.get(row["pk"], []),
+            "history": {
+                "requests": customer.get("requests", 0),
+                "quotes": customer.get("quotes", 0),
+                "invoices": customer.get("invoices", 0),
+                "paid_invoices": customer.get("paid_invoices", 0),
+            },
+            "updated_at": row["updated_at"].isoformat(),
+        }
+    return payloads
+
+
+def get_autofill(pks):
+    """Return ``{pk: payload}``, served from the cache where possible.
+
+    Entries are dropped when their QuoteRequest is saved (see signals.py);
+    the customer history counts may lag by up to AUTOFILL_CACHE_TIMEOUT.
+    """
+    cache = caches[AUTOFILL_CACHE]
+    keys = {autofill_cache_key(pk): pk for pk in pks}
+    cached = cache.get_many(keys)
+    cache_lookup("autofill", hits=len(cached), misses=len(keys) - len(cached))
+    payloads = {keys[key]: value for key, value in cached.items()}
+
+    missing = [pk for pk in pks if pk not in payloads]
+    if missing:
+        loaded = _load_autofill(missing)
+        cache.set_many(
+            {autofill_cache_key(pk): payload for pk, payload in loaded.items()},
+            getattr(settings, "AUTOFILL_CACHE_TIMEOUT", 300),
+        )
+        payloads.update(loaded)
+    return payloads
+
+
+def _autofill_response(request, data, status=200):
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    etag = '"%s"' % hashlib.md5(body.encode()).hexdigest()
+    if status == 200 and request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(data, status=status, json_dumps_params={"sort_keys": True})
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, max_age=getattr(settings, "AUTOFILL_MAX_AGE", 60))
+    return response
+
+
+def _forbidden(request):
+    if not (request.user.is_active and request.user.is_staff):
+        return JsonResponse({"error": "Staff access required."}, status=403)
+    return None
+
+
+@require_GET
 def get_quote_request(request, pk):
-    try:
-        qr = QuoteRequest.objects.get(pk=pk)
-        return JsonResponse({
-            "city": qr.city or "",
-            "postal_code": qr.postal_code or "",
-            "address": qr.address or "",
-        })
-    except QuoteRequest.DoesNotExist:
+    denied = _forbidden(request)
+    if denied:
+        return denied
+
+    payload = get_autofill([pk]).get(pk)
+    if payload is None:
         return JsonResponse({
             "city": "",
             "postal_code": "",
             "address": ""
         }, status=404)
+    return _autofill_response(request, payload)
+
+
+@require_GET
+def get_quote_requests(request):
+    """Autofill data for several quote requests: ``?ids=1,2,3``."""
+    denied = _forbidden(request)
+    if denied:
+        return denied
+
+    try:
+        pks = [int(pk) for pk in request.GET.get("ids", "").split(",") if pk.strip()]
+    except ValueError:
+        return JsonResponse({"error": "ids must be a comma separated list of integers."}, status=400)
+    pks = list(dict.fromkeys(pks))[:MAX_AUTOFILL_IDS]
+
+    payloads = get_autofill(pks)
+    return _autofill_response(request, {"results": {str(pk): payloads[pk] for pk in pks if pk in payloads}})
@@ -4,14 +4,22 @@ from django.urls import reverse_lazy
 from django.utils.safestring import mark_safe
 import json
 from datetime import datetime
-from django.http import JsonResponse
+from django.core import signing
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.http import require_safe
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 
 
 from .models import (
     Quote, QuoteRequest, Service, Vacancy, Contact, MyCompany,
-    FAQ, ServiceLocation, Pricing, Review, PageContent, HeroSection
+    FAQ, ServiceLocation, Pricing, Review, PageContent, HeroSection,
+    Invoice, DocumentAccess,
 )
 from .forms import QuoteRequestForm, ApplicationForm, ContactForm
+from .ratelimit import client_ip, rate_limited, stats as ratelimit_stats
+from .documents import document_filename, load_document_token, pdf_response
+from .uploads import ResumeUploadHandler, StoredUploadedFile
 
 
 # ================================================
@@ -38,7 +46,7 @@ def dashboard_callback(request, context):
         total_completed = QuoteRequest.objects.filter(status="completed").count()
         unread_messages = Contact.objects.filter(is_read=False).count()  # ✅ Unread message count
 
-        quote_requests = QuoteRequest.objects.all()
+        quote_requests = QuoteRequest.objects.prefetch_related("service")
 
         status_colors = {
             "pending": "#3b82f6",
@@ -67,6 +75,10 @@ def dashboard_callback(request, context):
 
         events_json = mark_safe(json.dumps(events))
 
+        # ✅ Revenue chart, read from the daily summary table only
+        from .reports import monthly_totals
+        revenue_months = monthly_totals()
+
     except Exception as e:
         print(f"Error in dashboard callback: {e}")
         import traceback
@@ -74,6 +86,7 @@ def dashboard_callback(request, context):
         total_requests = total_replied = total_completed = unread_messages = 0
         quote_requests = []
         events_json = mark_safe("[]")
+        revenue_months = []
 
     # ✅ Add all to context for Unfold Dashboard
     context.update({
@@ -82,6 +95,7 @@ def dashboard_callback(request, context):
         "total_completed": total_completed,
         "quote_requests": quote_requests,
         "events": events_json,
+        "revenue_months": revenue_months,
         "site_title": "Service Dashboard",
         "unread_messages": unread_messages,
 
@@ -129,6 +143,7 @@ def dashboard_callback(request, context):
 # ================================================
 # 🧾 Quote Request
 # ================================================
+@rate_limited("quote_request", expensive=True)
 def quete_request(request):
     if request.method == "POST":
         form = QuoteRequestForm(request.POST)
@@ -187,6 +202,7 @@ def services(request):
     return render(request, "services.html", context)
 
 
+@rate_limited("contact")
 def contact(request):
     form = ContactForm(request.POST or None)
     contact_page = PageContent.objects.filter(page='contact').first()
@@ -223,20 +239,38 @@ def terms_conditions(request):
 # ================================================
 def career(request):
     context = base_context()
-    context["vacancies"] = Vacancy.objects.filter(is_active=True)
+    context["vacancies"] = Vacancy.objects.open()
     return render(request, "career.html", context)
 
 
 # ================================================
 # 📝 Job Application
 # ================================================
+@rate_limited("job_application", expensive=True)
+@csrf_exempt
 def job_application(request, vacancy_id):
-    vacancy = get_object_or_404(Vacancy, id=vacancy_id)
+    # Upload handlers must be swapped before CSRF middleware reads request.POST,
+    # so the CSRF check runs inside instead. The resume is only kept if the
+    # application is saved; a 403, 404 or invalid form leaves nothing behind.
+    handler = ResumeUploadHandler(request)
+    request.upload_handlers = [handler]
+    try:
+        return _job_application(request, vacancy_id)
+    finally:
+        handler.discard_pending()
+
+
+@csrf_protect
+def _job_application(request, vacancy_id):
+    vacancy = get_object_or_404(Vacancy.objects.open(), id=vacancy_id)
     if request.method == "POST":
-        form = ApplicationForm(request.POST, request.FILES)
+        form = ApplicationForm(request.POST, request.FILES, upload_error=getattr(request, "upload_error", None))
         if form.is_valid():
             application = form.save(commit=False)
             application.vacancy = vacancy
+            resume = request.FILES.get("resume")
+            if isinstance(resume, StoredUploadedFile):
+                application.resume = resume.commit()
             application.save()
             messages.success(request, 'Your application has been submitted successfully!')
             return redirect('career')
@@ -251,6 +285,42 @@ def job_application(request, vacancy_id):
     return render(request, "job_application.html", context)
 
 
+# ================================================
+# 📄 Quote / Invoice download (signed email link)
+# ================================================
+@require_safe
+def document_download(request, token):
+    """Serve the PDF behind a signed link. Touches neither the session nor request.user."""
+    try:
+        kind, pk = load_document_token(token)
+    except signing.SignatureExpired:
+        return HttpResponse("This link has expired. Please contact us for a new copy.", status=410, content_type="text/plain")
+    except signing.BadSignature:
+        raise Http404("Invalid link.")
+
+    if kind == "quote":
+        documents = Quote.objects.select_related("company", "quote_request")
+    else:
+        documents = Invoice.objects.select_related("quote__company", "quote__quote_request")
+    obj = documents.filter(pk=pk).first()
+    if obj is None:
+        raise Http404("Document not found.")
+    if request.method == "GET" and not _is_prefetch(request):
+        DocumentAccess.objects.create(
+            document=kind,
+            object_id=pk,
+            ip_address=client_ip(request) or None,
+            user_agent=request.headers.get("User-Agent", "")[:255],
+        )
+    return pdf_response(request, obj, document_filename(obj))
+
+
+def _is_prefetch(request):
+    """Browser and mail-client link prefetches, which nobody actually opened."""
+    purpose = request.headers.get("Sec-Purpose") or request.headers.get("Purpose") or request.headers.get("X-Moz") or ""
+    return "prefetch" in purpose.lower()
+
+
 # ================================================
 # 🔍 Service Detail
 # ================================================
@@ -271,3 +341,8 @@ def unread_count_api(request):
     except Exception:
         count = 0
     return JsonResponse({"unread": count})
+
+
+@staff_member_required
+def ratelimit_stats_api(request):
+    return JsonResponse(ratelimit_stats())
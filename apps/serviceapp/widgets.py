@@ -0,0 +1,34 @@
+from django.contrib.admin.widgets import AutocompleteSelect
+
+
+class CachedAutocompleteSelect(AutocompleteSelect):
+    """Autocomplete select that shares selected-option labels between widgets.
+
+    Inline formsets deep-copy one widget per row. The copies share
+    ``choice_cache`` (pk -> label), so a cache warmed once per request lets
+    every row render without its own lookup query.
+    """
+
+    def __init__(self, *args, choice_cache=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.choice_cache = {} if choice_cache is None else choice_cache
+
+    def optgroups(self, name, value, attr=None):
+        default = (None, [], 0)
+        selected_choices = [
+            str(v) for v in value if str(v) not in self.choices.field.empty_values
+        ]
+        if not self.is_required and not self.allow_multiple_selected:
+            default[1].append(self.create_option(name, "", "", False, 0))
+
+        missing = set(selected_choices) - self.choice_cache.keys()
+        if missing:
+            for obj in self.choices.queryset.using(self.db).filter(pk__in=missing):
+                self.choice_cache[str(obj.pk)] = self.choices.field.label_from_instance(obj)
+
+        for option_value in selected_choices:
+            if option_value in self.choice_cache:
+                default[1].append(self.create_option(
+                    name, option_value, self.choice_cache[option_value], selected_choices, len(default[1])
+                ))
+        return [default]
@@ -0,0 +1,11 @@
+# Picked up automatically when gunicorn is started from the project root.
+
+
+def child_exit(server, worker):
+    # Drop a dead worker's live gauges from the shared Prometheus directory (see apps/serviceapp/metrics.py)
+    import os
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
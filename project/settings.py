@@ -43,11 +43,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.serviceapp.metrics.MetricsMiddleware',
+    'apps.serviceapp.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.serviceapp.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -97,6 +100,18 @@ DATABASES = {
 #     }
 # }
 
+# "default" is per process. "shared" is seen by every gunicorn worker and holds rate
+# limit buckets; create its table with `python manage.py createcachetable` (or point
+# it at django.core.cache.backends.redis.RedisCache when Redis is available).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "serviceapp_shared_cache",
+    },
+}
 
 
 # Password validation
@@ -161,7 +176,7 @@ CKEDITOR_CONFIGS = {
 
 
 # Email
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = "apps.serviceapp.timing.TimedEmailBackend"  # SMTP, timed for Server-Timing
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -173,3 +188,100 @@ CSRF_TRUSTED_ORIGINS = [
     'https://cleaning-australia.onrender.com',
     'http://localhost:8000',
 ]
+
+# Applicant status emails are sent in batches over one SMTP connection
+APPLICATION_NOTIFICATION_BATCH_SIZE = 50
+APPLICATION_NOTIFICATION_BATCH_PAUSE = 1.0  # seconds between batches
+APPLICATION_NOTIFICATION_CLAIM_TIMEOUT = 600  # seconds before a row stuck in "sending" is marked failed
+
+# Quote/invoice numbers each worker reserves from the sequence table at once
+DOCUMENT_NUMBER_BLOCK_SIZE = 20
+
+# Rate limiting for public form POSTs (see apps/serviceapp/ratelimit.py)
+RATELIMIT_ENABLED = True
+RATELIMIT_CACHE = "shared"  # must not be a LocMem cache (check serviceapp.E001)
+RATELIMIT_RULES = {
+    # endpoint: (requests, seconds) per client IP and per submitted email
+    "quote_request": (5, 3600),
+    "contact": (5, 3600),
+    "job_application": (3, 3600),
+}
+RATELIMIT_MAX_CONCURRENT = 4  # in-flight quote/job application POSTs
+RATELIMIT_TRUSTED_PROXIES = 0  # reverse proxies that append to X-Forwarded-For, e.g. 1 behind nginx
+
+# Resume uploads on the job application form
+RESUME_MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # bytes
+RESUME_ALLOWED_TYPES = ("pdf", "doc", "docx")
+
+# Maximum ranked matches returned by the admin full-text search
+ADMIN_SEARCH_RESULT_LIMIT = 500
+
+# Admin changelist pagination (see apps/serviceapp/pagination.py)
+PAGINATOR_ESTIMATE_THRESHOLD = 10000  # use planner estimates above this many rows
+PAGINATOR_COUNT_CACHE_TIMEOUT = 60  # seconds
+PAGINATOR_BOUNDARY_CACHE_TIMEOUT = 300  # seconds
+PAGINATOR_CACHE = "default"  # per-process; "shared" lets workers reuse each other's page boundaries
+
+# Quote request autofill API used by the quote form
+AUTOFILL_CACHE_TIMEOUT = 300  # server-side cache, seconds
+AUTOFILL_MAX_AGE = 60  # browser Cache-Control max-age, seconds
+
+# Unquoted rejected/cancelled/expired quote requests, read contacts and applications
+# older than this move to the archive tables
+ARCHIVE_AFTER_DAYS = 365
+
+# Rendered quote/invoice PDFs kept in memory per process for the admin preview
+DOCUMENT_CACHE_SIZE = 32
+DOCUMENT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Threads rendering missing PDFs for the admin ZIP download
+DOCUMENT_EXPORT_WORKERS = 4
+
+# Rows fetched per database round trip by the admin CSV/XLSX exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Generated quote/invoice PDFs: the company logo is downscaled once for documents
+# (longest side in pixels, JPEG quality) and WeasyPrint recompresses images and subsets fonts
+DOCUMENT_LOGO_MAX_SIZE = 300
+DOCUMENT_LOGO_QUALITY = 85
+DOCUMENT_PDF_OPTIONS = {
+    "optimize_images": True,
+    "jpeg_quality": 85,
+    "dpi": 300,
+    "full_fonts": False,
+    "hinting": False,
+}
+
+# Quote/invoice emails: "attachment" sends the PDF, "link" sends a signed download
+# link (apps/serviceapp/documents.py) that expires after DOCUMENT_LINK_MAX_AGE seconds
+DOCUMENT_DELIVERY = "attachment"
+DOCUMENT_LINK_MAX_AGE = 30 * 24 * 3600
+SITE_URL = "https://www.fawzcleaningandgardening.com.au"
+
+# Server-Timing header and one JSON log line per request (apps/serviceapp/timing.py).
+# The header goes to staff only unless SERVER_TIMING_PUBLIC; only requests slower
+# than the threshold are logged
+SERVER_TIMING = True
+SERVER_TIMING_PUBLIC = False
+SERVER_TIMING_LOG_THRESHOLD_MS = 500
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "apps.serviceapp.timing": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
+# Prometheus /metrics (apps/serviceapp/metrics.py). Scrapers must send
+# "Authorization: Bearer <METRICS_TOKEN>"; while it is empty the endpoint returns 404.
+# For gunicorn, export PROMETHEUS_MULTIPROC_DIR so all workers' samples are merged.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# On-demand profiling for staff (apps/serviceapp/profiling.py): "Profile a page" in the
+# admin opens a page with a signed token that is valid for PROFILE_TOKEN_MAX_AGE seconds
+PROFILING_ENABLED = True
+PROFILE_TOKEN_MAX_AGE = 3600
@@ -84,6 +84,9 @@ UNFOLD = {
                     {"title": _("Quote Request"), "icon": "unknown_document", "link": reverse_lazy("admin:serviceapp_quoterequest_changelist")},
                     {"title": _("Quote"), "icon": "request_quote", "link": reverse_lazy("admin:serviceapp_quote_changelist")},
                     {"title": _("Invoice"), "icon": "picture_as_pdf", "link": reverse_lazy("admin:serviceapp_invoice_changelist")},
+                    {"title": _("Payments"), "icon": "payments", "link": reverse_lazy("admin:serviceapp_payment_changelist")},
+                    {"title": _("Reports"), "icon": "monitoring", "link": reverse_lazy("admin:serviceapp_reports")},
+                    {"title": _("Request profiles"), "icon": "speed", "link": reverse_lazy("admin:serviceapp_requestprofile_changelist")},
                     {"title": _("Users"), "icon": "people", "link": reverse_lazy("admin:auth_user_changelist")},
                 ],
             },
@@ -132,6 +135,20 @@ UNFOLD = {
                     {"title": _("Email Templates"), "icon": "mark_email_unread", "link": reverse_lazy("admin:serviceapp_emailmessagetemplate_changelist")},
                 ],
             },
+
+            # -------------------------------
+            # 🗄️ ARCHIVE
+            # -------------------------------
+            {
+                "title": _("Archive"),
+                "separator": True,
+                "collapsible": True,
+                "items": [
+                    {"title": _("Quote Requests"), "icon": "inventory_2", "link": reverse_lazy("admin:serviceapp_archivedquoterequest_changelist")},
+                    {"title": _("Contacts"), "icon": "inventory_2", "link": reverse_lazy("admin:serviceapp_archivedcontact_changelist")},
+                    {"title": _("Applications"), "icon": "inventory_2", "link": reverse_lazy("admin:serviceapp_archivedapplication_changelist")},
+                ],
+            },
         ],
     },
 }
@@ -3,14 +3,18 @@ from django.conf.urls.static import static
 
 from django.contrib import admin
 from django.urls import path, include
-from apps.serviceapp.views import unread_count_api  # 
-from apps.serviceapp.utils import get_quote_request
+from apps.serviceapp.views import unread_count_api, ratelimit_stats_api  # 
+from apps.serviceapp.utils import get_quote_request, get_quote_requests
+from apps.serviceapp.metrics import metrics_view
 
 urlpatterns = [
     path('admin/api/unread-count/', unread_count_api, name='admin_unread_count_api'),  
+    path('admin/api/ratelimit-stats/', ratelimit_stats_api, name='admin_ratelimit_stats_api'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('', include('apps.serviceapp.urls')),
     path("get-quote-request/<int:pk>/", get_quote_request, name="get_quote_request"),
+    path("get-quote-request/", get_quote_requests, name="get_quote_requests"),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)